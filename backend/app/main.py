@@ -1,18 +1,81 @@
-from fastapi import FastAPI
+import time
+
+# 시작 단계별 소요 시간 측정 기준 (모듈 임포트 포함)
+_import_started = time.perf_counter()
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import logging
+
+from app.routers import interview, generate, templates, analyze, catalog, history, usage
+from app.models.database import DB_INIT_ON_STARTUP, init_db, engine
+from app.services.catalog import mark_interrupted_jobs
+from app.services.background_library import BACKGROUND_LIBRARY_ENABLED, load_library, library_refresh_loop
+from app.services.loop_monitor import LOOP_MONITOR_ENABLED, loop_monitor
+from app.services.retention import RETENTION_ENABLED, retention_loop
+from app.services.provider_gateway import ProviderUnavailableError
+from app.services.render_pool import RenderBusyError, shutdown_render_pool, start_render_pool
+from app.services.tenants import QuotaExceededError, SchedulerBusyError, UnknownApiKeyError, get_tenant
+from app.services.metrics import (
+    SERVER_TIMING_ENABLED,
+    instrument_engine,
+    observe,
+    render_prometheus,
+    set_gauge,
+    start_request_timing,
+    format_server_timing,
+)
 
-from app.routers import interview, generate, templates, analyze
-from app.models.database import init_db
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _startup_phase(phases: list, name: str):
+    """시작 단계 소요 시간 기록"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        set_gauge("startup_phase_seconds", elapsed, phase=name)
+        phases.append(f"{name} {elapsed * 1000:.0f}ms")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """앱 시작/종료 시 실행"""
     # 시작 시
-    await init_db()
+    phases = [f"import {_import_duration * 1000:.0f}ms"]
+    if DB_INIT_ON_STARTUP:
+        with _startup_phase(phases, "init_db"):
+            await init_db()
+    with _startup_phase(phases, "mark_interrupted_jobs"):
+        await mark_interrupted_jobs()
+    with _startup_phase(phases, "load_library"):
+        await load_library()
+    with _startup_phase(phases, "render_pool"):
+        start_render_pool()
+
+    background_tasks = []
+    if LOOP_MONITOR_ENABLED:
+        background_tasks.append(asyncio.create_task(loop_monitor()))
+    if BACKGROUND_LIBRARY_ENABLED:
+        background_tasks.append(asyncio.create_task(library_refresh_loop()))
+    if RETENTION_ENABLED:
+        background_tasks.append(asyncio.create_task(retention_loop()))
+
+    logger.info("시작 완료: %s", ", ".join(phases))
+
     yield
+
     # 종료 시
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    shutdown_render_pool()
 
 
 app = FastAPI(
@@ -29,13 +92,89 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# DB 쿼리 시간 측정
+instrument_engine(engine)
+
+
+@app.exception_handler(ProviderUnavailableError)
+@app.exception_handler(RenderBusyError)
+@app.exception_handler(SchedulerBusyError)
+async def provider_unavailable_handler(request: Request, exc: ProviderUnavailableError):
+    """AI 제공자 장애/속도 제한, 렌더/실행 대기열 초과는 503 + Retry-After로 응답 (클라이언트 재시도 가능)"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after or 5))},
+    )
+
+
+@app.exception_handler(QuotaExceededError)
+async def quota_exceeded_handler(request: Request, exc: QuotaExceededError):
+    """테넌트 일일 예산 소진은 429 + 초기화 시각까지의 Retry-After"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after or 60))},
+    )
+
+
+@app.exception_handler(UnknownApiKeyError)
+async def unknown_api_key_handler(request: Request, exc: UnknownApiKeyError):
+    return JSONResponse(status_code=401, content={"detail": str(exc)})
+
+
+_import_duration = time.perf_counter() - _import_started
+set_gauge("startup_phase_seconds", _import_duration, phase="import")
+
+
+def _route_label(request: Request) -> str:
+    """메트릭 레이블용 경로 템플릿 (경로 파라미터 값을 이름으로 치환해 카디널리티 제한)"""
+    if request.scope.get("route") is None:
+        return "unmatched"
+
+    segments = request.url.path.split("/")
+    for name, value in request.path_params.items():
+        value = str(value)
+        if value in segments:
+            segments[segments.index(value)] = f"{{{name}}}"
+    return "/".join(segments)
+
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """요청 처리 시간 기록 및 Server-Timing 헤더 추가"""
+    started = time.perf_counter()
+    timings = start_request_timing()
+
+    response = await call_next(request)
+
+    elapsed = time.perf_counter() - started
+    observe(
+        "http_request_duration_seconds",
+        elapsed,
+        method=request.method,
+        route=_route_label(request),
+        status=response.status_code,
+    )
+
+    if SERVER_TIMING_ENABLED or request.headers.get("x-server-timing") == "1":
+        response.headers["Server-Timing"] = format_server_timing(timings, elapsed)
+
+    return response
+
+
 # 라우터 등록
-app.include_router(interview.router, prefix="/api/interview", tags=["문답"])
+# 문답은 LLM을 호출하므로 테넌트를 식별해 사용량을 기록
+app.include_router(interview.router, prefix="/api/interview", tags=["문답"], dependencies=[Depends(get_tenant)])
 app.include_router(generate.router, prefix="/api/generate", tags=["생성"])
 app.include_router(templates.router, prefix="/api/templates", tags=["템플릿"])
 app.include_router(analyze.router, prefix="/api/analyze", tags=["분석"])
+app.include_router(catalog.router, prefix="/api/catalog", tags=["카탈로그"])
+app.include_router(history.router, prefix="/api/history", tags=["생성 이력"])
+app.include_router(usage.router, prefix="/api/usage", tags=["사용량"])
 
 
 @app.get("/")
@@ -46,3 +185,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 메트릭"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,14 +1,71 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, select
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, select, event, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./data/app.db")
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# 배포 규모별 커넥션 풀 프로파일 (asyncpg 등 서버형 DB에만 적용)
+# 워커 수 x (pool_size + max_overflow)가 Postgres max_connections를 넘지 않도록 선택
+DB_POOL_PROFILES = {
+    "small": {"pool_size": 5, "max_overflow": 5},
+    "standard": {"pool_size": 10, "max_overflow": 10},
+    "large": {"pool_size": 20, "max_overflow": 30},
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "standard")
+DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = os.getenv("DB_MAX_OVERFLOW")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite: WAL로 읽기/쓰기 동시 진행, 잠금 시 바로 실패하지 않고 대기
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# 0이면 앱 시작 시 스키마 생성/시드를 건너뜀 (배포 때 python -m app.models.database로 1회 실행)
+DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "1") == "1"
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _engine_options(url: str) -> dict:
+    """DB 종류/프로파일별 create_async_engine 옵션"""
+    if _is_sqlite(url):
+        return {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+
+    options = dict(DB_POOL_PROFILES.get(DB_PROFILE, DB_POOL_PROFILES["standard"]))
+    if DB_POOL_SIZE:
+        options["pool_size"] = int(DB_POOL_SIZE)
+    if DB_MAX_OVERFLOW:
+        options["max_overflow"] = int(DB_MAX_OVERFLOW)
+    options.update(
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+    )
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, echo=False, **_engine_options(DATABASE_URL))
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+if _is_sqlite(DATABASE_URL):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if SQLITE_JOURNAL_MODE.upper() == "WAL":
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+# Postgres에서는 JSONB로 저장 (GIN 인덱스, 키 조회 연산자 사용 가능)
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
+
 Base = declarative_base()
 
 
@@ -20,7 +77,11 @@ class Session(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     status = Column(String(20), default="in_progress")  # in_progress, completed, cancelled
-    context = Column(JSON, default=dict)  # 수집된 정보
+    context = Column(JSONVariant, default=dict)  # 수집된 정보
+
+    __table_args__ = (
+        Index("ix_sessions_context_gin", "context", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
 
 class GenerationHistory(Base):
@@ -34,6 +95,15 @@ class GenerationHistory(Base):
     output_format = Column(String(20))  # html, image, both
     html_content = Column(Text, nullable=True)
     image_path = Column(String(500), nullable=True)
+    sections = Column(JSON, nullable=True)  # 섹션별 카피 (섹션 단위 재생성 시 재사용)
+    render_options = Column(JSON, nullable=True)  # template_id, mood, variation
+    image_variants = Column(JSON, nullable=True)  # 뷰포트 -> 이미지 경로 (다중 뷰포트 렌더링)
+
+    __table_args__ = (
+        Index("ix_generation_history_session_created", "session_id", "created_at"),
+        # 이력 목록 키셋 페이지네이션 (created_at, id 내림차순)
+        Index("ix_generation_history_created_id", "created_at", "id"),
+    )
 
 
 class ReferenceAnalysis(Base):
@@ -44,7 +114,54 @@ class ReferenceAnalysis(Base):
     url = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
     screenshot_path = Column(String(500), nullable=True)
-    analysis_result = Column(JSON)  # Claude Vision 분석 결과
+    analysis_result = Column(JSONVariant)  # Claude Vision 분석 결과
+
+    __table_args__ = (
+        Index("ix_reference_analysis_result_gin", "analysis_result", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+
+class CatalogJob(Base):
+    """카탈로그 일괄 생성 작업"""
+    __tablename__ = "catalog_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    status = Column(String(20), default="pending")  # pending, running, completed, interrupted
+    source_filename = Column(String(200), nullable=True)
+    output_format = Column(String(20))  # html, image, both
+    template_id = Column(Integer, nullable=True)
+    total = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    archive_path = Column(String(500), nullable=True)
+
+
+class CatalogJobItem(Base):
+    """카탈로그 작업의 상품 1건 (체크포인트 단위)"""
+    __tablename__ = "catalog_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, index=True)
+    row_index = Column(Integer)
+    status = Column(String(20), default="pending")  # pending, completed, failed, skipped
+    context = Column(JSON, default=dict)  # 피드 행을 문답 필드로 매핑한 결과
+    history_id = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+
+
+class BackgroundImage(Base):
+    """DALL-E 배경 이미지 캐시 (프롬프트 키 -> 로컬 이미지)"""
+    __tablename__ = "background_images"
+
+    id = Column(Integer, primary_key=True, index=True)
+    prompt_key = Column(String(64), unique=True, index=True)
+    content_hash = Column(String(64), index=True)
+    file_path = Column(String(500))
+    size_bytes = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class Template(Base):
@@ -63,17 +180,103 @@ async def init_db():
     """데이터베이스 초기화"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(ensure_columns)
+        await conn.run_sync(ensure_indexes)
+        await conn.run_sync(ensure_search_index)
 
     # 샘플 템플릿 시드
     await seed_templates()
 
 
+def ensure_columns(conn):
+    """기존 테이블에 나중에 추가된 nullable 컬럼 추가 (create_all은 기존 테이블을 변경하지 않음)"""
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+            ))
+
+
+def ensure_indexes(conn):
+    """기존 DB에 나중에 추가된 인덱스/컬럼 타입 반영 (create_all은 기존 테이블의 인덱스를 만들지 않음)"""
+    inspector = inspect(conn)
+
+    # Postgres: 이전 버전에서 json으로 만든 컬럼은 GIN 인덱스 전에 jsonb로 변환
+    if conn.dialect.name == "postgresql":
+        for table, column in (("sessions", "context"), ("reference_analysis", "analysis_result")):
+            types = {col["name"]: col["type"] for col in inspector.get_columns(table)}
+            if column in types and not isinstance(types[column], JSONB):
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb"))
+
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn, checkfirst=True)
+
+
+# 상품명 전문 검색 인덱스
+# SQLite: FTS5 trigram (한국어 부분 일치), 원본 테이블과 트리거로 동기화
+HISTORY_FTS_TABLE = "generation_history_fts"
+SQLITE_HISTORY_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE {HISTORY_FTS_TABLE} USING fts5(
+        product_name, content='generation_history', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER generation_history_fts_ai AFTER INSERT ON generation_history BEGIN
+        INSERT INTO {HISTORY_FTS_TABLE}(rowid, product_name) VALUES (new.id, new.product_name);
+    END""",
+    f"""CREATE TRIGGER generation_history_fts_ad AFTER DELETE ON generation_history BEGIN
+        INSERT INTO {HISTORY_FTS_TABLE}({HISTORY_FTS_TABLE}, rowid, product_name)
+        VALUES ('delete', old.id, old.product_name);
+    END""",
+    f"""CREATE TRIGGER generation_history_fts_au AFTER UPDATE OF product_name ON generation_history BEGIN
+        INSERT INTO {HISTORY_FTS_TABLE}({HISTORY_FTS_TABLE}, rowid, product_name)
+        VALUES ('delete', old.id, old.product_name);
+        INSERT INTO {HISTORY_FTS_TABLE}(rowid, product_name) VALUES (new.id, new.product_name);
+    END""",
+    f"INSERT INTO {HISTORY_FTS_TABLE}({HISTORY_FTS_TABLE}) VALUES ('rebuild')",
+]
+# Postgres: tsvector 식 인덱스 (형태소 분석 없이 공백 단위 'simple' 설정)
+POSTGRES_HISTORY_FTS_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_generation_history_product_name_fts "
+    "ON generation_history USING gin (to_tsvector('simple', coalesce(product_name, '')))",
+]
+
+
+def ensure_search_index(conn):
+    """생성 이력 상품명 전문 검색 인덱스 생성 (기존 행 포함)"""
+    if conn.dialect.name == "postgresql":
+        for statement in POSTGRES_HISTORY_FTS_DDL:
+            conn.execute(text(statement))
+        return
+
+    if conn.dialect.name != "sqlite":
+        return
+
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": HISTORY_FTS_TABLE},
+    ).first()
+    if exists:
+        return
+
+    for statement in SQLITE_HISTORY_FTS_DDL:
+        conn.execute(text(statement))
+
+
 async def seed_templates():
     """샘플 템플릿 시드 데이터 추가"""
     async with async_session() as session:
-        # 이미 템플릿이 있으면 스킵
-        result = await session.execute(select(Template))
-        if result.scalars().first():
+        # 이미 템플릿이 있으면 스킵 (행 1개 존재 여부만 확인)
+        result = await session.execute(select(Template.id).limit(1))
+        if result.first():
             return
 
         sample_templates = [
@@ -517,3 +720,10 @@ async def get_db():
     """DB 세션 의존성"""
     async with async_session() as session:
         yield session
+
+
+if __name__ == "__main__":
+    # 배포 시 1회 실행하는 스키마/인덱스 생성 및 시드
+    import asyncio
+
+    asyncio.run(init_db())
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -21,6 +21,12 @@ class Mood(str, Enum):
     PROFESSIONAL = "professional"
 
 
+class Viewport(str, Enum):
+    DESKTOP = "desktop"  # 860px
+    MOBILE = "mobile"  # 360px
+    MOBILE_LARGE = "mobile_large"  # 414px
+
+
 class OutputFormat(str, Enum):
     HTML = "html"
     IMAGE = "image"
@@ -76,6 +82,19 @@ class AnalysisResult(BaseModel):
     screenshot_url: Optional[str] = None
 
 
+class BatchAnalyzeRequest(BaseModel):
+    """참고 페이지 일괄 분석 요청"""
+    urls: List[HttpUrl] = Field(..., min_length=1, max_length=50)
+
+
+class BatchAnalysisItem(BaseModel):
+    """일괄 분석 개별 결과 (완료되는 순서대로 스트리밍)"""
+    url: str
+    status: str  # completed, failed
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+
+
 # === 생성 관련 ===
 
 class GenerateRequest(BaseModel):
@@ -83,14 +102,90 @@ class GenerateRequest(BaseModel):
     session_id: int
     output_format: OutputFormat = OutputFormat.BOTH
     template_id: Optional[int] = None
+    # A/B 테스트용 변형 개수 (분위기/템플릿 목록을 순환하며 적용, 없으면 카피만 다르게)
+    variants: int = Field(1, ge=1, le=6)
+    variant_moods: Optional[List[Mood]] = None
+    variant_template_ids: Optional[List[int]] = None
+    # 이미지 출력 너비 (여러 개면 한 번 로드한 페이지에서 뷰포트만 바꿔 캡처, 변형 생성 시 변형마다 적용)
+    viewports: Optional[List[Viewport]] = None
+    # 첫 화면 미리보기 이미지 추가 생성
+    include_preview: bool = False
+
+
+class GenerateVariant(BaseModel):
+    """변형 생성 결과"""
+    id: int
+    mood: Optional[str] = None
+    template_id: Optional[int] = None
+    html_content: Optional[str] = None
+    image_url: Optional[str] = None
+    preview_url: str
+    image_urls: Optional[Dict[str, str]] = None
 
 
 class GenerateResponse(BaseModel):
-    """생성 결과"""
+    """생성 결과 (변형 생성 시 첫 번째 변형 + 전체 목록)"""
     id: int
     html_content: Optional[str] = None
     image_url: Optional[str] = None
     preview_url: str
+    variants: Optional[List[GenerateVariant]] = None
+    sections: Optional[Dict[str, str]] = None
+    # 뷰포트별 이미지 URL (desktop, mobile, mobile_large, preview)
+    image_urls: Optional[Dict[str, str]] = None
+
+
+# === 카탈로그 일괄 생성 관련 ===
+
+class CatalogJobResponse(BaseModel):
+    """일괄 생성 작업 상태"""
+    id: int
+    status: str
+    total: int
+    completed: int
+    failed: int
+    created_at: datetime
+    archive_url: Optional[str] = None
+
+
+# === 생성 이력 관련 ===
+
+class HistoryItem(BaseModel):
+    """생성 이력 목록 항목 (HTML 본문 제외)"""
+    id: int
+    session_id: Optional[int] = None
+    created_at: datetime
+    product_name: Optional[str] = None
+    output_format: Optional[str] = None
+    has_html: bool
+    image_url: Optional[str] = None
+    preview_url: str
+
+
+class HistoryListResponse(BaseModel):
+    """생성 이력 목록 (next_cursor로 다음 페이지 조회)"""
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None
+
+
+# === 테넌트 사용량 관련 ===
+
+class TenantLimitsResponse(BaseModel):
+    """테넌트 한도 (0이면 제한 없음)"""
+    max_concurrent: int
+    daily_tokens: int
+    daily_images: int
+
+
+class TenantUsageResponse(BaseModel):
+    """테넌트의 당일(UTC) 사용량"""
+    tenant: str
+    day: str
+    tokens: int
+    images: int
+    requests: Dict[str, int]
+    active_requests: int
+    limits: TenantLimitsResponse
 
 
 # === 템플릿 관련 ===
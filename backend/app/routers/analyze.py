@@ -1,17 +1,41 @@
+import os
+from typing import Any, Dict, List
+from urllib.parse import urldefrag
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.database import get_db, ReferenceAnalysis
-from app.models.schemas import AnalyzeRequest, AnalysisResult
-from app.services.analyzer import analyze_reference_page
+from app.models.database import get_db, async_session, ReferenceAnalysis
+from app.models.schemas import AnalyzeRequest, AnalysisResult, BatchAnalyzeRequest, BatchAnalysisItem
+from app.services.analyzer import analyze_reference_page, analyze_reference_pages
+from app.services.provider_gateway import ProviderUnavailableError
+from app.services.render_pool import RenderBusyError
+from app.services.tenants import tenant_slot
 
 router = APIRouter()
 
+# 일괄 분석 결과를 몇 건씩 모아서 저장할지
+BATCH_COMMIT_SIZE = int(os.getenv("BATCH_COMMIT_SIZE", "10"))
+
+
+def _to_analysis_result(result: Dict[str, Any]) -> AnalysisResult:
+    """분석 결과 딕셔너리를 응답 스키마로 변환"""
+    return AnalysisResult(
+        layout_pattern=result.get("layout_pattern", ""),
+        color_scheme=result.get("color_scheme", {}),
+        sections=result.get("sections", []),
+        highlights=result.get("highlights", []),
+        tone_and_manner=result.get("tone_and_manner", ""),
+        screenshot_url=result.get("screenshot_path"),
+    )
+
 
 @router.post("/reference", response_model=AnalysisResult)
 async def analyze_reference(
     request: AnalyzeRequest,
     db: AsyncSession = Depends(get_db),
+    tenant: str = Depends(tenant_slot("analysis")),
 ):
     """참고 페이지 분석"""
     try:
@@ -26,14 +50,60 @@ async def analyze_reference(
         db.add(analysis)
         await db.commit()
 
-        return AnalysisResult(
-            layout_pattern=result.get("layout_pattern", ""),
-            color_scheme=result.get("color_scheme", {}),
-            sections=result.get("sections", []),
-            highlights=result.get("highlights", []),
-            tone_and_manner=result.get("tone_and_manner", ""),
-            screenshot_url=result.get("screenshot_path"),
-        )
+        return _to_analysis_result(result)
 
+    except (ProviderUnavailableError, RenderBusyError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 실패: {str(e)}")
+
+
+async def _save_analyses(rows: List[ReferenceAnalysis]):
+    """분석 결과 일괄 저장"""
+    if not rows:
+        return
+    async with async_session() as db:
+        db.add_all(rows)
+        await db.commit()
+
+
+@router.post("/batch")
+async def analyze_reference_batch(
+    request: BatchAnalyzeRequest,
+    tenant: str = Depends(tenant_slot("analysis")),
+):
+    """참고 페이지 일괄 분석 (NDJSON으로 완료된 순서대로 결과 전송)
+
+    실행 슬롯은 응답 시작 전에 받고(예산 초과는 429) 스트리밍이 끝날 때 반납된다.
+    """
+    # 중복 URL 제거 (fragment 무시, 요청 순서 유지)
+    urls = list(dict.fromkeys(urldefrag(str(url)).url for url in request.urls))
+
+    async def stream():
+        pending: List[ReferenceAnalysis] = []
+        completed = 0
+
+        async for url, result, error in analyze_reference_pages(urls):
+            if error is not None:
+                item = BatchAnalysisItem(url=url, status="failed", error=f"분석 실패: {error}")
+            else:
+                completed += 1
+                pending.append(
+                    ReferenceAnalysis(
+                        url=url,
+                        screenshot_path=result.get("screenshot_path"),
+                        analysis_result=result,
+                    )
+                )
+                item = BatchAnalysisItem(url=url, status="completed", result=_to_analysis_result(result))
+
+            yield item.model_dump_json() + "\n"
+
+            if len(pending) >= BATCH_COMMIT_SIZE:
+                await _save_analyses(pending)
+                pending = []
+
+        await _save_analyses(pending)
+        yield f'{{"status": "done", "total": {len(urls)}, "completed": {completed}}}\n'
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
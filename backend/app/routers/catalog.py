@@ -0,0 +1,108 @@
+import os
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.models.database import get_db, CatalogJob
+from app.models.schemas import CatalogJobResponse, OutputFormat
+from app.services.catalog import parse_feed, create_catalog_job, start_catalog_job
+from app.services.tenants import check_budget, get_tenant
+
+router = APIRouter()
+
+# 한 번에 업로드할 수 있는 최대 상품 수
+CATALOG_MAX_ROWS = int(os.getenv("CATALOG_MAX_ROWS", "2000"))
+
+
+def _to_job_response(job: CatalogJob) -> CatalogJobResponse:
+    return CatalogJobResponse(
+        id=job.id,
+        status=job.status,
+        total=job.total,
+        completed=job.completed,
+        failed=job.failed,
+        created_at=job.created_at,
+        archive_url=f"/api/catalog/jobs/{job.id}/archive" if job.archive_path else None,
+    )
+
+
+@router.post("/jobs", response_model=CatalogJobResponse)
+async def create_job(
+    feed: UploadFile = File(...),
+    output_format: OutputFormat = Form(OutputFormat.BOTH),
+    template_id: Optional[int] = Form(None),
+    tenant: str = Depends(get_tenant),
+):
+    """상품 피드(CSV/JSON)로 일괄 생성 작업 시작 (작업의 토큰 사용량은 요청한 테넌트에 기록)"""
+    check_budget(tenant, "generation")
+    try:
+        rows = parse_feed(feed.filename or "", await feed.read())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"피드를 읽을 수 없습니다: {str(e)}")
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="피드에 상품이 없습니다")
+
+    if len(rows) > CATALOG_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {CATALOG_MAX_ROWS}개 상품까지 처리할 수 있습니다")
+
+    job = await create_catalog_job(feed.filename, rows, output_format.value, template_id)
+    start_catalog_job(job.id)
+
+    return _to_job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=CatalogJobResponse)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """작업 진행 상황 조회"""
+    job = await db.get(CatalogJob, job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+
+    return _to_job_response(job)
+
+
+@router.post("/jobs/{job_id}/resume", response_model=CatalogJobResponse)
+async def resume_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    tenant: str = Depends(get_tenant),
+):
+    """중단/실패 항목 이어서 실행 (완료된 항목은 건너뜀)"""
+    check_budget(tenant, "generation")
+    job = await db.get(CatalogJob, job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+
+    if not start_catalog_job(job.id):
+        raise HTTPException(status_code=409, detail="이미 실행 중인 작업입니다")
+
+    return _to_job_response(job)
+
+
+@router.get("/jobs/{job_id}/archive")
+async def download_archive(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """생성 결과 아카이브(ZIP) 다운로드"""
+    job = await db.get(CatalogJob, job_id)
+
+    if not job or not job.archive_path:
+        raise HTTPException(status_code=404, detail="아카이브를 찾을 수 없습니다")
+
+    if not os.path.exists(job.archive_path):
+        raise HTTPException(status_code=404, detail="아카이브 파일이 존재하지 않습니다")
+
+    return FileResponse(
+        job.archive_path,
+        media_type="application/zip",
+        filename=f"catalog_{job_id}.zip",
+    )
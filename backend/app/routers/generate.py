@@ -1,21 +1,153 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from typing import Dict, Optional
+import asyncio
 import os
+import re
 
-from app.models.database import get_db, Session, GenerationHistory
-from app.models.schemas import GenerateRequest, GenerateResponse, BackgroundGenerateRequest
-from app.services.renderer import generate_detail_page, html_to_image
-from app.services.openai_service import generate_background_image
+from app.models.database import get_db, Session, GenerationHistory, Template
+from app.models.schemas import GenerateRequest, GenerateResponse, GenerateVariant, BackgroundGenerateRequest, Viewport
+from app.services.claude import build_product_prompt
+from app.services.renderer import (
+    SECTIONS,
+    generate_sections,
+    regenerate_section,
+    html_to_images,
+    render_detail_page,
+    html_to_image,
+    shared_browser_context,
+)
+from app.services.openai_service import generate_background_image, background_image_url, BACKGROUND_IMAGES_DIR
+from app.services.background_library import pick_library_background
+from app.services.export import ExportBundle, cached_bundle_path, stream_bundle
+from app.services.provider_gateway import ProviderUnavailableError
+from app.services.render_pool import RenderBusyError
+from app.services.similarity import update_indexed_copy
+from app.services.tenants import tenant_slot
 
 router = APIRouter()
 
 
+async def _load_html_templates(db: AsyncSession, template_ids) -> Dict[int, str]:
+    """템플릿 HTML 일괄 조회 (없는 ID는 카테고리 기본 템플릿 사용)"""
+    template_ids = {template_id for template_id in template_ids if template_id}
+    if not template_ids:
+        return {}
+    result = await db.execute(
+        select(Template.id, Template.html_template).where(Template.id.in_(template_ids))
+    )
+    return dict(result.all())
+
+
+async def _generate_variants(
+    request: GenerateRequest,
+    session: Session,
+    db: AsyncSession,
+) -> GenerateResponse:
+    """변형 N개 생성 - 상품 정보 프롬프트, 브라우저 컨텍스트, DB 트랜잭션을 공유"""
+    context = session.context
+    copy_only = not (request.variant_moods or request.variant_template_ids)
+
+    # 변형별 (분위기, 템플릿, 카피 변형 번호)
+    specs = []
+    for index in range(request.variants):
+        mood = request.variant_moods[index % len(request.variant_moods)].value if request.variant_moods else context.get("mood")
+        template_id = (
+            request.variant_template_ids[index % len(request.variant_template_ids)]
+            if request.variant_template_ids
+            else request.template_id
+        )
+        specs.append((mood, template_id, index if copy_only else 0))
+
+    html_templates = await _load_html_templates(db, (template_id for _, template_id, _ in specs))
+
+    # 같은 (분위기, 변형 번호)의 카피는 한 번만 생성
+    copy_keys = list(dict.fromkeys((mood, variation) for mood, _, variation in specs))
+    copies = await asyncio.gather(*(
+        generate_sections(
+            {**context, "mood": mood},
+            build_product_prompt({**context, "mood": mood}),
+            variation,
+            session.id,
+        )
+        for mood, variation in copy_keys
+    ))
+    sections_by_key = dict(zip(copy_keys, copies))
+
+    html_contents = [
+        render_detail_page({**context, "mood": mood}, sections_by_key[(mood, variation)], html_templates.get(template_id))
+        for mood, template_id, variation in specs
+    ]
+
+    # 이미지 생성 (하나의 브라우저 컨텍스트에서 동시 렌더링, 요청한 뷰포트/미리보기는 변형마다 캡처)
+    image_paths = [None] * len(specs)
+    image_variants = [None] * len(specs)
+    if request.output_format in ["image", "both"]:
+        async with shared_browser_context() as browser_context:
+            if request.viewports or request.include_preview:
+                viewports = [viewport.value for viewport in request.viewports or [Viewport.DESKTOP]]
+                image_variants = await asyncio.gather(*(
+                    html_to_images(html_content, session.id, viewports, request.include_preview, browser=browser_context)
+                    for html_content in html_contents
+                ))
+                image_paths = [images.get("desktop") or images[viewports[0]] for images in image_variants]
+            else:
+                image_paths = await asyncio.gather(*(
+                    html_to_image(html_content, session.id, browser=browser_context)
+                    for html_content in html_contents
+                ))
+
+    # 이력 저장 (한 트랜잭션)
+    include_html = request.output_format in ["html", "both"]
+    histories = [
+        GenerationHistory(
+            session_id=session.id,
+            product_name=context.get("product_name", ""),
+            output_format=request.output_format,
+            html_content=html_content if include_html else None,
+            image_path=image_path,
+            image_variants=images,
+            sections=sections_by_key[(mood, variation)],
+            render_options={"template_id": template_id, "mood": mood, "variation": variation},
+        )
+        for html_content, image_path, images, (mood, template_id, variation) in zip(
+            html_contents, image_paths, image_variants, specs
+        )
+    ]
+    db.add_all(histories)
+    await db.commit()
+
+    variants = [
+        GenerateVariant(
+            id=history.id,
+            mood=mood,
+            template_id=template_id,
+            html_content=history.html_content,
+            image_url=f"/api/generate/images/{history.id}" if history.image_path else None,
+            preview_url=f"/api/generate/preview/{history.id}",
+            image_urls=_image_urls(history),
+        )
+        for history, (mood, template_id, _) in zip(histories, specs)
+    ]
+
+    first = variants[0]
+    return GenerateResponse(
+        id=first.id,
+        html_content=first.html_content,
+        image_url=first.image_url,
+        preview_url=first.preview_url,
+        variants=variants,
+        image_urls=first.image_urls,
+    )
+
+
 @router.post("/detail-page", response_model=GenerateResponse)
 async def generate_detail_page_api(
     request: GenerateRequest,
     db: AsyncSession = Depends(get_db),
+    tenant: str = Depends(tenant_slot("generation")),
 ):
     """상세페이지 생성"""
     # 세션 조회
@@ -31,13 +163,24 @@ async def generate_detail_page_api(
     context = session.context
 
     try:
+        if request.variants > 1:
+            return await _generate_variants(request, session, db)
+
         # HTML 생성
-        html_content = await generate_detail_page(context, request.template_id)
+        html_templates = await _load_html_templates(db, [request.template_id])
+        sections = await generate_sections(context, session_id=session.id)
+        html_content = render_detail_page(context, sections, html_templates.get(request.template_id))
 
         # 이미지 생성 (필요시)
         image_path = None
+        image_variants = None
         if request.output_format in ["image", "both"]:
-            image_path = await html_to_image(html_content, session.id)
+            if request.viewports or request.include_preview:
+                viewports = [viewport.value for viewport in request.viewports or [Viewport.DESKTOP]]
+                image_variants = await html_to_images(html_content, session.id, viewports, request.include_preview)
+                image_path = image_variants.get("desktop") or image_variants[viewports[0]]
+            else:
+                image_path = await html_to_image(html_content, session.id)
 
         # 이력 저장
         history = GenerationHistory(
@@ -46,6 +189,9 @@ async def generate_detail_page_api(
             output_format=request.output_format,
             html_content=html_content if request.output_format in ["html", "both"] else None,
             image_path=image_path,
+            image_variants=image_variants,
+            sections=sections,
+            render_options={"template_id": request.template_id, "mood": context.get("mood"), "variation": 0},
         )
         db.add(history)
         await db.commit()
@@ -56,39 +202,176 @@ async def generate_detail_page_api(
             html_content=html_content if request.output_format in ["html", "both"] else None,
             image_url=f"/api/generate/images/{history.id}" if image_path else None,
             preview_url=f"/api/generate/preview/{history.id}",
+            sections=sections,
+            image_urls=_image_urls(history),
         )
 
+    except (ProviderUnavailableError, RenderBusyError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"생성 실패: {str(e)}")
 
 
+@router.post("/detail-page/{history_id}/sections/{section}", response_model=GenerateResponse)
+async def regenerate_detail_page_section(
+    history_id: int,
+    section: str,
+    db: AsyncSession = Depends(get_db),
+    tenant: str = Depends(tenant_slot("generation")),
+):
+    """생성된 상세페이지의 한 섹션만 다시 생성 (나머지 카피 재사용, 이미지는 바뀐 영역만 다시 캡처)"""
+    if section not in SECTIONS:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 섹션입니다: {section}")
+
+    history = await db.get(GenerationHistory, history_id)
+    if not history:
+        raise HTTPException(status_code=404, detail="생성 이력을 찾을 수 없습니다")
+    if not history.sections:
+        raise HTTPException(status_code=409, detail="섹션 정보가 없는 이력입니다. 전체를 다시 생성해주세요")
+
+    session = await db.get(Session, history.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다")
+
+    options = history.render_options or {}
+    context = {**session.context, "mood": options.get("mood") or session.context.get("mood")}
+    template_id = options.get("template_id")
+
+    try:
+        html_templates = await _load_html_templates(db, [template_id])
+        html_template = html_templates.get(template_id)
+
+        sections = await regenerate_section(context, history.sections, section, options.get("variation", 0))
+        old_html = render_detail_page(context, history.sections, html_template)
+        html_content = render_detail_page(context, sections, html_template)
+
+        image_path = history.image_path
+        image_variants = history.image_variants
+        if history.output_format in ["image", "both"] and (html_content != old_html or not image_path):
+            old_paths = [history.image_path, *(history.image_variants or {}).values()]
+            if image_variants:
+                # 뷰포트마다 레이아웃이 달라 부분 캡처 대신 한 번 로드해 전체 캡처
+                viewports = [name for name in image_variants if name != "preview"]
+                image_variants = await html_to_images(html_content, session.id, viewports, "preview" in image_variants)
+                image_path = image_variants.get("desktop") or image_variants[viewports[0]]
+            else:
+                patch = (image_path, sections[section]) if image_path else None
+                image_path = await html_to_image(html_content, session.id, patch=patch)
+
+            new_paths = {image_path, *(image_variants or {}).values()}
+            for path in old_paths:
+                if path and path not in new_paths:
+                    await asyncio.to_thread(_remove_file, path)
+
+        history.sections = sections
+        history.image_path = image_path
+        history.image_variants = image_variants
+        if history.output_format in ["html", "both"]:
+            history.html_content = html_content
+        await db.commit()
+        # 유사 카피 재사용 인덱스도 바뀐 카피로 갱신
+        await update_indexed_copy(history.id, session.id, history.product_name, session.context, sections)
+
+        return GenerateResponse(
+            id=history.id,
+            html_content=history.html_content,
+            image_url=f"/api/generate/images/{history.id}" if image_path else None,
+            preview_url=f"/api/generate/preview/{history.id}",
+            sections=sections,
+            image_urls=_image_urls(history),
+        )
+
+    except (ProviderUnavailableError, RenderBusyError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"섹션 재생성 실패: {str(e)}")
+
+
+def _image_urls(history: GenerationHistory) -> Optional[Dict[str, str]]:
+    """뷰포트별 이미지 다운로드 URL"""
+    if not history.image_variants:
+        return None
+    return {name: f"/api/generate/images/{history.id}?viewport={name}" for name in history.image_variants}
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
 @router.get("/images/{history_id}")
 async def get_generated_image(
     history_id: int,
+    viewport: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """생성된 이미지 다운로드"""
+    """생성된 이미지 다운로드 (viewport: desktop, mobile, mobile_large, preview)"""
     result = await db.execute(
         select(GenerationHistory).where(GenerationHistory.id == history_id)
     )
     history = result.scalar_one_or_none()
 
-    if not history or not history.image_path:
+    image_path = history.image_path if history else None
+    if history and viewport:
+        image_path = (history.image_variants or {}).get(viewport)
+
+    if not image_path:
         raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
 
-    if not os.path.exists(history.image_path):
+    if not os.path.exists(image_path):
         raise HTTPException(status_code=404, detail="이미지 파일이 존재하지 않습니다")
 
+    is_jpeg = image_path.endswith(".jpg")
+    suffix = f"_{viewport}" if viewport else ""
     return FileResponse(
-        history.image_path,
-        media_type="image/png",
-        filename=f"detail_page_{history_id}.png",
+        image_path,
+        media_type="image/jpeg" if is_jpeg else "image/png",
+        filename=f"detail_page_{history_id}{suffix}.{'jpg' if is_jpeg else 'png'}",
+    )
+
+
+@router.get("/export/{history_id}")
+async def export_detail_page(
+    history_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """HTML, 잘라낸 이미지, 상품 이미지, manifest를 묶은 ZIP 다운로드 (만들면서 바로 전송)"""
+    history = await db.get(GenerationHistory, history_id)
+    if not history:
+        raise HTTPException(status_code=404, detail="생성 이력을 찾을 수 없습니다")
+
+    session = await db.get(Session, history.session_id)
+    bundle = await asyncio.to_thread(ExportBundle, history, session.context if session else {})
+
+    etag = f'"{bundle.content_hash}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    cached_path = await asyncio.to_thread(cached_bundle_path, bundle)
+    if cached_path:
+        return FileResponse(cached_path, media_type="application/zip", filename=bundle.filename, headers={"ETag": etag})
+
+    return StreamingResponse(
+        stream_bundle(bundle),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{bundle.filename}"', "ETag": etag},
     )
 
 
 @router.post("/background-image")
-async def generate_background(request: BackgroundGenerateRequest):
-    """배경 이미지 생성 (DALL-E)"""
+async def generate_background(
+    request: BackgroundGenerateRequest,
+    tenant: str = Depends(tenant_slot("background_image")),
+):
+    """배경 이미지 생성 (DALL-E) - 기본 조합은 사전 생성 라이브러리에서 즉시 제공"""
+    if not request.color_scheme and not request.custom_prompt:
+        content_hash = pick_library_background(request.category.value, request.mood.value)
+        if content_hash:
+            return {"image_url": background_image_url(content_hash)}
+
     try:
         image_url = await generate_background_image(
             category=request.category,
@@ -97,5 +380,24 @@ async def generate_background(request: BackgroundGenerateRequest):
             custom_prompt=request.custom_prompt,
         )
         return {"image_url": image_url}
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이미지 생성 실패: {str(e)}")
+
+
+@router.get("/background-images/{filename}")
+async def get_background_image(filename: str):
+    """캐시된 배경 이미지 제공 (내용 해시 파일명이라 장기 캐시 가능)"""
+    if not re.fullmatch(r"[0-9a-f]{64}\.png", filename):
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+
+    filepath = os.path.join(BACKGROUND_IMAGES_DIR, filename)
+    if not os.path.exists(filepath):
+        raise HTTPException(status_code=404, detail="이미지 파일이 존재하지 않습니다")
+
+    return FileResponse(
+        filepath,
+        media_type="image/png",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.models.database import get_db
+from app.models.schemas import HistoryItem, HistoryListResponse, OutputFormat
+from app.services.history import list_history
+
+router = APIRouter()
+
+
+@router.get("/", response_model=HistoryListResponse)
+async def list_generation_history(
+    q: Optional[str] = Query(None, max_length=100, description="상품명 검색어"),
+    session_id: Optional[int] = None,
+    output_format: Optional[OutputFormat] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """생성 이력 목록 (최신순, cursor로 다음 페이지)"""
+    try:
+        rows, next_cursor = await list_history(
+            db,
+            limit=limit,
+            cursor=cursor,
+            query=q,
+            session_id=session_id,
+            output_format=output_format.value if output_format else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return HistoryListResponse(
+        items=[
+            HistoryItem(
+                id=row.id,
+                session_id=row.session_id,
+                created_at=row.created_at,
+                product_name=row.product_name,
+                output_format=row.output_format,
+                has_html=bool(row.has_html),
+                image_url=f"/api/generate/images/{row.id}" if row.has_image else None,
+                preview_url=f"/api/generate/preview/{row.id}",
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
 
 from app.models.database import get_db, Template
 from app.models.schemas import TemplateCreate, TemplateResponse, TemplateDetailResponse
+from app.services.template_validation import (
+    TEMPLATE_THUMBNAIL_ON_CREATE,
+    TemplateValidationError,
+    cached_thumbnail,
+    render_thumbnail,
+    validate_template,
+)
 
 router = APIRouter()
 
@@ -43,9 +51,15 @@ async def get_template(
 @router.post("/", response_model=TemplateResponse)
 async def create_template(
     request: TemplateCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
-    """새 템플릿 생성"""
+    """새 템플릿 생성 (컴파일/변수 검사/샘플 렌더링을 통과한 템플릿만 저장)"""
+    try:
+        validate_template(request.html_template)
+    except TemplateValidationError as e:
+        raise HTTPException(status_code=400, detail=f"템플릿을 등록할 수 없습니다: {e}")
+
     template = Template(
         name=request.name,
         category=request.category,
@@ -56,9 +70,32 @@ async def create_template(
     await db.commit()
     await db.refresh(template)
 
+    # 목록 화면에서 바로 보이도록 응답 후 썸네일 캐시를 미리 채움
+    if TEMPLATE_THUMBNAIL_ON_CREATE:
+        background_tasks.add_task(render_thumbnail, request.html_template)
+
     return template
 
 
+@router.get("/{template_id}/thumbnail")
+async def get_template_thumbnail(
+    template_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """템플릿 썸네일 (샘플 데이터로 렌더링한 첫 화면, 캐시가 없으면 렌더링)"""
+    result = await db.execute(select(Template.html_template).where(Template.id == template_id))
+    html_template = result.scalar_one_or_none()
+
+    if not html_template:
+        raise HTTPException(status_code=404, detail="템플릿을 찾을 수 없습니다")
+
+    path = cached_thumbnail(html_template) or await render_thumbnail(html_template)
+    if not path:
+        raise HTTPException(status_code=404, detail="썸네일을 만들 수 없습니다")
+
+    return FileResponse(path, media_type="image/jpeg")
+
+
 @router.delete("/{template_id}")
 async def delete_template(
     template_id: int,
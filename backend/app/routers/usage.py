@@ -0,0 +1,23 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends
+
+from app.models.schemas import TenantUsageResponse
+from app.services.tenants import active_requests, get_tenant, tenant_limits, tenant_usage
+
+router = APIRouter()
+
+
+@router.get("/", response_model=TenantUsageResponse)
+async def get_usage(tenant: str = Depends(get_tenant)):
+    """요청한 테넌트의 당일 사용량과 한도"""
+    usage = tenant_usage(tenant)
+    return TenantUsageResponse(
+        tenant=tenant,
+        day=usage.day,
+        tokens=usage.tokens,
+        images=usage.images,
+        requests=usage.requests,
+        active_requests=active_requests(tenant),
+        limits=asdict(tenant_limits(tenant)),
+    )
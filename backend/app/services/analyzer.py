@@ -1,29 +1,162 @@
+import asyncio
 import os
 import uuid
-from typing import Dict, Any
-from playwright.async_api import async_playwright
+from contextlib import AsyncExitStack
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+from urllib.parse import urlparse
 
+from app.services.assets import wait_for_assets
 from app.services.claude import analyze_image_with_vision
+from app.services.metrics import span
+from app.services.render_pool import render_pool_enabled, submit_render
 
+# 캡처 프로필 (스마트스토어 상세페이지 기준 너비)
+CAPTURE_WIDTH = 860
+CAPTURE_VIEWPORT_HEIGHT = int(os.getenv("CAPTURE_VIEWPORT_HEIGHT", "1600"))
+CAPTURE_MAX_HEIGHT = int(os.getenv("CAPTURE_MAX_HEIGHT", "16000"))
+CAPTURE_TIMEOUT_MS = int(os.getenv("CAPTURE_TIMEOUT_MS", "20000"))
+CAPTURE_SCROLL_STEP = 800
+CAPTURE_SCROLL_DELAY_MS = 120
+
+# 분석에 불필요한 리소스 타입
+BLOCKED_RESOURCE_TYPES = {"media", "websocket", "eventsource", "manifest", "texttrack"}
+
+# 트래커/광고 호스트 키워드
+BLOCKED_HOST_KEYWORDS = (
+    "google-analytics", "googletagmanager", "googlesyndication", "doubleclick",
+    "facebook.net", "connect.facebook", "hotjar", "clarity.ms", "criteo",
+    "adservice", "analytics", "wcs.naver", "adcr.naver", "nelo", "kakaopixel",
+)
+
+# 서드파티여도 페이지 렌더링에 필요한 스크립트 호스트 (쇼핑몰 정적 CDN)
+ALLOWED_SCRIPT_SITES = set(
+    os.getenv("CAPTURE_ALLOWED_SCRIPT_SITES", "pstatic.net,naver.net,coupangcdn.com").split(",")
+)
+
+# 배치 분석 동시성 (브라우저 페이지 / Vision API 호출)
+BATCH_BROWSER_CONCURRENCY = int(os.getenv("BATCH_BROWSER_CONCURRENCY", "3"))
+BATCH_VISION_CONCURRENCY = int(os.getenv("BATCH_VISION_CONCURRENCY", "4"))
+
+SCREENSHOTS_DIR = "data/screenshots"
+
+SCROLL_HEIGHT_SCRIPT = "document.documentElement.scrollHeight"
+
+
+def _site(hostname: str) -> str:
+    """호스트의 등록 도메인 (예: shop.example.co.kr -> example.co.kr)"""
+    labels = (hostname or "").lower().split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in ("co", "or", "go", "ne", "ac", "com"):
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def _make_capture_route(page_url: str):
+    """트래커/미디어/서드파티 스크립트를 차단하는 라우팅 핸들러"""
+    page_site = _site(urlparse(page_url).hostname)
+
+    async def handle(route):
+        request = route.request
+        hostname = (urlparse(request.url).hostname or "").lower()
+
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+            return
+
+        if any(keyword in hostname for keyword in BLOCKED_HOST_KEYWORDS):
+            await route.abort()
+            return
+
+        if request.resource_type == "script":
+            site = _site(hostname)
+            if site != page_site and site not in ALLOWED_SCRIPT_SITES:
+                await route.abort()
+                return
+
+        await route.continue_()
+
+    return handle
+
+
+async def _load_and_scroll(page, url: str):
+    """페이지 로드 후 지연 로딩 이미지가 뜨도록 최대 높이까지 스크롤"""
+    await page.goto(url, wait_until="domcontentloaded")
+
+    position = 0
+    while position < CAPTURE_MAX_HEIGHT:
+        height = await page.evaluate(SCROLL_HEIGHT_SCRIPT)
+        if position >= height:
+            break
+        position += CAPTURE_SCROLL_STEP
+        await page.evaluate(f"window.scrollTo(0, {position})")
+        await page.wait_for_timeout(CAPTURE_SCROLL_DELAY_MS)
+
+    await page.evaluate("window.scrollTo(0, 0)")
+    await wait_for_assets(page)
+
+
+async def _capture(browser, url: str) -> bytes:
+    """브라우저에서 새 컨텍스트를 열어 페이지 캡처 (제한 시간 초과 시 로드된 만큼만 캡처)"""
+    from playwright.async_api import Error as PlaywrightError
+
+    context = await browser.new_context(
+        viewport={"width": CAPTURE_WIDTH, "height": CAPTURE_VIEWPORT_HEIGHT},
+        service_workers="block",
+    )
+    try:
+        page = await context.new_page()
+        await page.route("**/*", _make_capture_route(url))
+
+        # 페이지 로드 (하드 데드라인)
+        with span("page_capture"):
+            try:
+                await asyncio.wait_for(_load_and_scroll(page, url), timeout=CAPTURE_TIMEOUT_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            except PlaywrightError:
+                # 네비게이션 자체가 실패하면 부분 캡처도 의미 없음
+                if page.url in ("", "about:blank"):
+                    raise
+
+        # 스크린샷 캡처 (최대 높이 제한)
+        height = await page.evaluate(SCROLL_HEIGHT_SCRIPT)
+        with span("screenshot"):
+            return await page.screenshot(
+                full_page=True,
+                clip={"x": 0, "y": 0, "width": CAPTURE_WIDTH, "height": max(1, min(height, CAPTURE_MAX_HEIGHT))},
+            )
+    finally:
+        await context.close()
+
+
+async def capture_page(url: str, browser=None) -> bytes:
+    """Playwright로 페이지 캡처 (browser를 넘기면 해당 브라우저 재사용)"""
+    if browser is not None:
+        return await _capture(browser, url)
+    if render_pool_enabled():
+        return await submit_render("capture", url=url)
+
+    from playwright.async_api import async_playwright
 
-async def capture_page(url: str) -> bytes:
-    """Playwright로 페이지 캡처"""
     async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
+        with span("browser_launch"):
+            browser = await p.chromium.launch()
+        try:
+            return await _capture(browser, url)
+        finally:
+            await browser.close()
 
-        # 뷰포트 설정 (스마트스토어 상세페이지 기준)
-        await page.set_viewport_size({"width": 860, "height": 10000})
 
-        # 페이지 로드
-        await page.goto(url, wait_until="networkidle")
+def save_screenshot(screenshot_bytes: bytes) -> str:
+    """스크린샷 저장 후 경로 반환"""
+    os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
 
-        # 스크린샷 캡처
-        screenshot = await page.screenshot(full_page=True)
+    filename = f"{uuid.uuid4()}.png"
+    filepath = os.path.join(SCREENSHOTS_DIR, filename)
 
-        await browser.close()
+    with open(filepath, "wb") as f:
+        f.write(screenshot_bytes)
 
-        return screenshot
+    return filepath
 
 
 async def analyze_reference_page(url: str) -> Dict[str, Any]:
@@ -32,14 +165,7 @@ async def analyze_reference_page(url: str) -> Dict[str, Any]:
     screenshot_bytes = await capture_page(url)
 
     # 2. 스크린샷 저장
-    screenshots_dir = "data/screenshots"
-    os.makedirs(screenshots_dir, exist_ok=True)
-
-    filename = f"{uuid.uuid4()}.png"
-    filepath = os.path.join(screenshots_dir, filename)
-
-    with open(filepath, "wb") as f:
-        f.write(screenshot_bytes)
+    filepath = await asyncio.to_thread(save_screenshot, screenshot_bytes)
 
     # 3. Claude Vision으로 분석
     analysis = await analyze_image_with_vision(screenshot_bytes)
@@ -49,3 +175,46 @@ async def analyze_reference_page(url: str) -> Dict[str, Any]:
         **analysis,
         "screenshot_path": filepath,
     }
+
+
+async def analyze_reference_pages(
+    urls: List[str],
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """여러 참고 페이지를 동시에 분석하고 완료되는 순서대로 (url, 결과, 오류) 반환
+
+    브라우저 한 개를 공유하며 (렌더 워커 사용 시 워커에 위임), 페이지 캡처와 Vision API 호출은
+    각각 별도 동시성 제한을 따른다.
+    """
+    browser_slots = asyncio.Semaphore(BATCH_BROWSER_CONCURRENCY)
+    vision_slots = asyncio.Semaphore(BATCH_VISION_CONCURRENCY)
+
+    async with AsyncExitStack() as stack:
+        browser = None
+        # 렌더 워커를 쓰면 API 프로세스에서는 Playwright 드라이버도 띄우지 않음
+        if not render_pool_enabled():
+            from playwright.async_api import async_playwright
+
+            p = await stack.enter_async_context(async_playwright())
+            browser = await p.chromium.launch()
+            stack.push_async_callback(browser.close)
+
+        async def run(url: str):
+            try:
+                async with browser_slots:
+                    screenshot_bytes = await capture_page(url, browser=browser)
+                filepath = await asyncio.to_thread(save_screenshot, screenshot_bytes)
+                async with vision_slots:
+                    analysis = await analyze_image_with_vision(screenshot_bytes)
+                return url, {**analysis, "screenshot_path": filepath}, None
+            except Exception as e:
+                return url, None, str(e)
+
+        tasks = [asyncio.create_task(run(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 클라이언트 연결이 끊기면 남은 작업 취소
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
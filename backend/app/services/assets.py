@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import mimetypes
+import os
+import socket
+from typing import Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 렌더링에 쓰는 로컬 에셋 (폰트 등) - backend/assets
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "assets")
+FONTS_DIR = os.path.join(ASSETS_DIR, "fonts")
+
+# 원격 이미지 로컬 캐시 (URL 해시 기준, 보존 정책으로 정리)
+ASSET_CACHE_DIR = "data/asset_cache"
+
+# set_content 페이지에서 로컬 에셋을 가리키는 가상 호스트 (Playwright 라우팅으로 처리)
+LOCAL_ASSET_HOST = "assets.local"
+LOCAL_ASSET_ORIGIN = f"http://{LOCAL_ASSET_HOST}"
+
+ASSET_FETCH_TIMEOUT = float(os.getenv("ASSET_FETCH_TIMEOUT", "5"))
+ASSET_MAX_BYTES = int(os.getenv("ASSET_MAX_BYTES", str(10 * 1024 * 1024)))
+ASSET_MAX_REDIRECTS = int(os.getenv("ASSET_MAX_REDIRECTS", "3"))
+RENDER_READY_TIMEOUT_MS = int(os.getenv("RENDER_READY_TIMEOUT_MS", "10000"))
+
+# 웹폰트는 로컬 @font-face로 대체하므로 요청 차단
+FONT_HOSTS = ("fonts.googleapis.com", "fonts.gstatic.com")
+
+# 캐시해서 로컬로 제공할 원격 리소스 타입
+CACHEABLE_RESOURCE_TYPES = ("image", "font", "stylesheet", "media")
+
+# 번들 폰트 (family, 파일명, weight) - 시스템 폰트(fonts-noto-cjk)를 먼저 사용
+KOREAN_FONTS = [
+    ("Noto Sans KR", "NotoSansKR-Regular.woff2", 400),
+    ("Noto Sans KR", "NotoSansKR-Medium.woff2", 500),
+    ("Noto Sans KR", "NotoSansKR-Bold.woff2", 700),
+]
+
+# 폰트/이미지 로드 완료 대기 스크립트 (networkidle 대체)
+READY_SCRIPT = """
+async () => {
+    await document.fonts.ready;
+    const pending = Array.from(document.images)
+        .filter((img) => !img.complete)
+        .map((img) => new Promise((resolve) => {
+            img.addEventListener("load", resolve, { once: true });
+            img.addEventListener("error", resolve, { once: true });
+        }));
+    await Promise.all(pending);
+}
+"""
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """원격 에셋 다운로드용 공용 클라이언트"""
+    global _http_client
+    if _http_client is None:
+        # 리다이렉트는 대상 주소를 확인하며 직접 따라감 (내부망으로 우회 방지)
+        _http_client = httpx.AsyncClient(timeout=ASSET_FETCH_TIMEOUT, follow_redirects=False)
+    return _http_client
+
+
+def font_face_css() -> str:
+    """번들 한글 폰트 @font-face 선언"""
+    rules = []
+    for family, filename, weight in KOREAN_FONTS:
+        sources = [f'local("{family}")', 'local("Noto Sans CJK KR")']
+        if os.path.exists(os.path.join(FONTS_DIR, filename)):
+            sources.append(f'url("{LOCAL_ASSET_ORIGIN}/fonts/{filename}") format("woff2")')
+        rules.append(
+            f"@font-face {{ font-family: '{family}'; font-weight: {weight}; "
+            f"font-display: block; src: {', '.join(sources)}; }}"
+        )
+    return "\n".join(rules)
+
+
+def prepare_html(html_content: str) -> str:
+    """렌더링 전 HTML에 로컬 폰트 선언 주입"""
+    style = f"<style>{font_face_css()}</style>"
+    if "</head>" in html_content:
+        return html_content.replace("</head>", f"{style}</head>", 1)
+    return style + html_content
+
+
+def _read_local_asset(path: str) -> Optional[Tuple[bytes, str]]:
+    """assets 디렉토리 내부 파일 읽기 (디렉토리 밖 경로 차단)"""
+    full_path = os.path.realpath(os.path.join(ASSETS_DIR, path.lstrip("/")))
+    if not full_path.startswith(os.path.realpath(ASSETS_DIR) + os.sep) or not os.path.isfile(full_path):
+        return None
+
+    with open(full_path, "rb") as f:
+        body = f.read()
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    return body, content_type
+
+
+def _read_cached_asset(cache_key: str) -> Optional[Tuple[bytes, str]]:
+    """다운로드 캐시에서 에셋 읽기 (사용 시각을 갱신해 보존 정책에서 최근 사용분 유지)"""
+    body_path = os.path.join(ASSET_CACHE_DIR, cache_key)
+    try:
+        with open(body_path, "rb") as f:
+            body = f.read()
+        with open(f"{body_path}.type", "r") as f:
+            content_type = f.read().strip()
+        os.utime(body_path)
+        os.utime(f"{body_path}.type")
+    except FileNotFoundError:
+        # 보존 정책이 둘 중 하나만 지운 경우 다시 다운로드
+        return None
+    return body, content_type
+
+
+def _write_cached_asset(cache_key: str, body: bytes, content_type: str):
+    """다운로드 캐시에 에셋 저장"""
+    os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+    body_path = os.path.join(ASSET_CACHE_DIR, cache_key)
+
+    with open(f"{body_path}.type", "w") as f:
+        f.write(content_type)
+    # 본문은 임시 파일에 쓴 뒤 교체 (동시 렌더링 시 부분 파일 방지)
+    tmp_path = f"{body_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, body_path)
+
+
+async def _is_public_url(url: str) -> bool:
+    """http(s)이고 호스트가 공인 주소로만 해석되는지 (사설/루프백/링크 로컬/메타데이터 주소 차단)"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return False
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80), type=socket.SOCK_STREAM
+        )
+    except (socket.gaierror, UnicodeError):
+        return False
+    addresses = {ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos}
+    return bool(addresses) and all(address.is_global and not address.is_multicast for address in addresses)
+
+
+async def _download(url: str) -> Optional[Tuple[bytes, str]]:
+    """공인 주소만 허용하며 리다이렉트를 한 단계씩 확인해 다운로드 (ASSET_MAX_BYTES를 넘으면 중단)"""
+    client = _get_http_client()
+    for _ in range(ASSET_MAX_REDIRECTS + 1):
+        if not await _is_public_url(url):
+            logger.warning("내부 주소 에셋 요청 차단: %s", url)
+            return None
+        async with client.stream("GET", url) as response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers.get("location", ""))
+                continue
+            if response.status_code != 200:
+                return None
+
+            declared = response.headers.get("content-length", "")
+            if declared.isdigit() and int(declared) > ASSET_MAX_BYTES:
+                return None
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > ASSET_MAX_BYTES:
+                    return None
+                chunks.append(chunk)
+
+            content_type = response.headers.get("content-type", "application/octet-stream").split(";")[0]
+            return b"".join(chunks), content_type
+    return None
+
+
+async def fetch_remote_asset(url: str, content_type_prefix: Optional[str] = None) -> Optional[Tuple[bytes, str]]:
+    """원격 에셋을 한 번만 다운로드하고 이후에는 로컬 캐시에서 제공
+
+    content_type_prefix(예: "image/")를 주면 해당 타입의 응답만 반환한다.
+    """
+    def accepts(content_type: str) -> bool:
+        return content_type_prefix is None or content_type.startswith(content_type_prefix)
+
+    cache_key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    cached = await asyncio.to_thread(_read_cached_asset, cache_key)
+    if cached:
+        return cached if accepts(cached[1]) else None
+
+    try:
+        asset = await _download(url)
+    except httpx.HTTPError:
+        return None
+    if asset is None:
+        return None
+
+    body, content_type = asset
+    await asyncio.to_thread(_write_cached_asset, cache_key, body, content_type)
+    return asset if accepts(content_type) else None
+
+
+async def handle_asset_route(route):
+    """Playwright 요청 라우팅 - 로컬 에셋/캐시로 응답하고 불필요한 네트워크 차단"""
+    request = route.request
+    parsed = urlparse(request.url)
+
+    if parsed.scheme not in ("http", "https"):
+        await route.continue_()
+        return
+
+    if parsed.hostname == LOCAL_ASSET_HOST:
+        asset = await asyncio.to_thread(_read_local_asset, parsed.path)
+    elif parsed.hostname in FONT_HOSTS:
+        asset = None
+    elif request.resource_type in CACHEABLE_RESOURCE_TYPES:
+        asset = await fetch_remote_asset(request.url)
+    else:
+        # 스크립트/XHR 등은 렌더링 결과에 불필요 - 네트워크 대기 방지
+        asset = None
+
+    if asset is None:
+        await route.abort()
+        return
+
+    body, content_type = asset
+    await route.fulfill(status=200, body=body, content_type=content_type)
+
+
+async def load_html(page, html_content: str):
+    """HTML을 로컬 에셋 라우팅으로 로드하고 폰트/이미지 로딩 완료까지 대기"""
+    await page.route("**/*", handle_asset_route)
+    await page.set_content(prepare_html(html_content), wait_until="domcontentloaded")
+    await wait_for_assets(page)
+
+
+async def wait_for_assets(page, timeout_ms: int = RENDER_READY_TIMEOUT_MS):
+    """폰트/이미지 로딩 완료 대기 (시간 초과 시 현재 상태로 진행)"""
+    try:
+        await asyncio.wait_for(page.evaluate(READY_SCRIPT), timeout=timeout_ms / 1000)
+    except asyncio.TimeoutError:
+        pass
@@ -0,0 +1,163 @@
+import asyncio
+import fcntl
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+
+from app.models.database import async_session, BackgroundImage
+from app.services.openai_service import (
+    CATEGORY_PROMPTS,
+    MOOD_STYLES,
+    LIBRARY_KEY_PREFIX,
+    build_background_prompt,
+    generate_and_cache,
+)
+from app.services import openai_service
+
+logger = logging.getLogger(__name__)
+
+# 카테고리 x 분위기 조합마다 미리 만들어 둘 배경 개수
+BACKGROUND_LIBRARY_ENABLED = os.getenv("BACKGROUND_LIBRARY_ENABLED", "0") == "1"
+BACKGROUND_LIBRARY_SIZE = int(os.getenv("BACKGROUND_LIBRARY_SIZE", "3"))
+BACKGROUND_LIBRARY_CONCURRENCY = int(os.getenv("BACKGROUND_LIBRARY_CONCURRENCY", "2"))
+# 이 기간이 지난 배경은 백그라운드에서 새로 생성
+BACKGROUND_LIBRARY_MAX_AGE = timedelta(hours=int(os.getenv("BACKGROUND_LIBRARY_MAX_AGE_HOURS", "168")))
+BACKGROUND_LIBRARY_CHECK_INTERVAL = int(os.getenv("BACKGROUND_LIBRARY_CHECK_INTERVAL", "3600"))
+# 여러 워커 중 이 파일 잠금을 잡은 프로세스만 갱신 (프로세스가 종료되면 잠금이 풀려 다른 워커가 이어받음)
+BACKGROUND_LIBRARY_LOCK_FILE = os.getenv("BACKGROUND_LIBRARY_LOCK_FILE", "data/background_library.lock")
+
+# (카테고리, 분위기) -> 사용 가능한 이미지 내용 해시 목록 (요청 시 DB 조회 없이 선택)
+_library: Dict[Tuple[str, str], List[str]] = {}
+# 갱신 담당 잠금 파일 (프로세스 수명 동안 열어 둠)
+_leader_lock = None
+
+
+def _library_key(category: str, mood: str, slot: int) -> str:
+    return f"{LIBRARY_KEY_PREFIX}{category}:{mood}:{slot}"
+
+
+def pick_library_background(category: str, mood: str) -> Optional[str]:
+    """사전 생성된 배경 중 하나의 내용 해시 (없으면 None)"""
+    hashes = _library.get((category, mood))
+    if not hashes:
+        return None
+    return random.choice(hashes)
+
+
+async def load_library():
+    """DB에 등록된 라이브러리 이미지로 메모리 인덱스 구성"""
+    async with async_session() as db:
+        result = await db.execute(
+            select(BackgroundImage.prompt_key, BackgroundImage.content_hash, BackgroundImage.file_path)
+            .where(BackgroundImage.prompt_key.like(f"{LIBRARY_KEY_PREFIX}%"))
+        )
+        rows = result.all()
+
+    library: Dict[Tuple[str, str], List[str]] = {}
+    for prompt_key, content_hash, file_path in rows:
+        if not os.path.exists(file_path):
+            continue
+        _, category, mood, _ = prompt_key.split(":")
+        library.setdefault((category, mood), []).append(content_hash)
+
+    _library.clear()
+    _library.update(library)
+
+
+async def _stale_slots() -> List[Tuple[str, str, int, Optional[str]]]:
+    """비어 있거나 오래된 슬롯 목록 (카테고리, 분위기, 슬롯, 기존 파일 경로) - 빈 슬롯 우선"""
+    async with async_session() as db:
+        result = await db.execute(
+            select(BackgroundImage.prompt_key, BackgroundImage.created_at, BackgroundImage.file_path)
+            .where(BackgroundImage.prompt_key.like(f"{LIBRARY_KEY_PREFIX}%"))
+        )
+        existing = {prompt_key: (created_at, file_path) for prompt_key, created_at, file_path in result.all()}
+
+    expires_before = datetime.utcnow() - BACKGROUND_LIBRARY_MAX_AGE
+    missing, stale = [], []
+    for category in CATEGORY_PROMPTS:
+        for mood in MOOD_STYLES:
+            for slot in range(BACKGROUND_LIBRARY_SIZE):
+                entry = existing.get(_library_key(category, mood, slot))
+                if entry is None or not os.path.exists(entry[1]):
+                    missing.append((category, mood, slot, None))
+                elif entry[0] < expires_before:
+                    stale.append((entry[0], (category, mood, slot, entry[1])))
+
+    stale.sort(key=lambda item: item[0])
+    return missing + [slot for _, slot in stale]
+
+
+async def _remove_if_unreferenced(file_path: str):
+    """교체된 파일을 다른 캐시 항목이 참조하지 않으면 삭제"""
+    async with async_session() as db:
+        result = await db.execute(select(BackgroundImage.id).where(BackgroundImage.file_path == file_path).limit(1))
+        if result.first():
+            return
+
+    if os.path.exists(file_path):
+        await asyncio.to_thread(os.remove, file_path)
+
+
+async def refresh_library():
+    """빈 슬롯을 채우고 오래된 배경을 새로 생성"""
+    slots = await _stale_slots()
+    if not slots:
+        return
+
+    limiter = asyncio.Semaphore(BACKGROUND_LIBRARY_CONCURRENCY)
+
+    async def fill(category: str, mood: str, slot: int, old_path: Optional[str]):
+        async with limiter:
+            # 슬롯마다 다른 이미지가 나오도록 변형 번호를 프롬프트에 포함
+            prompt = build_background_prompt(category, mood, custom_prompt=f"Variation {slot + 1}")
+            try:
+                await generate_and_cache(_library_key(category, mood, slot), prompt)
+            except Exception as e:
+                logger.warning("배경 라이브러리 생성 실패 (%s/%s/%d): %s", category, mood, slot, e)
+                return
+            if old_path:
+                await _remove_if_unreferenced(old_path)
+
+    logger.info("배경 라이브러리 갱신 시작: %d개 슬롯", len(slots))
+    await asyncio.gather(*(fill(*slot) for slot in slots))
+    await load_library()
+
+
+def _acquire_leader() -> bool:
+    """갱신 담당 잠금 획득 (다른 워커가 잡고 있으면 False)"""
+    global _leader_lock
+    if _leader_lock is not None:
+        return True
+
+    os.makedirs(os.path.dirname(BACKGROUND_LIBRARY_LOCK_FILE) or ".", exist_ok=True)
+    lock_file = open(BACKGROUND_LIBRARY_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _leader_lock = lock_file
+    logger.info("배경 라이브러리 갱신 담당 워커 (pid %d)", os.getpid())
+    return True
+
+
+async def library_refresh_loop():
+    """주기적으로 라이브러리 갱신 (앱 수명 동안 실행, 생성은 잠금을 잡은 워커 하나만)"""
+    if not openai_service.get_client():
+        logger.warning("OPENAI_API_KEY가 없어 배경 라이브러리를 생성하지 않습니다")
+        return
+
+    while True:
+        try:
+            if _acquire_leader():
+                await refresh_library()
+            else:
+                # 담당 워커가 만든 배경을 메모리 인덱스에 반영
+                await load_library()
+        except Exception as e:
+            logger.warning("배경 라이브러리 갱신 실패: %s", e)
+        await asyncio.sleep(BACKGROUND_LIBRARY_CHECK_INTERVAL)
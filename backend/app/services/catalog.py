@@ -0,0 +1,337 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import zipfile
+from contextlib import AsyncExitStack
+from typing import Dict, Any, List, Optional
+from sqlalchemy import select, update
+
+from app.models.database import async_session, CatalogJob, CatalogJobItem, GenerationHistory, Session, Template
+from app.routers.interview import INTERVIEW_FLOW
+from app.services.render_pool import render_pool_enabled
+from app.services.renderer import generate_sections, html_to_image, render_detail_page
+from app.services.tenants import current_tenant, tenant_scope
+
+# 동시에 생성할 상품 수
+CATALOG_CONCURRENCY = int(os.getenv("CATALOG_CONCURRENCY", "4"))
+
+EXPORTS_DIR = "data/catalog_exports"
+
+# 피드 컬럼명 -> 문답 필드 매핑 (문답 필드명 그대로도 허용)
+FIELD_ALIASES = {
+    "reference_url": ["참고URL", "참고 URL", "reference"],
+    "product_name": ["상품명", "제품명", "name", "title"],
+    "category": ["카테고리", "분류"],
+    "target_customer": ["타겟고객", "타겟 고객", "타겟", "target"],
+    "usp": ["차별점", "특징", "USP"],
+    "price_info": ["가격", "가격정보", "프로모션", "price"],
+    "product_images": ["상품이미지", "이미지", "images", "image_url"],
+    "mood": ["분위기", "디자인"],
+}
+
+# 실행 중인 작업 (중복 실행 방지)
+_running_jobs: Dict[int, asyncio.Task] = {}
+
+
+def parse_feed(filename: str, content: bytes) -> List[Dict[str, Any]]:
+    """CSV/JSON 상품 피드 파싱"""
+    text = content.decode("utf-8-sig")
+
+    if filename.lower().endswith(".json"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("products", [])
+        if not isinstance(data, list):
+            raise ValueError("JSON 피드는 상품 배열이어야 합니다")
+        return [row for row in data if isinstance(row, dict)]
+
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def map_row_to_context(row: Dict[str, Any]) -> Dict[str, Any]:
+    """피드 행을 INTERVIEW_FLOW와 같은 컨텍스트 필드로 매핑"""
+    normalized = {str(key).strip(): value for key, value in row.items() if key is not None}
+    context: Dict[str, Any] = {}
+    used_keys = set()
+
+    for flow_item in INTERVIEW_FLOW:
+        field_name = flow_item["field_name"]
+        for key in [field_name] + FIELD_ALIASES.get(field_name, []):
+            value = normalized.get(key)
+            if value not in (None, ""):
+                context[field_name] = value
+                used_keys.add(key)
+                break
+
+    # 이미지 목록은 "|" 또는 "," 구분 문자열 허용
+    images = context.get("product_images")
+    if isinstance(images, str):
+        context["product_images"] = [url.strip() for url in re.split(r"[|,]", images) if url.strip()]
+
+    # 매핑되지 않은 컬럼은 후속 질문 답변처럼 추가 정보로 유지
+    for key, value in normalized.items():
+        if key not in used_keys and value not in (None, ""):
+            context.setdefault(key, value)
+
+    return context
+
+
+async def create_catalog_job(
+    filename: str,
+    rows: List[Dict[str, Any]],
+    output_format: str,
+    template_id: Optional[int] = None,
+) -> CatalogJob:
+    """피드 행으로 작업과 항목(체크포인트) 생성"""
+    async with async_session() as db:
+        job = CatalogJob(
+            source_filename=filename,
+            output_format=output_format,
+            template_id=template_id,
+            total=len(rows),
+        )
+        db.add(job)
+        await db.flush()
+
+        items = []
+        for index, row in enumerate(rows):
+            context = map_row_to_context(row)
+            item = CatalogJobItem(job_id=job.id, row_index=index, context=context)
+            if not context.get("product_name"):
+                # 재시도해도 소용없는 행은 건너뜀 처리
+                item.status = "skipped"
+                item.error = "상품명이 없습니다"
+                job.failed += 1
+            items.append(item)
+
+        db.add_all(items)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+
+async def _process_item(
+    item: CatalogJobItem,
+    job: CatalogJob,
+    browser,
+    html_template: Optional[str] = None,
+) -> Optional[int]:
+    """상품 1건 생성 (카피라이팅 -> 렌더링 -> 이미지) 후 이력 저장"""
+    context = item.context
+    sections = await generate_sections(context)
+    html_content = render_detail_page(context, sections, html_template)
+
+    async with async_session() as db:
+        session = Session(context=context, status="completed")
+        db.add(session)
+        await db.commit()
+
+        # 렌더링 동안 트랜잭션을 잡고 있지 않도록 세션 먼저 커밋
+        image_path = None
+        if job.output_format in ["image", "both"]:
+            image_path = await html_to_image(html_content, session.id, browser=browser)
+
+        history = GenerationHistory(
+            session_id=session.id,
+            product_name=context.get("product_name", ""),
+            output_format=job.output_format,
+            html_content=html_content if job.output_format in ["html", "both"] else None,
+            image_path=image_path,
+            sections=sections,
+            render_options={"template_id": job.template_id if html_template else None, "mood": context.get("mood"), "variation": 0},
+        )
+        db.add(history)
+        await db.commit()
+        return history.id
+
+
+async def _checkpoint(item_id: int, job_id: int, history_id: Optional[int], error: Optional[str]):
+    """항목 결과와 작업 카운터 저장 (재시작 시 완료 항목은 건너뜀)"""
+    async with async_session() as db:
+        if error is None:
+            await db.execute(
+                update(CatalogJobItem)
+                .where(CatalogJobItem.id == item_id)
+                .values(status="completed", history_id=history_id, error=None)
+            )
+            await db.execute(
+                update(CatalogJob).where(CatalogJob.id == job_id).values(completed=CatalogJob.completed + 1)
+            )
+        else:
+            await db.execute(
+                update(CatalogJobItem).where(CatalogJobItem.id == item_id).values(status="failed", error=error)
+            )
+            await db.execute(
+                update(CatalogJob).where(CatalogJob.id == job_id).values(failed=CatalogJob.failed + 1)
+            )
+        await db.commit()
+
+
+def _write_archive(job_id: int, entries: List[Dict[str, Any]]) -> str:
+    """완료된 상품의 HTML/이미지를 ZIP으로 묶기"""
+    os.makedirs(EXPORTS_DIR, exist_ok=True)
+    archive_path = os.path.join(EXPORTS_DIR, f"catalog_{job_id}.zip")
+    tmp_path = f"{archive_path}.tmp"
+
+    manifest = []
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for entry in entries:
+            slug = re.sub(r"[^\w가-힣-]+", "_", entry["product_name"] or "product").strip("_")[:50]
+            folder = f"{entry['row_index'] + 1:04d}_{slug}"
+            files = []
+            if entry["html_content"]:
+                archive.writestr(f"{folder}/page.html", entry["html_content"])
+                files.append(f"{folder}/page.html")
+            if entry["image_path"] and os.path.exists(entry["image_path"]):
+                # PNG는 이미 압축되어 있으므로 저장만
+                archive.write(entry["image_path"], f"{folder}/page.png", compress_type=zipfile.ZIP_STORED)
+                files.append(f"{folder}/page.png")
+            manifest.append({
+                "row_index": entry["row_index"],
+                "product_name": entry["product_name"],
+                "history_id": entry["history_id"],
+                "files": files,
+            })
+        archive.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    os.replace(tmp_path, archive_path)
+    return archive_path
+
+
+async def _build_archive(job_id: int) -> str:
+    """작업의 완료 항목으로 다운로드용 아카이브 생성"""
+    async with async_session() as db:
+        result = await db.execute(
+            select(
+                CatalogJobItem.row_index,
+                GenerationHistory.id,
+                GenerationHistory.product_name,
+                GenerationHistory.html_content,
+                GenerationHistory.image_path,
+            )
+            .join(GenerationHistory, GenerationHistory.id == CatalogJobItem.history_id)
+            .where(CatalogJobItem.job_id == job_id, CatalogJobItem.status == "completed")
+            .order_by(CatalogJobItem.row_index)
+        )
+        entries = [
+            {
+                "row_index": row_index,
+                "history_id": history_id,
+                "product_name": product_name,
+                "html_content": html_content,
+                "image_path": image_path,
+            }
+            for row_index, history_id, product_name, html_content, image_path in result.all()
+        ]
+
+    return await asyncio.to_thread(_write_archive, job_id, entries)
+
+
+async def _run_pending_items(job_id: int):
+    """대기/실패 항목을 동시성 제한 하에 생성"""
+    async with async_session() as db:
+        job = await db.get(CatalogJob, job_id)
+
+        # 재실행 시 실패 항목도 다시 시도
+        retry_ids = (await db.execute(
+            select(CatalogJobItem.id).where(
+                CatalogJobItem.job_id == job_id,
+                CatalogJobItem.status == "failed",
+            )
+        )).scalars().all()
+        if retry_ids:
+            await db.execute(
+                update(CatalogJobItem)
+                .where(CatalogJobItem.id.in_(retry_ids))
+                .values(status="pending", error=None)
+            )
+            job.failed -= len(retry_ids)
+
+        job.status = "running"
+        await db.commit()
+
+        result = await db.execute(
+            select(CatalogJobItem)
+            .where(CatalogJobItem.job_id == job_id, CatalogJobItem.status == "pending")
+            .order_by(CatalogJobItem.row_index)
+        )
+        items = result.scalars().all()
+
+        # 작업 템플릿은 한 번만 조회 (삭제된 템플릿이면 카테고리 기본 템플릿 사용)
+        html_template = None
+        if job.template_id:
+            html_template = (await db.execute(
+                select(Template.html_template).where(Template.id == job.template_id)
+            )).scalar_one_or_none()
+
+    slots = asyncio.Semaphore(CATALOG_CONCURRENCY)
+    # 작업을 시작/재개한 요청의 테넌트 (create_task로 컨텍스트가 전파됨)
+    tenant = current_tenant()
+
+    async with AsyncExitStack() as stack:
+        browser = None
+        # 렌더 워커를 쓰면 브라우저 없이 html_to_image가 워커에 위임 (Playwright 드라이버도 띄우지 않음)
+        if job.output_format in ["image", "both"] and not render_pool_enabled():
+            from playwright.async_api import async_playwright
+
+            p = await stack.enter_async_context(async_playwright())
+            browser = await p.chromium.launch()
+            stack.push_async_callback(browser.close)
+
+        async def run(item: CatalogJobItem):
+            async with slots:
+                try:
+                    # 상품마다 예산을 확인하고 대화형 요청과 같은 스케줄러에서 차례를 받음
+                    # (백그라운드 작업이라 슬롯은 시간 제한 없이 대기, 예산 소진 항목은 실패로 남아 resume으로 재시도)
+                    async with tenant_scope(tenant, "generation", timeout=None):
+                        history_id = await _process_item(item, job, browser, html_template)
+                    await _checkpoint(item.id, job_id, history_id, None)
+                except Exception as e:
+                    await _checkpoint(item.id, job_id, None, str(e))
+
+        await asyncio.gather(*(run(item) for item in items))
+
+
+async def run_catalog_job(job_id: int):
+    """작업 실행 - 완료 항목은 건너뛰므로 중단 후 다시 호출하면 이어서 진행"""
+    status = "completed"
+    archive_path = None
+    try:
+        await _run_pending_items(job_id)
+        archive_path = await _build_archive(job_id)
+    except (Exception, asyncio.CancelledError):
+        # 종료 시 취소된 작업도 resume으로 이어서 실행할 수 있도록 중단 상태로 기록
+        status = "interrupted"
+        raise
+    finally:
+        async with async_session() as db:
+            await db.execute(
+                update(CatalogJob)
+                .where(CatalogJob.id == job_id)
+                .values(status=status, archive_path=archive_path)
+            )
+            await db.commit()
+
+
+def start_catalog_job(job_id: int) -> bool:
+    """백그라운드에서 작업 실행 (이미 실행 중이면 False)"""
+    task = _running_jobs.get(job_id)
+    if task and not task.done():
+        return False
+
+    task = asyncio.create_task(run_catalog_job(job_id))
+    _running_jobs[job_id] = task
+    task.add_done_callback(lambda _: _running_jobs.pop(job_id, None))
+    return True
+
+
+async def mark_interrupted_jobs():
+    """서버 재시작으로 중단된 작업 표시 (resume으로 이어서 실행)"""
+    async with async_session() as db:
+        await db.execute(
+            update(CatalogJob).where(CatalogJob.status == "running").values(status="interrupted")
+        )
+        await db.commit()
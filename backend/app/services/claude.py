@@ -1,44 +1,121 @@
-import anthropic
 import base64
 import os
 from typing import Optional, Dict, Any
 
 from app.models.schemas import QuestionResponse
+from app.services.metrics import span, record_llm_usage
+from app.services.provider_gateway import ProviderUnavailableError, call_provider
+from app.services.tenants import charge_tokens
 
 # API 키가 없으면 None으로 설정 (나중에 사용 시 에러 처리)
 _api_key = os.getenv("ANTHROPIC_API_KEY")
-client = anthropic.Anthropic(api_key=_api_key) if _api_key else None
+# anthropic SDK는 임포트 비용이 커서 첫 호출 때 클라이언트 생성
+client = None
 
+# 대기/재시도를 포함한 호출 1건의 전체 제한 시간
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "60"))
 
-async def generate_followup_question(context: Dict[str, Any]) -> Optional[QuestionResponse]:
-    """맥락 기반 후속 질문 생성"""
-    # API 키가 없으면 후속 질문 없이 완료 처리
-    if not client:
-        return None
+# 고정 지시문을 system 프롬프트 캐시로 재사용 (캐시 최소 길이보다 짧은 접두부는 API가 캐시하지 않음)
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "1") == "1"
 
-    prompt = f"""
-현재까지 수집된 상품 정보:
-{context}
-
-위 정보를 바탕으로, 상세페이지 생성에 필요한 추가 정보가 있다면
+FOLLOWUP_INSTRUCTIONS = """당신은 네이버 스마트스토어 상세페이지 제작을 돕는 인터뷰어입니다.
+사용자가 보내는 상품 정보를 바탕으로, 상세페이지 생성에 필요한 추가 정보가 있다면
 1개의 후속 질문을 생성하세요.
 
 충분한 정보가 수집되었다면 "COMPLETE"라고만 응답하세요.
 
 후속 질문이 필요하다면 다음 JSON 형식으로 응답하세요:
-{{
+{
     "question": "질문 내용",
     "field_name": "필드명 (영문, snake_case)",
     "input_type": "text 또는 select",
     "options": ["옵션1", "옵션2"]  // select인 경우만
-}}
+}
 """
 
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=500,
-        messages=[{"role": "user", "content": prompt}],
-    )
+VISION_INSTRUCTIONS = """사용자가 보내는 스마트스토어 상세페이지 이미지를 분석해주세요.
+다음 항목들을 JSON 형식으로 응답해주세요:
+
+{
+    "layout_pattern": "레이아웃 패턴 설명 (섹션 배치, 여백, 정렬)",
+    "color_scheme": {
+        "primary": "#색상코드",
+        "secondary": "#색상코드",
+        "background": "#색상코드",
+        "accent": "#색상코드"
+    },
+    "sections": ["섹션1", "섹션2", ...],
+    "highlights": ["눈에 띄는 디자인 요소1", ...],
+    "tone_and_manner": "전체적인 톤앤매너 (고급스러운/캐주얼/귀여운 등)"
+}
+"""
+
+COPYWRITING_INSTRUCTIONS = """당신은 네이버 스마트스토어 상세페이지 전문 카피라이터입니다.
+아래 상품 정보를 바탕으로 사용자가 요청하는 섹션에 들어갈
+매력적인 카피라이팅을 작성해주세요.
+
+- 타겟 고객의 언어로 작성
+- 감성적이면서도 정보 전달이 명확하게
+- 적절한 이모지 사용 가능
+"""
+
+
+def _system_blocks(*texts: str):
+    """system 프롬프트 블록 - 각 블록 끝을 캐시 지점으로 지정 (앞 블록일수록 여러 요청이 공유)"""
+    blocks = []
+    for text in texts:
+        block = {"type": "text", "text": text}
+        if PROMPT_CACHE_ENABLED:
+            block["cache_control"] = {"type": "ephemeral"}
+        blocks.append(block)
+    return blocks
+
+
+def get_client():
+    """Claude 클라이언트 (API 키가 없으면 None)"""
+    global client
+    if client is None and _api_key:
+        import anthropic
+
+        # 재시도는 provider_gateway에서 처리
+        client = anthropic.AsyncAnthropic(api_key=_api_key, max_retries=0)
+    return client
+
+
+async def _create_message(**kwargs):
+    """Claude API 호출 (소요 시간/토큰 사용량 기록)"""
+    with span("llm", provider="anthropic", model=kwargs["model"]):
+        message = await call_provider(
+            "anthropic",
+            kwargs["model"],
+            lambda: get_client().messages.create(**kwargs),
+            deadline=LLM_DEADLINE_SECONDS,
+        )
+    record_llm_usage("anthropic", kwargs["model"], getattr(message, "usage", None))
+    charge_tokens(getattr(message, "usage", None))
+    return message
+
+
+async def generate_followup_question(context: Dict[str, Any]) -> Optional[QuestionResponse]:
+    """맥락 기반 후속 질문 생성"""
+    # API 키가 없으면 후속 질문 없이 완료 처리
+    if not get_client():
+        return None
+
+    prompt = f"""현재까지 수집된 상품 정보:
+{context}
+"""
+
+    try:
+        message = await _create_message(
+            model="claude-sonnet-4-20250514",
+            max_tokens=500,
+            system=_system_blocks(FOLLOWUP_INSTRUCTIONS),
+            messages=[{"role": "user", "content": prompt}],
+        )
+    except ProviderUnavailableError:
+        # 후속 질문은 선택 사항이므로 제공자 장애 시 문답 완료 처리
+        return None
 
     response_text = message.content[0].text.strip()
 
@@ -65,11 +142,13 @@ async def generate_next_question(context: Dict[str, Any]) -> QuestionResponse:
 
 async def analyze_image_with_vision(image_bytes: bytes) -> Dict[str, Any]:
     """Claude Vision으로 이미지 분석"""
-    base64_image = base64.b64encode(image_bytes).decode("utf-8")
+    with span("image_encode"):
+        base64_image = base64.b64encode(image_bytes).decode("utf-8")
 
-    message = client.messages.create(
+    message = await _create_message(
         model="claude-sonnet-4-20250514",
         max_tokens=2000,
+        system=_system_blocks(VISION_INSTRUCTIONS),
         messages=[
             {
                 "role": "user",
@@ -84,22 +163,7 @@ async def analyze_image_with_vision(image_bytes: bytes) -> Dict[str, Any]:
                     },
                     {
                         "type": "text",
-                        "text": """이 스마트스토어 상세페이지 이미지를 분석해주세요.
-다음 항목들을 JSON 형식으로 응답해주세요:
-
-{
-    "layout_pattern": "레이아웃 패턴 설명 (섹션 배치, 여백, 정렬)",
-    "color_scheme": {
-        "primary": "#색상코드",
-        "secondary": "#색상코드",
-        "background": "#색상코드",
-        "accent": "#색상코드"
-    },
-    "sections": ["섹션1", "섹션2", ...],
-    "highlights": ["눈에 띄는 디자인 요소1", ...],
-    "tone_and_manner": "전체적인 톤앤매너 (고급스러운/캐주얼/귀여운 등)"
-}
-""",
+                        "text": "이 상세페이지 이미지를 분석해주세요.",
                     },
                 ],
             }
@@ -119,9 +183,9 @@ async def analyze_image_with_vision(image_bytes: bytes) -> Dict[str, Any]:
         }
 
 
-async def generate_copywriting(context: Dict[str, Any], section: str) -> str:
-    """섹션별 카피라이팅 생성"""
-    prompt = f"""
+def build_product_prompt(context: Dict[str, Any]) -> str:
+    """카피라이팅 요청에 공통으로 들어가는 상품 정보 블록"""
+    return f"""
 상품 정보:
 - 상품명: {context.get('product_name', '')}
 - 카테고리: {context.get('category', '')}
@@ -129,18 +193,32 @@ async def generate_copywriting(context: Dict[str, Any], section: str) -> str:
 - 차별점(USP): {context.get('usp', '')}
 - 가격/프로모션: {context.get('price_info', '')}
 - 분위기: {context.get('mood', '')}
+"""
 
-위 정보를 바탕으로 상세페이지의 "{section}" 섹션에 들어갈
-매력적인 카피라이팅을 작성해주세요.
 
-- 타겟 고객의 언어로 작성
-- 감성적이면서도 정보 전달이 명확하게
-- 적절한 이모지 사용 가능
-"""
+async def generate_copywriting(
+    context: Dict[str, Any],
+    section: str,
+    product_prompt: Optional[str] = None,
+    variation: int = 0,
+    example: Optional[str] = None,
+) -> str:
+    """섹션별 카피라이팅 생성 (variation > 0이면 다른 표현의 변형 카피)
+
+    지시문과 상품 정보는 system 캐시 접두부로 보내 같은 상품의 섹션/변형 요청끼리 공유한다.
+    example은 비슷한 상품의 같은 섹션 카피로, 톤과 구성을 맞추는 참고용이다.
+    """
+    prompt = f'상세페이지의 "{section}" 섹션 카피라이팅을 작성해주세요.\n'
+
+    if variation:
+        prompt += f"- A/B 테스트용 변형 #{variation}: 기본안과 다른 관점과 표현으로 작성\n"
+    if example:
+        prompt += f"- 비슷한 상품의 기존 카피입니다. 톤과 구성은 참고하되 이 상품 정보에 맞게 작성:\n{example}\n"
 
-    message = client.messages.create(
+    message = await _create_message(
         model="claude-sonnet-4-20250514",
         max_tokens=1000,
+        system=_system_blocks(COPYWRITING_INSTRUCTIONS, product_prompt or build_product_prompt(context)),
         messages=[{"role": "user", "content": prompt}],
     )
 
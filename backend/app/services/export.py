@@ -0,0 +1,246 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.models.database import GenerationHistory
+from app.services.assets import fetch_remote_asset
+from app.services.metrics import inc
+
+# 내보내기 ZIP 캐시 (내용 해시 파일명, 보존 정책으로 정리)
+EXPORT_BUNDLES_DIR = "data/export_bundles"
+# 스마트스토어 에디터에 올리기 좋은 높이로 상세 이미지를 잘라서 포함
+EXPORT_SLICE_HEIGHT = int(os.getenv("EXPORT_SLICE_HEIGHT", "2000"))
+
+# 번들 구성이 바뀌면 올려서 기존 캐시 무효화
+BUNDLE_FORMAT_VERSION = 2
+
+# (내용, ZIP 경로 뒤에 붙일 확장자) - 확장자는 내용을 받아 봐야 알 수 있는 상품 이미지만 사용
+Loader = Callable[[], Awaitable[Optional[Tuple[bytes, str]]]]
+
+
+class _ZipStream:
+    """ZipFile이 쓰는 출력을 모아 두었다가 조각 단위로 내보내는 버퍼 (seek 불가 스트림)"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportBundle:
+    """생성 이력 1건의 내보내기 구성 (파일 목록은 스트리밍 시점에 하나씩 읽음)"""
+
+    def __init__(self, history: GenerationHistory, context: Dict[str, Any]):
+        self.history = history
+        self.product_images = [
+            image for image in context.get("product_images") or []
+            if isinstance(image, str) and image.startswith(("http://", "https://", "data:"))
+        ]
+        self.image_stat = None
+        if history.image_path and os.path.exists(history.image_path):
+            stat = os.stat(history.image_path)
+            self.image_stat = (stat.st_size, int(stat.st_mtime))
+
+        self.content_hash = self._content_hash()
+        self.cache_path = os.path.join(EXPORT_BUNDLES_DIR, f"{self.content_hash}.zip")
+
+    def _content_hash(self) -> str:
+        key = {
+            "version": BUNDLE_FORMAT_VERSION,
+            "slice_height": EXPORT_SLICE_HEIGHT,
+            "history_id": self.history.id,
+            "html": hashlib.sha256((self.history.html_content or "").encode("utf-8")).hexdigest(),
+            "image": [self.history.image_path, self.image_stat],
+            "product_images": self.product_images,
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @property
+    def filename(self) -> str:
+        return f"detail_page_{self.history.id}.zip"
+
+
+def _slice_boxes(image_path: str) -> List[Tuple[int, int]]:
+    """이미지를 EXPORT_SLICE_HEIGHT 단위로 자를 (시작, 끝) 목록"""
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        height = image.height
+    return [(top, min(top + EXPORT_SLICE_HEIGHT, height)) for top in range(0, height, EXPORT_SLICE_HEIGHT)]
+
+
+def _encode_slice(image_path: str, top: int, bottom: int) -> bytes:
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        piece = image.crop((0, top, image.width, bottom))
+        output = io.BytesIO()
+        piece.save(output, format="PNG", optimize=True)
+        return output.getvalue()
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+async def _load_product_image(source: str) -> Optional[Tuple[bytes, str]]:
+    """상품 이미지 (원격 URL은 공인 주소의 image/* 응답만 에셋 캐시로, data URL은 디코딩)"""
+    if source.startswith("data:"):
+        header, _, payload = source.partition(",")
+        content_type = header[5:].split(";")[0] or "application/octet-stream"
+        if not content_type.startswith("image/"):
+            return None
+        try:
+            body = base64.b64decode(payload) if ";base64" in header else payload.encode("utf-8")
+        except ValueError:
+            return None
+        return body, content_type
+    return await fetch_remote_asset(source, content_type_prefix="image/")
+
+
+async def _entries(bundle: ExportBundle) -> List[Tuple[str, Loader, int]]:
+    """(ZIP 내 경로, 내용 로더, 압축 방식) 목록"""
+    history = bundle.history
+    entries: List[Tuple[str, Loader, int]] = []
+
+    if history.html_content:
+        html = history.html_content.encode("utf-8")
+
+        async def load_html() -> Tuple[bytes, str]:
+            return html, ""
+
+        entries.append(("page.html", load_html, zipfile.ZIP_DEFLATED))
+
+    if bundle.image_stat:
+        boxes = await asyncio.to_thread(_slice_boxes, history.image_path)
+        for index, (top, bottom) in enumerate(boxes, start=1):
+            async def load_slice(top=top, bottom=bottom) -> Tuple[bytes, str]:
+                return await asyncio.to_thread(_encode_slice, history.image_path, top, bottom), ""
+
+            # PNG는 이미 압축되어 있으므로 저장만
+            entries.append((f"images/slice_{index:02d}.png", load_slice, zipfile.ZIP_STORED))
+
+        async def load_full() -> Optional[Tuple[bytes, str]]:
+            data = await asyncio.to_thread(_read_file, history.image_path)
+            return None if data is None else (data, "")
+
+        entries.append(("images/page.png", load_full, zipfile.ZIP_STORED))
+
+    for index, source in enumerate(bundle.product_images, start=1):
+        async def load_product(source=source) -> Optional[Tuple[bytes, str]]:
+            asset = await _load_product_image(source)
+            if asset is None:
+                return None
+            body, content_type = asset
+            return body, mimetypes.guess_extension(content_type) or ".bin"
+
+        entries.append((f"product_images/{index:02d}", load_product, zipfile.ZIP_STORED))
+
+    return entries
+
+
+def _zip_info(arcname: str, created_at: datetime, compress_type: int) -> zipfile.ZipInfo:
+    # 같은 이력은 같은 바이트가 나오도록 수정 시각을 생성 시각으로 고정
+    info = zipfile.ZipInfo(arcname, date_time=created_at.timetuple()[:6])
+    info.compress_type = compress_type
+    info.external_attr = 0o644 << 16
+    return info
+
+
+async def _zip_chunks(bundle: ExportBundle) -> AsyncIterator[bytes]:
+    """파일을 하나씩 읽어 ZIP에 쓰고 쓴 만큼 바로 내보냄 (메모리에는 파일 1개 분량만 유지)"""
+    history = bundle.history
+    created_at = history.created_at or datetime.utcnow()
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, "w")
+
+    files = []
+    missing = []
+    for arcname, load, compress_type in await _entries(bundle):
+        loaded = await load()
+        if loaded is None:
+            missing.append(arcname)
+            continue
+        data, extension = loaded
+        arcname += extension
+        info = _zip_info(arcname, created_at, compress_type)
+        await asyncio.to_thread(archive.writestr, info, data)
+        files.append({"path": arcname, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()})
+        del data
+        yield stream.drain()
+
+    manifest = {
+        "history_id": history.id,
+        "product_name": history.product_name,
+        "created_at": created_at.isoformat(),
+        "content_hash": bundle.content_hash,
+        "slice_height": EXPORT_SLICE_HEIGHT,
+        "files": files,
+        "missing": missing,
+    }
+    archive.writestr(
+        _zip_info("manifest.json", created_at, zipfile.ZIP_DEFLATED),
+        json.dumps(manifest, ensure_ascii=False, indent=2),
+    )
+    archive.close()
+    yield stream.drain()
+
+
+def cached_bundle_path(bundle: ExportBundle) -> Optional[str]:
+    """캐시된 ZIP 경로 (사용 시각을 갱신해 보존 정책에서 최근 사용분 유지)"""
+    try:
+        os.utime(bundle.cache_path)
+    except FileNotFoundError:
+        inc("export_bundles_total", cache="miss")
+        return None
+    inc("export_bundles_total", cache="hit")
+    return bundle.cache_path
+
+
+async def stream_bundle(bundle: ExportBundle) -> AsyncIterator[bytes]:
+    """ZIP을 만들면서 바로 전송하고, 끝까지 만들어지면 캐시에 저장 (중간에 끊기면 버림)"""
+    os.makedirs(EXPORT_BUNDLES_DIR, exist_ok=True)
+    tmp_path = f"{bundle.cache_path}.{uuid.uuid4().hex}.tmp"
+    completed = False
+
+    cache_file = open(tmp_path, "wb")
+    try:
+        async for chunk in _zip_chunks(bundle):
+            if chunk:
+                await asyncio.to_thread(cache_file.write, chunk)
+                inc("export_bundle_bytes_total", len(chunk))
+                yield chunk
+        completed = True
+    finally:
+        cache_file.close()
+        if completed:
+            os.replace(tmp_path, bundle.cache_path)
+        else:
+            os.remove(tmp_path)
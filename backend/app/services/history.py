@@ -0,0 +1,95 @@
+import base64
+import json
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import GenerationHistory, HISTORY_FTS_TABLE
+
+# trigram 토크나이저는 3글자 이상부터 인덱스 사용 가능 (짧으면 LIKE로 대체)
+MIN_FTS_QUERY_LENGTH = 3
+
+_TSQUERY_SPECIAL = re.compile(r"[&|!():*'\\<>]")
+
+
+def encode_cursor(created_at: datetime, history_id: int) -> str:
+    """마지막 행의 (created_at, id)를 불투명 커서 문자열로 변환"""
+    raw = json.dumps([created_at.isoformat(), history_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """커서 문자열 해석 (형식이 잘못되면 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, history_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(history_id)
+    except Exception as e:
+        raise ValueError("잘못된 커서입니다") from e
+
+
+def _search_condition(dialect: str, query: str):
+    """상품명 전문 검색 조건 (DB별 인덱스 사용)"""
+    if dialect == "sqlite" and len(query) >= MIN_FTS_QUERY_LENGTH:
+        phrase = '"' + query.replace('"', '""') + '"'
+        matches = text(
+            f"SELECT rowid FROM {HISTORY_FTS_TABLE} WHERE {HISTORY_FTS_TABLE} MATCH :query"
+        ).bindparams(query=phrase).columns(column("rowid"))
+        return GenerationHistory.id.in_(matches)
+
+    if dialect == "postgresql":
+        words = _TSQUERY_SPECIAL.sub(" ", query).split()
+        if words:
+            tsquery = " & ".join(f"{word}:*" for word in words)
+            # 인덱스 식과 같은 형태여야 GIN 인덱스 사용 (설정명은 바인드 대신 리터럴)
+            document = func.to_tsvector(
+                literal_column("'simple'"), func.coalesce(GenerationHistory.product_name, literal_column("''"))
+            )
+            return document.op("@@")(func.to_tsquery("simple", tsquery))
+
+    return GenerationHistory.product_name.contains(query, autoescape=True)
+
+
+async def list_history(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    query: Optional[str] = None,
+    session_id: Optional[int] = None,
+    output_format: Optional[str] = None,
+) -> Tuple[List, Optional[str]]:
+    """생성 이력 목록 (최신순 키셋 페이지네이션, html_content는 읽지 않음)"""
+    stmt = select(
+        GenerationHistory.id,
+        GenerationHistory.session_id,
+        GenerationHistory.created_at,
+        GenerationHistory.product_name,
+        GenerationHistory.output_format,
+        GenerationHistory.html_content.isnot(None).label("has_html"),
+        GenerationHistory.image_path.isnot(None).label("has_image"),
+    )
+
+    if cursor:
+        created_at, history_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(GenerationHistory.created_at, GenerationHistory.id) < tuple_(created_at, history_id)
+        )
+    if session_id is not None:
+        stmt = stmt.where(GenerationHistory.session_id == session_id)
+    if output_format:
+        stmt = stmt.where(GenerationHistory.output_format == output_format)
+    if query and query.strip():
+        stmt = stmt.where(_search_condition(db.bind.dialect.name, query.strip()))
+
+    stmt = stmt.order_by(GenerationHistory.created_at.desc(), GenerationHistory.id.desc()).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, next_cursor
@@ -0,0 +1,310 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+from app.services.metrics import inc, span
+
+# 렌더링 후 HTML 최적화 (사용하지 않는 CSS 제거 + 압축)
+HTML_OPTIMIZE_ENABLED = os.getenv("HTML_OPTIMIZE_ENABLED", "1") == "1"
+# <style>을 지우는 스마트스토어 에디터용으로 스타일을 style 속성에 인라인
+HTML_INLINE_STYLES = os.getenv("HTML_INLINE_STYLES", "0") == "1"
+# 정리된 스타일시트 캐시 크기 (스타일시트 해시 + 문서 구조 해시 기준)
+CSS_CACHE_SIZE = int(os.getenv("HTML_CSS_CACHE_SIZE", "256"))
+
+# 공백을 보존해야 하는 요소
+PRESERVE_WHITESPACE = {"pre", "textarea", "script", "style"}
+# 앞뒤 공백 텍스트를 지워도 렌더링이 같은 블록 요소
+BLOCK_TAGS = {
+    "html", "head", "body", "title", "meta", "link", "style", "script",
+    "section", "header", "footer", "main", "article", "aside", "nav",
+    "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li",
+    "table", "thead", "tbody", "tr", "td", "th", "figure", "figcaption", "br", "hr",
+}
+# 사용자 상호작용/가상 요소 선택자는 정적 문서에서 매칭 불가 -> 떼고 대상 요소 존재 여부만 확인
+DYNAMIC_PSEUDO = re.compile(
+    r"::?(hover|focus|focus-within|focus-visible|active|visited|link|before|after|"
+    r"placeholder|selection|first-letter|first-line|marker)\b"
+)
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_SPACES = re.compile(r"\s+")
+_COMBINATOR_SPACES = re.compile(r"\s*([>+~,])\s*")
+
+# (스타일시트 해시, 문서 구조 해시) -> 정리된 스타일시트
+_css_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+
+class CssRule:
+    """선택자 규칙 1개 또는 그대로 유지할 @규칙"""
+
+    def __init__(self, selectors: List[str], declarations: List[Tuple[str, str]], raw: Optional[str] = None):
+        self.selectors = selectors
+        self.declarations = declarations
+        self.raw = raw
+
+    def css(self) -> str:
+        if self.raw is not None:
+            return self.raw
+        body = ";".join(f"{name}:{value}" for name, value in self.declarations)
+        return ",".join(self.selectors) + "{" + body + "}"
+
+
+def _find_block_end(css: str, start: int) -> int:
+    """start 위치의 '{'와 짝이 맞는 '}' 위치 (문자열 내부 괄호 무시)"""
+    depth = 0
+    quote = None
+    for index in range(start, len(css)):
+        char = css[index]
+        if quote:
+            if char == quote and css[index - 1] != "\\":
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(css) - 1
+
+
+def _parse_declarations(block: str) -> List[Tuple[str, str]]:
+    declarations = []
+    for part in re.split(r";(?=(?:[^\"']|\"[^\"]*\"|'[^']*')*$)", block):
+        name, colon, value = part.partition(":")
+        if colon and name.strip():
+            declarations.append((name.strip().lower(), _SPACES.sub(" ", value.strip())))
+    return declarations
+
+
+def parse_css(css: str) -> List[Tuple[Optional[str], CssRule]]:
+    """스타일시트를 (미디어 조건, 규칙) 목록으로 분해"""
+    css = _COMMENT.sub("", css)
+    rules: List[Tuple[Optional[str], CssRule]] = []
+    position = 0
+    while position < len(css):
+        brace = css.find("{", position)
+        semicolon = css.find(";", position)
+        if brace == -1:
+            break
+        prelude = css[position:brace].strip()
+
+        # 블록 없는 @규칙 (@import, @charset)
+        if prelude.startswith("@") and semicolon != -1 and semicolon < brace:
+            rules.append((None, CssRule([], [], raw=_SPACES.sub(" ", css[position:semicolon].strip()) + ";")))
+            position = semicolon + 1
+            continue
+
+        end = _find_block_end(css, brace)
+        block = css[brace + 1:end]
+        prelude = _SPACES.sub(" ", prelude)
+        if prelude.startswith("@media"):
+            for _, rule in parse_css(block):
+                rules.append((prelude, rule))
+        elif prelude.startswith("@"):
+            # @keyframes, @font-face 등은 내용 그대로 유지
+            rules.append((None, CssRule([], [], raw=prelude + "{" + _SPACES.sub(" ", block.strip()) + "}")))
+        elif prelude:
+            selectors = [_COMBINATOR_SPACES.sub(r"\1", selector.strip()) for selector in prelude.split(",")]
+            rules.append((None, CssRule([s for s in selectors if s], _parse_declarations(block))))
+        position = end + 1
+    return rules
+
+
+def serialize_css(rules: List[Tuple[Optional[str], CssRule]]) -> str:
+    """규칙 목록을 압축된 스타일시트로 (같은 미디어 조건은 연속된 것끼리 묶음)"""
+    parts = []
+    current_media = None
+    media_rules: List[str] = []
+    for media, rule in rules:
+        if media != current_media and media_rules:
+            parts.append(current_media + "{" + "".join(media_rules) + "}")
+            media_rules = []
+        current_media = media
+        if media:
+            media_rules.append(rule.css())
+        else:
+            parts.append(rule.css())
+    if media_rules:
+        parts.append(current_media + "{" + "".join(media_rules) + "}")
+    return "".join(parts)
+
+
+def _selector_used(soup: BeautifulSoup, selector: str) -> bool:
+    target = DYNAMIC_PSEUDO.sub("", selector).strip() or "*"
+    if target[-1] in ">+~":
+        target += "*"
+    try:
+        return soup.select_one(target) is not None
+    except Exception:
+        # 해석할 수 없는 선택자는 안전하게 유지
+        return True
+
+
+def prune_css(soup: BeautifulSoup, rules: List[Tuple[Optional[str], CssRule]]) -> List[Tuple[Optional[str], CssRule]]:
+    """문서에 매칭되는 요소가 없는 선택자/규칙 제거"""
+    pruned = []
+    for media, rule in rules:
+        if rule.raw is not None:
+            pruned.append((media, rule))
+            continue
+        used = [selector for selector in rule.selectors if _selector_used(soup, selector)]
+        if used and rule.declarations:
+            pruned.append((media, CssRule(used, rule.declarations)))
+    return pruned
+
+
+def _specificity(selector: str) -> Tuple[int, int, int]:
+    ids = len(re.findall(r"#[\w-]+", selector))
+    classes = len(re.findall(r"\.[\w-]+|\[[^\]]+\]|:(?!:)[\w-]+", selector))
+    tags = len(re.findall(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)", selector))
+    return ids, classes, tags
+
+
+def inline_styles(soup: BeautifulSoup, rules: List[Tuple[Optional[str], CssRule]]) -> List[Tuple[Optional[str], CssRule]]:
+    """미디어 조건/상호작용 선택자가 없는 규칙을 body 안 요소의 style 속성으로 옮기고, 옮길 수 없는 규칙만 반환
+
+    남은 @media, :hover 규칙은 인라인된 같은 속성보다 우선순위가 낮아진다 (스마트스토어 에디터는 어차피 무시).
+    """
+    remaining = []
+    # 요소 -> [(명시도, 순서, 선언)]
+    matched: Dict[int, List] = {}
+    elements: Dict[int, Tag] = {}
+    for order, (media, rule) in enumerate(rules):
+        if media or rule.raw is not None or any(DYNAMIC_PSEUDO.search(s) for s in rule.selectors):
+            remaining.append((media, rule))
+            continue
+        for selector in rule.selectors:
+            try:
+                targets = soup.select(selector)
+            except Exception:
+                remaining.append((media, CssRule([selector], rule.declarations)))
+                continue
+            for element in targets:
+                if element.name != "body" and element.find_parent("body") is None:
+                    continue
+                elements[id(element)] = element
+                matched.setdefault(id(element), []).append((_specificity(selector), order, rule.declarations))
+
+    for key, entries in matched.items():
+        element = elements[key]
+        merged: Dict[str, str] = {}
+        for _, _, declarations in sorted(entries, key=lambda entry: (entry[0], entry[1])):
+            for name, value in declarations:
+                merged.pop(name, None)
+                merged[name] = value
+        # 기존 style 속성이 가장 우선
+        for name, value in _parse_declarations(element.get("style", "")):
+            merged.pop(name, None)
+            merged[name] = value
+        element["style"] = ";".join(f"{name}:{value}" for name, value in merged.items())
+    return remaining
+
+
+def _structure_key(soup: BeautifulSoup) -> str:
+    """선택자 매칭에 영향을 주는 문서 구조 (태그, id, class, 속성 이름) 해시"""
+    digest = hashlib.sha256()
+
+    def walk(element: Tag):
+        digest.update(element.name.encode())
+        for name, value in sorted(element.attrs.items()):
+            if name == "class":
+                digest.update(("." + ".".join(value)).encode())
+            elif name == "id":
+                digest.update(("#" + value).encode())
+            elif name not in ("style", "src", "href", "alt", "content"):
+                digest.update(("[" + name + "=" + str(value) + "]").encode())
+        digest.update(b"(")
+        for child in element.children:
+            if isinstance(child, Tag):
+                walk(child)
+        digest.update(b")")
+
+    for child in soup.children:
+        if isinstance(child, Tag):
+            walk(child)
+    return digest.hexdigest()
+
+
+def _optimized_stylesheet(soup: BeautifulSoup, css: str) -> str:
+    key = (hashlib.sha256(css.encode("utf-8")).hexdigest(), _structure_key(soup))
+    cached = _css_cache.get(key)
+    if cached is not None:
+        _css_cache.move_to_end(key)
+        inc("html_css_cache_total", result="hit")
+        return cached
+
+    inc("html_css_cache_total", result="miss")
+    stylesheet = serialize_css(prune_css(soup, parse_css(css)))
+    _css_cache[key] = stylesheet
+    if len(_css_cache) > CSS_CACHE_SIZE:
+        _css_cache.popitem(last=False)
+    return stylesheet
+
+
+def _minify_markup(soup: BeautifulSoup):
+    """주석 제거, 연속 공백 축약, 블록 요소 사이 공백 제거"""
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    for text in soup.find_all(string=True):
+        # 주석, doctype 등 NavigableString 하위 타입은 제외
+        if type(text) is not NavigableString:
+            continue
+        if any(parent.name in PRESERVE_WHITESPACE for parent in text.parents if parent.name):
+            continue
+        collapsed = _SPACES.sub(" ", str(text))
+        if collapsed == " ":
+            previous, following = text.previous_sibling, text.next_sibling
+            parent_is_block = text.parent is not None and text.parent.name in BLOCK_TAGS
+            if (
+                (isinstance(previous, Tag) and previous.name in BLOCK_TAGS)
+                or (isinstance(following, Tag) and following.name in BLOCK_TAGS)
+                or (parent_is_block and (previous is None or following is None))
+                or text.parent is soup
+            ):
+                text.extract()
+                continue
+        if collapsed != str(text):
+            text.replace_with(collapsed)
+
+
+def optimize_html(html: str, inline: Optional[bool] = None) -> str:
+    """렌더링된 상세페이지 HTML 최적화
+
+    사용하지 않는 CSS 규칙을 지우고 스타일시트/마크업을 압축한다.
+    inline이면 (기본값 HTML_INLINE_STYLES) 가능한 규칙을 style 속성으로 옮긴다.
+    """
+    if inline is None:
+        inline = HTML_INLINE_STYLES
+
+    with span("html_optimize"):
+        soup = BeautifulSoup(html, "html.parser")
+        styles = soup.find_all("style")
+        css = "\n".join(style.string or "" for style in styles)
+
+        if styles:
+            if inline:
+                rules = inline_styles(soup, prune_css(soup, parse_css(css)))
+                stylesheet = serialize_css(rules)
+            else:
+                stylesheet = _optimized_stylesheet(soup, css)
+
+            # 여러 <style>은 첫 번째 하나로 합침
+            for style in styles[1:]:
+                style.decompose()
+            if stylesheet:
+                styles[0].string = stylesheet
+            else:
+                styles[0].decompose()
+
+        _minify_markup(soup)
+        optimized = soup.decode(formatter="minimal")
+
+    inc("html_optimized_bytes_saved_total", max(0, len(html.encode("utf-8")) - len(optimized.encode("utf-8"))))
+    return optimized
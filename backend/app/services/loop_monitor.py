@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.services.metrics import inc, observe, set_gauge
+
+logger = logging.getLogger(__name__)
+
+# 이벤트 루프 지연/블로킹 감시 (운영 중 켜 둘 수 있을 만큼 가벼움)
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "0") == "1"
+# 지연 측정 주기
+LOOP_MONITOR_INTERVAL_MS = int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+# 이 시간 이상 루프가 멈추면 블로킹으로 보고 스택 수집
+LOOP_BLOCK_THRESHOLD_MS = int(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "200"))
+# 로그에 남길 스택 프레임 수
+LOOP_BLOCK_STACK_DEPTH = int(os.getenv("LOOP_BLOCK_STACK_DEPTH", "12"))
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.dirname(APP_DIR)
+
+
+def _module_name(filename: str) -> str:
+    path = os.path.abspath(filename)
+    if path.startswith(BACKEND_DIR + os.sep):
+        path = os.path.relpath(path, BACKEND_DIR)
+    return os.path.splitext(path)[0].replace(os.sep, ".")
+
+
+def _offender(frame) -> str:
+    """블로킹 위치 - 스택 안쪽부터 앱 코드(app/) 프레임을 찾아 module:function 반환"""
+    innermost = frame
+    while frame is not None:
+        if os.path.abspath(frame.f_code.co_filename).startswith(APP_DIR + os.sep) \
+                and not frame.f_code.co_filename.endswith("loop_monitor.py"):
+            return f"{_module_name(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return f"{_module_name(innermost.f_code.co_filename)}:{innermost.f_code.co_name}"
+
+
+class _Watchdog(threading.Thread):
+    """루프 스레드의 하트비트가 끊기면 그 순간의 스택을 샘플링하는 감시 스레드"""
+
+    def __init__(self, loop_thread_id: int, interval: float, threshold: float):
+        super().__init__(name="loop-watchdog", daemon=True)
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.threshold = threshold
+        self.last_beat = time.perf_counter()
+        self.beats = 0
+        self.reported_beat = -1
+        self.stalled_at: Optional[str] = None
+        self.stopped = threading.Event()
+
+    def beat(self):
+        self.last_beat = time.perf_counter()
+        self.beats += 1
+
+    def run(self):
+        while not self.stopped.wait(self.threshold / 2):
+            stalled = time.perf_counter() - self.last_beat - self.interval
+            if stalled < self.threshold or self.reported_beat == self.beats:
+                continue
+
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+
+            self.reported_beat = self.beats
+            self.stalled_at = _offender(frame)
+            inc("event_loop_blocked_total", location=self.stalled_at)
+            stack = "".join(traceback.format_stack(frame)[-LOOP_BLOCK_STACK_DEPTH:])
+            logger.warning(
+                "이벤트 루프 블로킹 감지 (%.0fms 이상): %s\n%s", stalled * 1000, self.stalled_at, stack
+            )
+
+
+async def loop_monitor():
+    """이벤트 루프 지연 측정 + 블로킹 호출 감지 (백그라운드 태스크로 실행)"""
+    interval = LOOP_MONITOR_INTERVAL_MS / 1000
+    watchdog = _Watchdog(threading.get_ident(), interval, LOOP_BLOCK_THRESHOLD_MS / 1000)
+    watchdog.start()
+
+    worst = 0.0
+    try:
+        while True:
+            scheduled = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - scheduled)
+            watchdog.beat()
+
+            observe("event_loop_lag_seconds", lag)
+            if lag > worst:
+                worst = lag
+                set_gauge("event_loop_lag_max_seconds", worst)
+
+            # 감시 스레드가 잡은 블로킹이면 멈춘 시간을 해당 위치에 귀속
+            if watchdog.stalled_at is not None:
+                observe("event_loop_block_duration_seconds", lag, location=watchdog.stalled_at)
+                watchdog.stalled_at = None
+    finally:
+        watchdog.stopped.set()
@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# 모든 응답에 Server-Timing 헤더 추가 (0이면 X-Server-Timing: 1 요청 헤더가 있을 때만)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "0") == "1"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 시간이 아닌 히스토그램의 버킷
+HISTOGRAM_BUCKETS = {
+    "llm_cache_read_ratio": (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+}
+
+METRIC_HELP = {
+    "stage_duration_seconds": ("histogram", "단계별 소요 시간"),
+    "http_request_duration_seconds": ("histogram", "HTTP 요청 처리 시간"),
+    "db_query_duration_seconds": ("histogram", "DB 쿼리 실행 시간"),
+    "llm_requests_total": ("counter", "LLM 호출 수"),
+    "llm_tokens_total": ("counter", "LLM 토큰 수 (input, output, cache_read, cache_write)"),
+    "llm_cache_read_ratio": ("histogram", "호출별 입력 토큰 중 프롬프트 캐시 읽기 비율"),
+    "images_generated_total": ("counter", "이미지 생성 API 호출 수"),
+    "provider_requests_total": ("counter", "AI 제공자 호출 결과 (ok, error, unavailable, queue_timeout)"),
+    "provider_retries_total": ("counter", "AI 제공자 재시도 횟수"),
+    "provider_queue_depth": ("gauge", "속도 제한 대기 중인 요청 수"),
+    "provider_queue_wait_seconds": ("histogram", "속도 제한 대기 시간"),
+    "provider_circuit_open": ("gauge", "회로 차단 상태 (1이면 차단 중)"),
+    "tenant_requests_total": ("counter", "테넌트별 요청 입장 결과 (admitted, quota_exceeded, busy)"),
+    "tenant_tokens_total": ("counter", "테넌트별 LLM 토큰 사용량 (프롬프트 캐시 읽기 제외)"),
+    "tenant_images_total": ("counter", "테넌트별 이미지 생성 API 호출 수"),
+    "tenant_active_requests": ("gauge", "테넌트별 실행 중인 요청 수"),
+    "tenant_queue_wait_seconds": ("histogram", "실행 슬롯 배정 대기 시간"),
+    "copy_fallback_total": ("counter", "카피라이팅 기본 문구 사용 횟수"),
+    "copy_similarity_total": ("counter", "유사 상품 카피 검색 결과 (draft, example, miss)"),
+    "copy_reused_sections_total": ("counter", "LLM 호출 없이 재사용한 섹션 카피 수"),
+    "export_bundles_total": ("counter", "내보내기 ZIP 요청 (cache=hit, miss)"),
+    "export_bundle_bytes_total": ("counter", "스트리밍으로 전송한 내보내기 ZIP 바이트 수"),
+    "render_jobs_total": ("counter", "렌더 워커 작업 결과 (ok, error, rejected, worker_crash)"),
+    "render_queue_depth": ("gauge", "렌더 워커에서 실행/대기 중인 작업 수"),
+    "render_admission_wait_seconds": ("histogram", "렌더 대기열 진입 대기 시간"),
+    "render_job_seconds": ("histogram", "렌더 워커 작업 처리 시간 (IPC 포함)"),
+    "template_validations_total": ("counter", "템플릿 등록 검증 결과 (ok, rejected)"),
+    "template_thumbnails_total": ("counter", "템플릿 썸네일 캐시 조회 (hit, miss)"),
+    "html_css_cache_total": ("counter", "정리된 스타일시트 캐시 조회 (hit, miss)"),
+    "html_optimized_bytes_saved_total": ("counter", "HTML 최적화로 줄어든 바이트 수"),
+    "startup_phase_seconds": ("gauge", "앱 시작 단계별 소요 시간"),
+    "event_loop_lag_seconds": ("histogram", "이벤트 루프 지연"),
+    "event_loop_lag_max_seconds": ("gauge", "관측된 최대 이벤트 루프 지연"),
+    "event_loop_blocked_total": ("counter", "임계값을 넘은 이벤트 루프 블로킹 횟수 (위치별)"),
+    "event_loop_block_duration_seconds": ("histogram", "블로킹 위치별 루프 정지 시간"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+_gauges: Dict[str, Dict[LabelKey, float]] = {}
+# 이름 -> 레이블 -> [버킷별 누적 개수..., 합계, 개수]
+_histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+# 요청 단위 Server-Timing 수집 (미들웨어가 리스트를 넣어 둔 요청만 기록)
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    """카운터 증가"""
+    key = _label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    """게이지 값 설정"""
+    with _lock:
+        _gauges.setdefault(name, {})[_label_key(labels)] = value
+
+
+def observe(name: str, value: float, **labels):
+    """히스토그램에 관측값 기록"""
+    key = _label_key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        buckets = HISTOGRAM_BUCKETS.get(name, DEFAULT_BUCKETS)
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0.0] * (len(buckets) + 2)
+        index = bisect_left(buckets, value)
+        if index < len(buckets):
+            values[index] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+def record_timing(name: str, seconds: float):
+    """현재 요청의 Server-Timing 항목 추가"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """단계 소요 시간 측정 (Prometheus 히스토그램 + Server-Timing)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("stage_duration_seconds", elapsed, stage=stage, **labels)
+        record_timing(stage, elapsed)
+
+
+# 응답 usage 필드 -> llm_tokens_total type 레이블
+TOKEN_TYPES = (
+    ("input_tokens", "input"),
+    ("output_tokens", "output"),
+    ("cache_read_input_tokens", "cache_read"),
+    ("cache_creation_input_tokens", "cache_write"),
+)
+
+
+def record_llm_usage(provider: str, model: str, usage):
+    """LLM 응답의 토큰 사용량 기록"""
+    inc("llm_requests_total", provider=provider, model=model)
+    if usage is None:
+        return
+    for token_type, label in TOKEN_TYPES:
+        count = getattr(usage, token_type, None)
+        if count:
+            inc("llm_tokens_total", count, provider=provider, model=model, type=label)
+
+    # 입력 토큰 중 프롬프트 캐시에서 읽은 비율
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    total_input = cache_read + (getattr(usage, "input_tokens", None) or 0) \
+        + (getattr(usage, "cache_creation_input_tokens", None) or 0)
+    if total_input:
+        observe("llm_cache_read_ratio", cache_read / total_input, provider=provider, model=model)
+
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """요청 시작 시 Server-Timing 수집 시작"""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def format_server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing 헤더 값 (같은 단계는 합산)"""
+    totals: Dict[str, List[float]] = {}
+    for name, seconds in timings:
+        entry = totals.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    parts = [f'{name};dur={seconds * 1000:.1f};desc="{count}x"' for name, (seconds, count) in totals.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def snapshot_histogram(name: str) -> Dict[LabelKey, Tuple[float, int]]:
+    """히스토그램의 레이블별 (합계, 개수) 스냅샷 - 벤치마크 구간 비교용"""
+    with _lock:
+        return {key: (values[-2], int(values[-1])) for key, values in _histograms.get(name, {}).items()}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _header(lines: List[str], name: str, default_type: str):
+    metric_type, help_text = METRIC_HELP.get(name, (default_type, name))
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def render_prometheus() -> str:
+    """Prometheus 텍스트 포맷으로 내보내기"""
+    lines: List[str] = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            _header(lines, name, "counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+        for name, series in sorted(_gauges.items()):
+            _header(lines, name, "gauge")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+        for name, series in sorted(_histograms.items()):
+            _header(lines, name, "histogram")
+            for key, values in series.items():
+                cumulative = 0.0
+                for bound, count in zip(HISTOGRAM_BUCKETS.get(name, DEFAULT_BUCKETS), values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative:g}")
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {values[-1]:g}")
+                lines.append(f"{name}_sum{_format_labels(key)} {values[-2]:g}")
+                lines.append(f"{name}_count{_format_labels(key)} {values[-1]:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def instrument_engine(engine):
+    """SQLAlchemy 엔진에 쿼리 시간 측정 이벤트 등록"""
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        words = statement.split(None, 1)
+        operation = words[0].upper() if words else "OTHER"
+        observe("db_query_duration_seconds", elapsed, operation=operation)
+        record_timing("db", elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
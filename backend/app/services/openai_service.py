@@ -1,39 +1,75 @@
+import asyncio
+import base64
+import hashlib
+import json
 import os
-from openai import OpenAI
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import select, func, delete
+
+from app.models.database import async_session, BackgroundImage
+from app.services.metrics import span, inc
+from app.services.provider_gateway import call_provider
+from app.services.tenants import charge_images
 
 # API 키가 없으면 None으로 설정 (나중에 사용 시 에러 처리)
 _api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=_api_key) if _api_key else None
+# openai SDK는 임포트 비용이 커서 첫 호출 때 클라이언트 생성
+client = None
 
 
-async def generate_background_image(
+def get_client():
+    """OpenAI 클라이언트 (API 키가 없으면 None)"""
+    global client
+    if client is None and _api_key:
+        from openai import AsyncOpenAI
+
+        # 재시도는 provider_gateway에서 처리
+        client = AsyncOpenAI(api_key=_api_key, max_retries=0)
+    return client
+
+
+IMAGE_MODEL = "dall-e-3"
+IMAGE_DEADLINE_SECONDS = float(os.getenv("IMAGE_DEADLINE_SECONDS", "120"))
+
+# 생성된 배경 이미지 저장소 (내용 해시 파일명)
+BACKGROUND_IMAGES_DIR = "data/background_images"
+BACKGROUND_CACHE_MAX_BYTES = int(os.getenv("BACKGROUND_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# 사전 생성 라이브러리 항목의 캐시 키 접두사 (LRU 삭제 대상에서 제외)
+LIBRARY_KEY_PREFIX = "library:"
+
+# 카테고리별 기본 프롬프트
+CATEGORY_PROMPTS = {
+    "fashion": "elegant fashion product photography background",
+    "beauty": "clean minimal beauty cosmetics background",
+    "food": "appetizing food photography background",
+    "electronics": "modern tech product background",
+    "home": "cozy home lifestyle background",
+}
+
+# 분위기별 스타일
+MOOD_STYLES = {
+    "luxury": "luxurious, premium, gold accents, sophisticated",
+    "casual": "casual, friendly, warm colors, approachable",
+    "cute": "cute, playful, pastel colors, kawaii style",
+    "simple": "minimalist, clean, white space, modern",
+    "professional": "professional, corporate, trustworthy, clean",
+}
+
+# 같은 프롬프트 동시 요청은 API 호출 1회로 합침
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def build_background_prompt(
     category: str,
     mood: str,
     color_scheme: str = None,
     custom_prompt: str = None,
 ) -> str:
-    """DALL-E 3로 배경 이미지 생성"""
-
-    # 카테고리별 기본 프롬프트
-    category_prompts = {
-        "fashion": "elegant fashion product photography background",
-        "beauty": "clean minimal beauty cosmetics background",
-        "food": "appetizing food photography background",
-        "electronics": "modern tech product background",
-        "home": "cozy home lifestyle background",
-    }
-
-    # 분위기별 스타일
-    mood_styles = {
-        "luxury": "luxurious, premium, gold accents, sophisticated",
-        "casual": "casual, friendly, warm colors, approachable",
-        "cute": "cute, playful, pastel colors, kawaii style",
-        "simple": "minimalist, clean, white space, modern",
-        "professional": "professional, corporate, trustworthy, clean",
-    }
-
-    base_prompt = category_prompts.get(category, "product photography background")
-    mood_style = mood_styles.get(mood, "modern and clean")
+    """DALL-E 배경 이미지 프롬프트 구성"""
+    base_prompt = CATEGORY_PROMPTS.get(category, "product photography background")
+    mood_style = MOOD_STYLES.get(mood, "modern and clean")
 
     prompt = f"""
     Create a background image for an e-commerce product detail page.
@@ -57,12 +93,156 @@ async def generate_background_image(
     - High quality, 1024x1024
     """
 
-    response = client.images.generate(
-        model="dall-e-3",
-        prompt=prompt,
-        size="1024x1024",
-        quality="standard",
-        n=1,
+    return prompt
+
+
+def _prompt_key(category: str, mood: str, color_scheme: str = None, custom_prompt: str = None) -> str:
+    """캐시 키 (요청 파라미터 + 모델)"""
+    payload = json.dumps(
+        [IMAGE_MODEL, category, mood, (color_scheme or "").strip(), (custom_prompt or "").strip()],
+        ensure_ascii=False,
     )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def background_image_url(content_hash: str) -> str:
+    return f"/api/generate/background-images/{content_hash}.png"
+
+
+def _store_image(image_bytes: bytes) -> str:
+    """내용 해시 파일명으로 저장 (이미 있으면 재사용)"""
+    os.makedirs(BACKGROUND_IMAGES_DIR, exist_ok=True)
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    filepath = os.path.join(BACKGROUND_IMAGES_DIR, f"{content_hash}.png")
+
+    if not os.path.exists(filepath):
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, filepath)
+
+    return content_hash
+
+
+async def _request_image(prompt: str) -> bytes:
+    """DALL-E 3 호출 (base64로 받아 별도 다운로드 없이 저장)"""
+    with span("image_generation", provider="openai", model=IMAGE_MODEL):
+        response = await call_provider(
+            "openai",
+            IMAGE_MODEL,
+            lambda: get_client().images.generate(
+                model=IMAGE_MODEL,
+                prompt=prompt,
+                size="1024x1024",
+                quality="standard",
+                response_format="b64_json",
+                n=1,
+            ),
+            deadline=IMAGE_DEADLINE_SECONDS,
+        )
+    inc("images_generated_total", model=IMAGE_MODEL)
+    charge_images()
+
+    with span("image_decode"):
+        return base64.b64decode(response.data[0].b64_json)
+
+
+async def _evict_background_cache():
+    """저장 용량 초과 시 오래 사용하지 않은 이미지부터 삭제 (LRU, 사전 생성 라이브러리 제외)"""
+    evictable = ~BackgroundImage.prompt_key.like(f"{LIBRARY_KEY_PREFIX}%")
+
+    async with async_session() as db:
+        total = (await db.execute(
+            select(func.coalesce(func.sum(BackgroundImage.size_bytes), 0)).where(evictable)
+        )).scalar()
+        if total <= BACKGROUND_CACHE_MAX_BYTES:
+            return
+
+        result = await db.execute(
+            select(BackgroundImage).where(evictable).order_by(BackgroundImage.last_used_at)
+        )
+        evicted = []
+        for image in result.scalars():
+            if total <= BACKGROUND_CACHE_MAX_BYTES:
+                break
+            total -= image.size_bytes or 0
+            evicted.append(image)
+
+        evicted_ids = [image.id for image in evicted]
+        await db.execute(delete(BackgroundImage).where(BackgroundImage.id.in_(evicted_ids)))
+
+        # 같은 내용을 다른 키가 참조하고 있으면 파일은 유지
+        hashes = {image.content_hash for image in evicted}
+        still_used = set((await db.execute(
+            select(BackgroundImage.content_hash).where(BackgroundImage.content_hash.in_(hashes))
+        )).scalars().all())
+        await db.commit()
+
+    for image in evicted:
+        if image.content_hash not in still_used and os.path.exists(image.file_path):
+            await asyncio.to_thread(os.remove, image.file_path)
+
+
+async def generate_and_cache(prompt_key: str, prompt: str) -> str:
+    """이미지 생성 후 로컬 저장 및 캐시 등록 (내용 해시 반환)"""
+    image_bytes = await _request_image(prompt)
+    content_hash = await asyncio.to_thread(_store_image, image_bytes)
+    filepath = os.path.join(BACKGROUND_IMAGES_DIR, f"{content_hash}.png")
+
+    async with async_session() as db:
+        result = await db.execute(select(BackgroundImage).where(BackgroundImage.prompt_key == prompt_key))
+        image = result.scalar_one_or_none() or BackgroundImage(prompt_key=prompt_key)
+        image.content_hash = content_hash
+        image.file_path = filepath
+        image.size_bytes = len(image_bytes)
+        image.created_at = image.last_used_at = datetime.utcnow()
+        db.add(image)
+        await db.commit()
+
+    await _evict_background_cache()
+    return content_hash
+
+
+async def get_cached_background(prompt_key: str) -> Optional[str]:
+    """캐시된 이미지의 내용 해시 (사용 시각 갱신, 파일이 없으면 None)"""
+    async with async_session() as db:
+        result = await db.execute(select(BackgroundImage).where(BackgroundImage.prompt_key == prompt_key))
+        image = result.scalar_one_or_none()
+        if not image or not os.path.exists(image.file_path):
+            return None
+
+        image.last_used_at = datetime.utcnow()
+        await db.commit()
+        return image.content_hash
+
+
+async def generate_background_image(
+    category: str,
+    mood: str,
+    color_scheme: str = None,
+    custom_prompt: str = None,
+) -> str:
+    """DALL-E 3로 배경 이미지 생성 후 로컬 URL 반환 (같은 요청은 캐시 재사용)"""
+    prompt_key = _prompt_key(category, mood, color_scheme, custom_prompt)
+
+    content_hash = await get_cached_background(prompt_key)
+    if content_hash:
+        return background_image_url(content_hash)
+
+    # 같은 키로 진행 중인 생성이 있으면 결과 공유
+    pending = _inflight.get(prompt_key)
+    if pending:
+        return background_image_url(await asyncio.shield(pending))
+
+    prompt = build_background_prompt(category, mood, color_scheme, custom_prompt)
+    task = asyncio.ensure_future(generate_and_cache(prompt_key, prompt))
+    _inflight[prompt_key] = task
+    try:
+        content_hash = await asyncio.shield(task)
+    finally:
+        if task.done():
+            _inflight.pop(prompt_key, None)
+        else:
+            task.add_done_callback(lambda _: _inflight.pop(prompt_key, None))
 
-    return response.data[0].url
+    return background_image_url(content_hash)
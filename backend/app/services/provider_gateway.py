@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services.metrics import inc, observe, set_gauge
+
+logger = logging.getLogger(__name__)
+
+# 모델별 분당 요청 수 기본값 (PROVIDER_RATE_LIMITS="anthropic:claude-sonnet-4-20250514=50,openai:dall-e-3=7"로 개별 지정)
+DEFAULT_RPM = {
+    "anthropic": int(os.getenv("ANTHROPIC_RPM", "50")),
+    "openai": int(os.getenv("OPENAI_RPM", "7")),
+}
+PROVIDER_RATE_LIMITS = os.getenv("PROVIDER_RATE_LIMITS", "")
+
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "3"))
+PROVIDER_BACKOFF_BASE = float(os.getenv("PROVIDER_BACKOFF_BASE", "0.5"))
+PROVIDER_BACKOFF_MAX = float(os.getenv("PROVIDER_BACKOFF_MAX", "10"))
+
+# 연속 실패가 이 횟수에 도달하면 일정 시간 호출을 차단하고 바로 실패 (대체 문구 사용)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS = {408, 409, 429}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "InternalServerError", "RateLimitError"}
+
+
+class ProviderUnavailableError(Exception):
+    """외부 AI 제공자를 일시적으로 사용할 수 없음 (API에서는 503으로 응답)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(ProviderUnavailableError):
+    """회로 차단 중이라 호출하지 않고 바로 실패"""
+
+
+class TokenBucket:
+    """분당 요청 수 제한 (버스트는 1분 한도까지 허용)"""
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = max(1, rate_per_minute)
+        self.rate = self.capacity / 60
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # 잠금 순서대로 토큰을 받으므로 대기 요청은 FIFO로 처리
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class CircuitBreaker:
+    """연속 실패 기반 회로 차단기 (closed -> open -> half_open)"""
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self.probing):
+            remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError("AI 서비스 응답이 불안정해 잠시 호출을 중단했습니다", retry_after=max(1.0, remaining))
+        if state == "half_open":
+            # 재개 여부를 확인할 요청 1개만 통과
+            self.probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+def _parse_rate_limits(spec: str) -> Dict[Tuple[str, str], int]:
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, value = entry.partition("=")
+        provider, _, model = key.partition(":")
+        limits[(provider, model)] = int(value)
+    return limits
+
+
+_rate_limits = _parse_rate_limits(PROVIDER_RATE_LIMITS)
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def _bucket(provider: str, model: str) -> TokenBucket:
+    key = (provider, model)
+    if key not in _buckets:
+        _buckets[key] = TokenBucket(_rate_limits.get(key, DEFAULT_RPM.get(provider, 60)))
+    return _buckets[key]
+
+
+def _breaker(provider: str) -> CircuitBreaker:
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+    return _breakers[provider]
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """429 응답의 Retry-After 헤더 (초)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """지수 백오프 + 전체 지터 (Retry-After가 있으면 그 이상 대기)"""
+    delay = random.uniform(0, min(PROVIDER_BACKOFF_MAX, PROVIDER_BACKOFF_BASE * 2 ** attempt))
+    return max(delay, _retry_after(error) or 0)
+
+
+async def call_provider(
+    provider: str,
+    model: str,
+    request: Callable[[], Awaitable[Any]],
+    deadline: float,
+) -> Any:
+    """AI 제공자 호출 - 속도 제한, 재시도, 전체 제한 시간, 회로 차단 적용
+
+    request는 호출할 때마다 새 코루틴을 만드는 함수여야 한다 (재시도 시 다시 호출).
+    """
+    labels = {"provider": provider, "model": model}
+    breaker = _breaker(provider)
+    breaker.before_call()
+    # 반개방 상태의 시험 호출이 성공/실패 기록 없이 끝나면(잘못된 요청, 대기 시간 초과, 취소 등)
+    # 다음 호출이 다시 시험할 수 있도록 해제 (before_call을 통과했는데 probing이면 이 호출이 시험 호출)
+    is_probe = breaker.probing
+    settled = False
+    try:
+        expires = time.monotonic() + deadline
+
+        bucket = _bucket(provider, model)
+        bucket.waiting += 1
+        set_gauge("provider_queue_depth", bucket.waiting, **labels)
+        queued = time.perf_counter()
+        try:
+            await asyncio.wait_for(bucket.acquire(), timeout=deadline)
+        except asyncio.TimeoutError:
+            inc("provider_requests_total", outcome="queue_timeout", **labels)
+            raise ProviderUnavailableError("AI 서비스 요청이 많아 처리하지 못했습니다", retry_after=5)
+        finally:
+            bucket.waiting -= 1
+            set_gauge("provider_queue_depth", bucket.waiting, **labels)
+            observe("provider_queue_wait_seconds", time.perf_counter() - queued, **labels)
+
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                result = await asyncio.wait_for(request(), timeout=remaining)
+            except Exception as e:
+                retryable = _is_retryable(e)
+                if not retryable:
+                    # 잘못된 요청 등은 제공자 장애가 아니므로 회로 상태에 반영하지 않음
+                    inc("provider_requests_total", outcome="error", **labels)
+                    raise
+
+                delay = _backoff(attempt, e)
+                if attempt >= PROVIDER_MAX_RETRIES or time.monotonic() + delay >= expires:
+                    breaker.record_failure()
+                    settled = True
+                    set_gauge("provider_circuit_open", 0 if breaker.state == "closed" else 1, provider=provider)
+                    inc("provider_requests_total", outcome="unavailable", **labels)
+                    logger.warning("%s %s 호출 실패 (%d회 시도): %r", provider, model, attempt + 1, e)
+                    raise ProviderUnavailableError(
+                        "AI 서비스가 일시적으로 응답하지 않습니다", retry_after=_retry_after(e) or 5
+                    ) from e
+
+                attempt += 1
+                inc("provider_retries_total", **labels)
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            settled = True
+            set_gauge("provider_circuit_open", 0, provider=provider)
+            inc("provider_requests_total", outcome="ok", **labels)
+            return result
+    finally:
+        if is_probe and not settled:
+            breaker.probing = False
@@ -0,0 +1,180 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+from app.services.metrics import inc, observe, set_gauge
+
+logger = logging.getLogger(__name__)
+
+# Chromium 작업을 처리할 렌더 워커 프로세스 수 (0이면 API 프로세스에서 직접 렌더링)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))
+# 실행 중 + 대기 중인 렌더 작업 최대 수 (초과 시 대기, RENDER_ADMISSION_TIMEOUT 후 503)
+RENDER_QUEUE_MAX = int(os.getenv("RENDER_QUEUE_MAX", str(max(1, RENDER_WORKERS) * 4)))
+RENDER_ADMISSION_TIMEOUT = float(os.getenv("RENDER_ADMISSION_TIMEOUT", "10"))
+
+
+class RenderBusyError(Exception):
+    """렌더 대기열이 가득 차 작업을 받을 수 없음 (API에서는 503으로 응답)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_admission: Optional[asyncio.Semaphore] = None
+_in_flight = 0
+
+
+def render_pool_enabled() -> bool:
+    return _executor is not None
+
+
+# --- 워커 프로세스 측 -------------------------------------------------------
+
+# 워커마다 이벤트 루프 1개와 브라우저 1개를 유지 (작업은 한 번에 1개씩)
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_playwright = None
+_worker_browser = None
+
+
+async def _launch_browser():
+    global _worker_playwright, _worker_browser
+    from playwright.async_api import async_playwright
+
+    if _worker_playwright is None:
+        _worker_playwright = await async_playwright().start()
+    _worker_browser = await _worker_playwright.chromium.launch()
+
+
+async def _close_browser():
+    if _worker_browser is not None:
+        await _worker_browser.close()
+    if _worker_playwright is not None:
+        await _worker_playwright.stop()
+
+
+def _shutdown_worker():
+    try:
+        _worker_loop.run_until_complete(_close_browser())
+    except Exception:
+        pass
+
+
+def _init_worker():
+    """워커 시작 시 브라우저를 띄워 둠 (첫 작업의 브라우저 기동 시간 제거)"""
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    atexit.register(_shutdown_worker)
+    try:
+        _worker_loop.run_until_complete(_launch_browser())
+    except Exception as e:
+        # 초기화 실패로 풀이 깨지지 않도록 첫 작업에서 다시 시도 (오류는 작업 결과로 전달)
+        logger.warning("렌더 워커 브라우저 시작 실패: %s", e)
+
+
+async def _run_job(kind: str, kwargs: dict) -> Any:
+    from app.services.analyzer import capture_page
+    from app.services.renderer import html_to_image, html_to_images
+
+    # 브라우저가 죽었으면 다시 띄움
+    if _worker_browser is None or not _worker_browser.is_connected():
+        await _launch_browser()
+
+    if kind == "image":
+        return await html_to_image(browser=_worker_browser, **kwargs)
+    if kind == "images":
+        return await html_to_images(browser=_worker_browser, **kwargs)
+    if kind == "capture":
+        return await capture_page(browser=_worker_browser, **kwargs)
+    raise ValueError(f"알 수 없는 렌더 작업입니다: {kind}")
+
+
+def _worker_entry(kind: str, kwargs: dict) -> Any:
+    return _worker_loop.run_until_complete(_run_job(kind, kwargs))
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+# --- API 프로세스 측 --------------------------------------------------------
+
+def _create_executor() -> ProcessPoolExecutor:
+    # 스레드가 있는 API 프로세스를 fork하지 않도록 spawn 사용
+    executor = ProcessPoolExecutor(
+        max_workers=RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    # 워커를 미리 모두 띄워 브라우저 기동을 첫 요청 전에 끝냄
+    for _ in range(RENDER_WORKERS):
+        executor.submit(_ping)
+    return executor
+
+
+def start_render_pool():
+    """렌더 워커 프로세스 시작 (RENDER_WORKERS가 0이면 아무것도 하지 않음)"""
+    global _executor, _admission
+    if not RENDER_WORKERS or _executor is not None:
+        return
+
+    _executor = _create_executor()
+    _admission = asyncio.Semaphore(RENDER_QUEUE_MAX)
+    logger.info("렌더 워커 %d개 시작 (대기열 %d)", RENDER_WORKERS, RENDER_QUEUE_MAX)
+
+
+def shutdown_render_pool():
+    global _executor, _admission
+    if _executor is None:
+        return
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _admission = None
+
+
+async def submit_render(kind: str, **kwargs) -> Any:
+    """렌더 작업을 워커 프로세스에 맡기고 결과 대기 (대기열이 가득 차면 RenderBusyError)"""
+    global _in_flight, _executor
+
+    admission = _admission
+    queued = time.perf_counter()
+    try:
+        await asyncio.wait_for(admission.acquire(), timeout=RENDER_ADMISSION_TIMEOUT)
+    except asyncio.TimeoutError:
+        inc("render_jobs_total", kind=kind, outcome="rejected")
+        raise RenderBusyError("이미지 렌더링 요청이 많아 처리하지 못했습니다", retry_after=5)
+
+    executor = _executor
+    _in_flight += 1
+    set_gauge("render_queue_depth", _in_flight)
+    started = time.perf_counter()
+    observe("render_admission_wait_seconds", started - queued, kind=kind)
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(executor, _worker_entry, kind, kwargs)
+        inc("render_jobs_total", kind=kind, outcome="ok")
+        return result
+    except BrokenProcessPool:
+        # 워커가 비정상 종료되면 풀을 다시 만듦 (진행 중이던 작업은 실패 처리)
+        inc("render_jobs_total", kind=kind, outcome="worker_crash")
+        logger.warning("렌더 워커가 비정상 종료되어 다시 시작합니다")
+        if _executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            _executor = _create_executor()
+        raise RuntimeError("렌더 워커가 비정상 종료되었습니다")
+    except Exception:
+        inc("render_jobs_total", kind=kind, outcome="error")
+        raise
+    finally:
+        observe("render_job_seconds", time.perf_counter() - started, kind=kind)
+        _in_flight -= 1
+        set_gauge("render_queue_depth", _in_flight)
+        admission.release()
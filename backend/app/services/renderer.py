@@ -1,8 +1,17 @@
+import asyncio
+import hashlib
 import os
 import uuid
-from typing import Dict, Any, Optional
-from jinja2 import Environment, FileSystemLoader
-from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Tuple
+from jinja2 import Environment, FileSystemLoader, Template
+from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+from app.services.assets import load_html
+from app.services.html_optimizer import HTML_OPTIMIZE_ENABLED, optimize_html
+from app.services.metrics import inc, span
+from app.services.render_pool import render_pool_enabled, submit_render
+from app.services.similarity import COPY_REUSE_THRESHOLD, adapt_copy, find_similar_copy
 
 # Jinja2 환경 설정 - 현재 작업 디렉토리 기준
 TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "templates")
@@ -10,18 +19,88 @@ template_env = Environment(
     loader=FileSystemLoader(TEMPLATES_DIR),
     autoescape=True,
 )
+# 사용자가 등록한(DB) 템플릿 전용 - 내부 속성/메서드 접근과 객체 변경을 막는 샌드박스
+sandbox_env = ImmutableSandboxedEnvironment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+)
+
+GENERATED_IMAGES_DIR = "data/generated_images"
+
+# 뷰포트 이름 -> 캡처 너비
+VIEWPORT_WIDTHS = {
+    "desktop": 860,
+    "mobile": 360,
+    "mobile_large": 414,
+}
+# 첫 화면 미리보기 (데스크톱 너비, 상단 일부만 JPEG로)
+PREVIEW_HEIGHT = int(os.getenv("PREVIEW_HEIGHT", "1200"))
+PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", "80"))
+
+NEXT_FRAME_SCRIPT = "() => new Promise(resolve => requestAnimationFrame(() => resolve()))"
+
+# 텍스트가 포함된 섹션 블록의 페이지 내 위치 (섹션 단위 재생성 시 해당 영역만 다시 캡처)
+SECTION_BOX_SCRIPT = """(snippet) => {
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        if (walker.currentNode.textContent.replace(/\s+/g, ' ').includes(snippet)) {
+            const element = walker.currentNode.parentElement;
+            const block = element.closest('section, header, footer') || element;
+            const rect = block.getBoundingClientRect();
+            return {y: rect.top + window.scrollY, height: rect.height};
+        }
+    }
+    return null;
+}"""
+
+
+# 섹션 키 -> 카피라이팅 요청 섹션명
+SECTIONS = {
+    "hero": "히어로 섹션 (메인 타이틀, 서브 타이틀)",
+    "features": "특징/장점 섹션",
+    "benefits": "고객 혜택 섹션",
+    "details": "상세 정보 섹션",
+    "cta": "구매 유도 섹션",
+}
+
+# 템플릿에 넘기는 변수 (템플릿 등록 시 이 목록 밖의 변수를 쓰면 거부)
+TEMPLATE_VARIABLES = (
+    "product_name",
+    "category",
+    "target_customer",
+    "usp",
+    "price_info",
+    "mood",
+    "product_images",
+    "sections",
+)
 
+# 컴파일된 DB 템플릿 캐시 (템플릿 HTML 해시 기준)
+_compiled_templates: Dict[str, Template] = {}
 
-async def _get_copywriting(context: Dict[str, Any], section: str) -> str:
+
+async def _get_copywriting(
+    context: Dict[str, Any],
+    section: str,
+    product_prompt: Optional[str] = None,
+    variation: int = 0,
+    example: Optional[str] = None,
+) -> str:
     """AI 카피라이팅 생성 (API 키가 없으면 기본값 반환)"""
     try:
-        from app.services.claude import generate_copywriting, client
-        if client:
-            return await generate_copywriting(context, section)
-    except Exception:
-        pass
+        from app.services.claude import generate_copywriting, get_client
+        if get_client():
+            return await generate_copywriting(context, section, product_prompt, variation, example)
+    except Exception as e:
+        # 회로 차단 중에는 제공자를 호출하지 않고 바로 기본값 사용
+        inc("copy_fallback_total", reason=type(e).__name__)
 
     # API 키가 없거나 오류 시 기본값 반환
+    return fallback_copy(context, section)
+
+
+def fallback_copy(context: Dict[str, Any], section: str) -> str:
+    """카피라이팅을 생성하지 못했을 때 쓰는 기본 문구"""
     product_name = context.get("product_name", "제품")
     defaults = {
         "히어로 섹션 (메인 타이틀, 서브 타이틀)": f"{product_name}과 함께하는 특별한 경험",
@@ -33,71 +112,295 @@ async def _get_copywriting(context: Dict[str, Any], section: str) -> str:
     return defaults.get(section, "")
 
 
+def has_fallback_copy(context: Dict[str, Any], sections: Dict[str, str]) -> bool:
+    """기본 문구로 채워진 섹션이 있는지 (유사 카피 재사용 대상에서 제외)"""
+    return any(sections.get(key) == fallback_copy(context, title) for key, title in SECTIONS.items())
+
+
+async def generate_sections(
+    context: Dict[str, Any],
+    product_prompt: Optional[str] = None,
+    variation: int = 0,
+    session_id: Optional[int] = None,
+) -> Dict[str, str]:
+    """섹션별 카피라이팅 동시 생성 (API 키 없이도 기본값으로 작동)
+
+    거의 같은 상품(색상/사이즈 변형 등)의 이력이 있으면 그 카피를 초안으로 그대로 쓰고,
+    어느 정도 비슷하면 섹션별 참고 예시로 넘긴다. 변형 카피(variation > 0)는 새로 생성한다.
+    """
+    match = await find_similar_copy(context, SECTIONS.keys(), session_id) if not variation else None
+    if match and match.score >= COPY_REUSE_THRESHOLD:
+        inc("copy_reused_sections_total", len(SECTIONS))
+        return adapt_copy(match, context)
+
+    copies = await asyncio.gather(*(
+        _get_copywriting(context, section, product_prompt, variation, match.sections[key] if match else None)
+        for key, section in SECTIONS.items()
+    ))
+    return dict(zip(SECTIONS.keys(), copies))
+
+
+def template_key(html_template: str) -> str:
+    return hashlib.sha256(html_template.encode("utf-8")).hexdigest()
+
+
+def compile_template(html_template: str) -> Template:
+    """DB 템플릿 HTML 컴파일 (같은 HTML은 한 번만 컴파일, 샌드박스 환경 사용)"""
+    key = template_key(html_template)
+    template = _compiled_templates.get(key)
+    if template is None:
+        template = sandbox_env.from_string(html_template)
+        _compiled_templates[key] = template
+    return template
+
+
+def render_detail_page(
+    context: Dict[str, Any],
+    sections: Dict[str, str],
+    html_template: Optional[str] = None,
+) -> str:
+    """카피라이팅과 상품 정보로 템플릿 렌더링"""
+    if html_template:
+        template = compile_template(html_template)
+    else:
+        # 카테고리별 기본 템플릿 선택
+        category = context.get("category", "기타").lower()
+        template_path = os.path.join(TEMPLATES_DIR, f"{category}.html")
+        template_name = f"{category}.html" if os.path.exists(template_path) else "default.html"
+
+        try:
+            template = template_env.get_template(template_name)
+        except Exception:
+            template = template_env.get_template("default.html")
+
+    # HTML 렌더링
+    variables = {name: context.get(name, "") for name in TEMPLATE_VARIABLES}
+    variables["product_images"] = context.get("product_images", [])
+    variables["sections"] = sections
+    html_content = template.render(**variables)
+    return optimize_html(html_content) if HTML_OPTIMIZE_ENABLED else html_content
+
+
+async def regenerate_section(
+    context: Dict[str, Any],
+    sections: Dict[str, str],
+    section_key: str,
+    variation: int = 0,
+) -> Dict[str, str]:
+    """한 섹션의 카피만 새로 생성하고 나머지는 기존 카피 재사용"""
+    copy = await _get_copywriting(context, SECTIONS[section_key], variation=variation)
+    return {**sections, section_key: copy}
+
+
+def _section_snippet(copy: str) -> str:
+    """DOM에서 섹션을 찾을 때 쓸 카피 앞부분 (첫 줄 최대 40자)"""
+    lines = [line.strip() for line in copy.splitlines() if line.strip()]
+    return " ".join(lines[0].split())[:40] if lines else ""
+
+
+def _image_height(path: str) -> Optional[int]:
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            return image.height
+    except OSError:
+        return None
+
+
+def _paste_slice(base_path: str, slice_bytes: bytes, y: int, output_path: str):
+    """기존 이미지의 y 위치에 새로 캡처한 영역을 덮어써 저장"""
+    import io
+    from PIL import Image
+
+    with Image.open(base_path) as base, Image.open(io.BytesIO(slice_bytes)) as piece:
+        image = base.convert("RGB")
+        image.paste(piece.convert("RGB"), (0, y))
+        image.save(output_path, format="PNG")
+
+
 async def generate_detail_page(
     context: Dict[str, Any],
     template_id: Optional[int] = None,
+    html_template: Optional[str] = None,
 ) -> str:
-    """상세페이지 HTML 생성"""
-
-    # 카피라이팅 생성 (API 키 없이도 기본값으로 작동)
-    sections = {
-        "hero": await _get_copywriting(context, "히어로 섹션 (메인 타이틀, 서브 타이틀)"),
-        "features": await _get_copywriting(context, "특징/장점 섹션"),
-        "benefits": await _get_copywriting(context, "고객 혜택 섹션"),
-        "details": await _get_copywriting(context, "상세 정보 섹션"),
-        "cta": await _get_copywriting(context, "구매 유도 섹션"),
-    }
+    """상세페이지 HTML 생성 (html_template이 없으면 카테고리별 기본 템플릿 사용)"""
+    sections = await generate_sections(context)
+    return render_detail_page(context, sections, html_template)
 
-    # 템플릿 선택
-    category = context.get("category", "기타").lower()
-    template_path = os.path.join(TEMPLATES_DIR, f"{category}.html")
-    template_name = f"{category}.html" if os.path.exists(template_path) else "default.html"
 
-    try:
-        template = template_env.get_template(template_name)
-    except Exception:
-        template = template_env.get_template("default.html")
+@asynccontextmanager
+async def shared_browser_context():
+    """여러 페이지를 렌더링할 때 공유할 브라우저 컨텍스트 (렌더 워커 사용 시 None)"""
+    if render_pool_enabled():
+        yield None
+        return
+
+    from playwright.async_api import async_playwright
 
-    # HTML 렌더링
-    html_content = template.render(
-        product_name=context.get("product_name", ""),
-        category=context.get("category", ""),
-        target_customer=context.get("target_customer", ""),
-        usp=context.get("usp", ""),
-        price_info=context.get("price_info", ""),
-        mood=context.get("mood", ""),
-        product_images=context.get("product_images", []),
-        sections=sections,
-    )
-
-    return html_content
-
-
-async def html_to_image(html_content: str, session_id: int) -> str:
-    """HTML을 이미지로 변환"""
     async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
+        with span("browser_launch"):
+            browser = await p.chromium.launch()
+        try:
+            yield await browser.new_context()
+        finally:
+            await browser.close()
+
+
+async def _render_image(
+    browser,
+    html_content: str,
+    session_id: int,
+    patch: Optional[Tuple[str, str]] = None,
+) -> str:
+    """브라우저에서 새 페이지를 열어 HTML을 이미지로 변환
 
+    patch=(기존 이미지 경로, 바뀐 카피)를 넘기면 페이지 높이가 같을 때 바뀐 섹션 영역만 캡처해
+    기존 이미지에 덮어쓴다 (높이가 달라졌거나 섹션을 찾지 못하면 전체 캡처).
+    """
+    page = await browser.new_page()
+    try:
         # 뷰포트 설정 (스마트스토어 권장 너비)
         await page.set_viewport_size({"width": 860, "height": 10000})
 
-        # HTML 로드
-        await page.set_content(html_content, wait_until="networkidle")
+        # HTML 로드 (로컬 에셋 라우팅 + 폰트/이미지 로딩 대기)
+        with span("browser_render"):
+            await load_html(page, html_content)
 
         # 실제 콘텐츠 높이 계산
         height = await page.evaluate("document.body.scrollHeight")
         await page.set_viewport_size({"width": 860, "height": height})
 
         # 스크린샷
-        images_dir = "data/generated_images"
-        os.makedirs(images_dir, exist_ok=True)
+        os.makedirs(GENERATED_IMAGES_DIR, exist_ok=True)
 
         filename = f"detail_page_{session_id}_{uuid.uuid4()}.png"
-        filepath = os.path.join(images_dir, filename)
+        filepath = os.path.join(GENERATED_IMAGES_DIR, filename)
 
-        await page.screenshot(path=filepath, full_page=True)
+        if patch:
+            base_path, changed_copy = patch
+            snippet = _section_snippet(changed_copy)
+            if snippet and await asyncio.to_thread(_image_height, base_path) == height:
+                box = await page.evaluate(SECTION_BOX_SCRIPT, snippet)
+                if box and box["height"] > 0:
+                    y = int(box["y"])
+                    clip = {"x": 0, "y": y, "width": 860, "height": min(height - y, int(box["height"]) + 1)}
+                    with span("slice_screenshot"):
+                        slice_bytes = await page.screenshot(clip=clip)
+                    await asyncio.to_thread(_paste_slice, base_path, slice_bytes, y, filepath)
+                    return filepath
 
-        await browser.close()
+        with span("screenshot"):
+            await page.screenshot(path=filepath, full_page=True)
 
         return filepath
+    finally:
+        await page.close()
+
+
+def _save_capture(data: bytes, path: str, quality: Optional[int] = None):
+    """캡처 PNG 저장 (quality가 있으면 JPEG로 변환)"""
+    if quality is None:
+        with open(path, "wb") as f:
+            f.write(data)
+        return
+
+    import io
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.convert("RGB").save(path, format="JPEG", quality=quality, optimize=True)
+
+
+async def _render_viewports(browser, html_content: str, session_id: int, viewports, include_preview: bool) -> Dict[str, str]:
+    """HTML을 한 번만 로드하고 뷰포트 너비만 바꿔가며 캡처 (인코딩/저장은 동시 처리)"""
+    widths = [(name, VIEWPORT_WIDTHS[name]) for name in viewports]
+    if include_preview and "desktop" not in viewports:
+        widths.append(("desktop", VIEWPORT_WIDTHS["desktop"]))
+
+    page = await browser.new_page()
+    try:
+        await page.set_viewport_size({"width": widths[0][1], "height": 10000})
+        with span("browser_render"):
+            await load_html(page, html_content)
+
+        captures: Dict[str, bytes] = {}
+        for name, width in widths:
+            # 너비 변경 후 레이아웃이 다시 계산될 때까지 한 프레임 대기
+            await page.set_viewport_size({"width": width, "height": 10000})
+            await page.evaluate(NEXT_FRAME_SCRIPT)
+            height = await page.evaluate("document.body.scrollHeight")
+            await page.set_viewport_size({"width": width, "height": height})
+
+            with span("screenshot", viewport=name):
+                if name in viewports:
+                    captures[name] = await page.screenshot(full_page=True)
+                if include_preview and name == "desktop":
+                    captures["preview"] = await page.screenshot(
+                        clip={"x": 0, "y": 0, "width": width, "height": min(height, PREVIEW_HEIGHT)}
+                    )
+    finally:
+        await page.close()
+
+    os.makedirs(GENERATED_IMAGES_DIR, exist_ok=True)
+    base = f"detail_page_{session_id}_{uuid.uuid4()}"
+    paths = {
+        name: os.path.join(GENERATED_IMAGES_DIR, f"{base}_{name}.{'jpg' if name == 'preview' else 'png'}")
+        for name in captures
+    }
+    with span("image_encode"):
+        await asyncio.gather(*(
+            asyncio.to_thread(_save_capture, data, paths[name], PREVIEW_QUALITY if name == "preview" else None)
+            for name, data in captures.items()
+        ))
+    return paths
+
+
+async def html_to_images(
+    html_content: str,
+    session_id: int,
+    viewports=("desktop",),
+    include_preview: bool = False,
+    browser=None,
+) -> Dict[str, str]:
+    """여러 뷰포트 이미지 + 미리보기 생성 (뷰포트 이름 -> 경로)"""
+    # 미리보기만 요청하면 전체 이미지는 캡처하지 않음
+    viewports = list(dict.fromkeys(viewports)) or ([] if include_preview else ["desktop"])
+    if browser is not None:
+        return await _render_viewports(browser, html_content, session_id, viewports, include_preview)
+    if render_pool_enabled():
+        return await submit_render(
+            "images",
+            html_content=html_content,
+            session_id=session_id,
+            viewports=viewports,
+            include_preview=include_preview,
+        )
+
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        with span("browser_launch"):
+            browser = await p.chromium.launch()
+        try:
+            return await _render_viewports(browser, html_content, session_id, viewports, include_preview)
+        finally:
+            await browser.close()
+
+
+async def html_to_image(html_content: str, session_id: int, browser=None, patch=None) -> str:
+    """HTML을 이미지로 변환 (browser/컨텍스트를 넘기면 재사용)"""
+    if browser is not None:
+        return await _render_image(browser, html_content, session_id, patch)
+    if render_pool_enabled():
+        return await submit_render("image", html_content=html_content, session_id=session_id, patch=patch)
+
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        with span("browser_launch"):
+            browser = await p.chromium.launch()
+        try:
+            return await _render_image(browser, html_content, session_id, patch)
+        finally:
+            await browser.close()
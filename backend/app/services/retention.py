@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select, update
+
+from app.models.database import async_session, GenerationHistory, ReferenceAnalysis, Session
+from app.services.analyzer import SCREENSHOTS_DIR
+from app.services.assets import ASSET_CACHE_DIR
+from app.services.export import EXPORT_BUNDLES_DIR
+from app.services.metrics import inc
+from app.services.renderer import GENERATED_IMAGES_DIR
+from app.services.template_validation import TEMPLATE_THUMBNAILS_DIR
+
+logger = logging.getLogger(__name__)
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "0") == "1"
+RETENTION_CHECK_INTERVAL = int(os.getenv("RETENTION_CHECK_INTERVAL", "3600"))
+# 한 번에 삭제할 파일/행 수 (배치 사이에 이벤트 루프 양보)
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "200"))
+# DB 행 저장 전 파일이 먼저 쓰이므로, 이 시간이 지난 미참조 파일만 고아로 간주
+RETENTION_ORPHAN_GRACE = timedelta(minutes=int(os.getenv("RETENTION_ORPHAN_GRACE_MINUTES", "60")))
+# 미완료 상태로 이 시간 동안 갱신되지 않은 문답 세션 삭제 (0이면 사용 안 함)
+ABANDONED_SESSION_HOURS = int(os.getenv("ABANDONED_SESSION_HOURS", "72"))
+
+
+@dataclass
+class RetentionPolicy:
+    """디렉토리별 보존 정책 (0이면 해당 제한 없음)"""
+    name: str
+    directory: str
+    max_age_days: int
+    max_bytes: int
+
+
+POLICIES = [
+    RetentionPolicy(
+        name="screenshots",
+        directory=SCREENSHOTS_DIR,
+        max_age_days=int(os.getenv("SCREENSHOTS_MAX_AGE_DAYS", "30")),
+        max_bytes=int(os.getenv("SCREENSHOTS_MAX_BYTES", "0")),
+    ),
+    RetentionPolicy(
+        name="generated_images",
+        directory=GENERATED_IMAGES_DIR,
+        max_age_days=int(os.getenv("GENERATED_IMAGES_MAX_AGE_DAYS", "90")),
+        max_bytes=int(os.getenv("GENERATED_IMAGES_MAX_BYTES", str(5 * 1024 ** 3))),
+    ),
+    # 내보내기 ZIP 캐시 (DB 참조 없음, 조회 시 수정 시각 갱신 -> 오래 안 쓴 것부터 삭제)
+    RetentionPolicy(
+        name="export_bundles",
+        directory=EXPORT_BUNDLES_DIR,
+        max_age_days=int(os.getenv("EXPORT_BUNDLES_MAX_AGE_DAYS", "7")),
+        max_bytes=int(os.getenv("EXPORT_BUNDLES_MAX_BYTES", str(1024 ** 3))),
+    ),
+    # 원격 에셋 다운로드 캐시 (DB 참조 없음, 조회 시 수정 시각 갱신)
+    RetentionPolicy(
+        name="asset_cache",
+        directory=ASSET_CACHE_DIR,
+        max_age_days=int(os.getenv("ASSET_CACHE_MAX_AGE_DAYS", "30")),
+        max_bytes=int(os.getenv("ASSET_CACHE_MAX_BYTES", str(1024 ** 3))),
+    ),
+    # 템플릿 썸네일 캐시 (삭제된 템플릿 것은 조회되지 않아 기간이 지나면 정리)
+    RetentionPolicy(
+        name="template_thumbnails",
+        directory=TEMPLATE_THUMBNAILS_DIR,
+        max_age_days=int(os.getenv("TEMPLATE_THUMBNAILS_MAX_AGE_DAYS", "30")),
+        max_bytes=int(os.getenv("TEMPLATE_THUMBNAILS_MAX_BYTES", "0")),
+    ),
+]
+
+# 정책 이름 -> 파일 경로를 참조하는 컬럼 (없으면 고아 파일 판정 안 함)
+REFERENCE_COLUMNS = {
+    "screenshots": ReferenceAnalysis.screenshot_path,
+    "generated_images": GenerationHistory.image_path,
+}
+# 정책 이름 -> {이름: 경로} JSON 컬럼 (뷰포트별 이미지, 파일이 지워지면 다운로드 시 404)
+VARIANT_COLUMNS = {
+    "generated_images": GenerationHistory.image_variants,
+}
+
+
+def _scan(directory: str) -> List[Tuple[str, int, float]]:
+    """디렉토리의 (경로, 크기, 수정 시각) 목록"""
+    if not os.path.isdir(directory):
+        return []
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file():
+                stat = entry.stat()
+                files.append((os.path.join(directory, entry.name), stat.st_size, stat.st_mtime))
+    return files
+
+
+def _remove(paths: List[str]) -> int:
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+async def _referenced_paths(column) -> Dict[str, str]:
+    """DB가 참조하는 파일 경로 (정규화 경로 -> 저장된 값)"""
+    async with async_session() as db:
+        result = await db.execute(select(column).where(column.isnot(None)))
+        return {os.path.abspath(path): path for path in result.scalars()}
+
+
+async def _variant_paths(column) -> Set[str]:
+    """JSON 컬럼이 참조하는 파일 경로 (정규화 경로)"""
+    async with async_session() as db:
+        result = await db.execute(select(column).where(column.isnot(None)))
+        return {os.path.abspath(path) for variants in result.scalars() for path in variants.values() if path}
+
+
+def _select_victims(policy: RetentionPolicy, files, referenced: Optional[Set[str]]) -> List[Tuple[str, int]]:
+    """삭제 대상 선정: 고아 파일, 보존 기간 초과, 용량 초과분(오래된 순)"""
+    now = time.time()
+    orphan_before = now - RETENTION_ORPHAN_GRACE.total_seconds()
+    expire_before = now - policy.max_age_days * 86400 if policy.max_age_days else None
+
+    victims = []
+    kept = []
+    for path, size, mtime in files:
+        is_orphan = referenced is not None and os.path.abspath(path) not in referenced and mtime < orphan_before
+        is_expired = expire_before is not None and mtime < expire_before
+        if is_orphan or is_expired:
+            victims.append((path, size))
+        else:
+            kept.append((path, size, mtime))
+
+    if policy.max_bytes:
+        total = sum(size for _, size, _ in kept)
+        for path, size, _ in sorted(kept, key=lambda item: item[2]):
+            if total <= policy.max_bytes:
+                break
+            victims.append((path, size))
+            total -= size
+
+    return victims
+
+
+async def apply_policy(policy: RetentionPolicy) -> Dict[str, int]:
+    """정책 1개 적용 - 파일을 배치 단위로 삭제하고 참조 컬럼은 NULL 처리"""
+    column = REFERENCE_COLUMNS.get(policy.name)
+    files = await asyncio.to_thread(_scan, policy.directory)
+    referenced = await _referenced_paths(column) if column is not None else {}
+    referenced_all = set(referenced) if column is not None else None
+    if policy.name in VARIANT_COLUMNS:
+        referenced_all |= await _variant_paths(VARIANT_COLUMNS[policy.name])
+    victims = _select_victims(policy, files, referenced_all)
+
+    deleted = 0
+    reclaimed = 0
+    for start in range(0, len(victims), RETENTION_BATCH_SIZE):
+        batch = victims[start:start + RETENTION_BATCH_SIZE]
+        paths = [path for path, _ in batch]
+
+        # 파일이 사라진 행은 이미지 없음으로 표시 (다운로드 시 404)
+        stored = [referenced[key] for key in map(os.path.abspath, paths) if key in referenced]
+        if stored:
+            async with async_session() as db:
+                await db.execute(
+                    update(column.class_).where(column.in_(stored)).values({column.key: None})
+                )
+                await db.commit()
+
+        deleted += await asyncio.to_thread(_remove, paths)
+        reclaimed += sum(size for _, size in batch)
+        await asyncio.sleep(0)
+
+    inc("retention_deleted_files_total", deleted, target=policy.name)
+    inc("retention_reclaimed_bytes_total", reclaimed, target=policy.name)
+    return {"deleted": deleted, "reclaimed_bytes": reclaimed, "scanned": len(files)}
+
+
+async def purge_abandoned_sessions() -> int:
+    """오래 방치된 미완료 문답 세션 삭제"""
+    if not ABANDONED_SESSION_HOURS:
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(hours=ABANDONED_SESSION_HOURS)
+    purged = 0
+    while True:
+        async with async_session() as db:
+            result = await db.execute(
+                select(Session.id)
+                .where(Session.status != "completed", Session.updated_at < cutoff)
+                .limit(RETENTION_BATCH_SIZE)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                break
+            await db.execute(delete(Session).where(Session.id.in_(ids)))
+            await db.commit()
+        purged += len(ids)
+        await asyncio.sleep(0)
+
+    inc("retention_deleted_sessions_total", purged)
+    return purged
+
+
+async def run_retention() -> Dict[str, Dict[str, int]]:
+    """보존 정책 전체 실행 후 정리 결과 반환"""
+    report = {}
+    for policy in POLICIES:
+        report[policy.name] = await apply_policy(policy)
+    report["sessions"] = {"deleted": await purge_abandoned_sessions()}
+
+    logger.info(
+        "보존 정책 실행: %s",
+        ", ".join(
+            f"{name} {stats['deleted']}개"
+            + (f" ({stats['reclaimed_bytes'] / 1024 / 1024:.1f}MB)" if "reclaimed_bytes" in stats else "")
+            for name, stats in report.items()
+        ),
+    )
+    return report
+
+
+async def retention_loop():
+    """주기적으로 보존 정책 실행 (앱 수명 동안 실행)"""
+    while True:
+        try:
+            await run_retention()
+        except Exception as e:
+            logger.warning("보존 정책 실행 실패: %s", e)
+        await asyncio.sleep(RETENTION_CHECK_INTERVAL)
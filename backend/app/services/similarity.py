@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import math
+import os
+import re
+import zlib
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.models.database import async_session, GenerationHistory, Session
+from app.services.metrics import inc, span
+
+logger = logging.getLogger(__name__)
+
+# 비슷한 상품(색상/사이즈 변형 등)의 기존 카피 재사용
+COPY_REUSE_ENABLED = os.getenv("COPY_REUSE_ENABLED", "1") == "1"
+# 이 이상이면 기존 카피를 그대로 초안으로 사용 (LLM 호출 없음)
+COPY_REUSE_THRESHOLD = float(os.getenv("COPY_REUSE_THRESHOLD", "0.9"))
+# 이 이상이면 기존 카피를 카피라이팅 요청의 참고 예시로 전달
+COPY_EXAMPLE_THRESHOLD = float(os.getenv("COPY_EXAMPLE_THRESHOLD", "0.6"))
+# 인덱스에 올릴 최근 이력 수 (메모리: 행 수 x 차원 x 4바이트 x 2)
+SIMILARITY_INDEX_MAX_ROWS = int(os.getenv("SIMILARITY_INDEX_MAX_ROWS", "5000"))
+# 문자 n-gram 해싱 차원
+SIMILARITY_DIM = int(os.getenv("SIMILARITY_DIM", "1024"))
+NGRAM_SIZES = (2, 3)
+
+# 유사도 계산에 쓰는 상품 정보 필드
+CONTEXT_FIELDS = ("category", "target_customer", "usp", "price_info", "mood", "product_name")
+
+_SPACES = re.compile(r"\s+")
+
+
+@dataclass
+class SimilarCopy:
+    """비슷한 상품의 기존 카피"""
+    history_id: int
+    score: float
+    product_name: str
+    sections: Dict[str, str]
+
+
+def _document(context: Dict[str, Any]) -> str:
+    values = [str(context.get(field) or "") for field in CONTEXT_FIELDS]
+    return _SPACES.sub(" ", " | ".join(values).lower()).strip()
+
+
+def _term_counts(text: str):
+    """문자 n-gram을 해시 버킷에 센 벡터"""
+    import numpy as np
+
+    vector = np.zeros(SIMILARITY_DIM, dtype=np.float32)
+    for size in NGRAM_SIZES:
+        for start in range(len(text) - size + 1):
+            vector[zlib.crc32(text[start:start + size].encode("utf-8")) % SIMILARITY_DIM] += 1
+    # 긴 문서에 치우치지 않도록 로그 스케일
+    return np.log1p(vector)
+
+
+class SimilarityIndex:
+    """생성 이력의 상품 정보 TF-IDF 인덱스 (문자 n-gram 해싱, NumPy 행렬)
+
+    행렬은 tf만 저장하고 idf는 문서 빈도로 질의 시점에 계산해, 이력이 추가되어도 전체를 다시 계산하지 않는다.
+    """
+
+    def __init__(self):
+        self.history_ids: List[int] = []
+        self.session_ids: List[int] = []
+        self.product_names: List[str] = []
+        self.sections: List[Dict[str, str]] = []
+        self.tf = None
+        self.tf_squared = None
+        self.document_frequency = None
+        self.last_id = 0
+        self._lock = asyncio.Lock()
+
+    def _append(self, rows):
+        import numpy as np
+        from app.services.renderer import has_fallback_copy
+
+        # 제공자 장애 등으로 기본 문구가 저장된 이력은 초안/예시로 쓰지 않음
+        rows = [row for row in rows if isinstance(row.sections, dict) and not has_fallback_copy(row.context, row.sections)]
+        if not rows:
+            return
+        vectors = np.stack([_term_counts(_document(row.context)) for row in rows])
+        if self.tf is None:
+            self.tf = vectors
+            self.document_frequency = np.zeros(SIMILARITY_DIM, dtype=np.float32)
+        else:
+            self.tf = np.vstack([self.tf, vectors])
+        self.document_frequency += (vectors > 0).sum(axis=0)
+
+        for row in rows:
+            self.history_ids.append(row.id)
+            self.session_ids.append(row.session_id)
+            self.product_names.append(row.product_name or "")
+            self.sections.append(row.sections)
+
+        # 오래된 이력부터 제외 (문서 빈도도 함께 차감)
+        overflow = len(self.history_ids) - SIMILARITY_INDEX_MAX_ROWS
+        if overflow > 0:
+            self.document_frequency -= (self.tf[:overflow] > 0).sum(axis=0)
+            self.tf = self.tf[overflow:]
+            del self.history_ids[:overflow], self.session_ids[:overflow]
+            del self.product_names[:overflow], self.sections[:overflow]
+        self.tf_squared = self.tf ** 2
+
+    def _remove(self, position: int):
+        import numpy as np
+
+        self.document_frequency -= self.tf[position] > 0
+        self.tf = np.delete(self.tf, position, axis=0)
+        self.tf_squared = np.delete(self.tf_squared, position, axis=0)
+        del self.history_ids[position], self.session_ids[position]
+        del self.product_names[position], self.sections[position]
+
+    async def update_sections(self, row):
+        """섹션 재생성으로 카피가 바뀐 이력 반영 (아직 읽지 않은 이력은 다음 refresh에서 반영)"""
+        from app.services.renderer import has_fallback_copy
+
+        async with self._lock:
+            if row.id > self.last_id:
+                return
+            if row.id in self.history_ids:
+                position = self.history_ids.index(row.id)
+                if has_fallback_copy(row.context, row.sections):
+                    await asyncio.to_thread(self._remove, position)
+                else:
+                    self.sections[position] = row.sections
+            else:
+                # 기본 문구라 제외됐던 이력이 새 카피를 받은 경우
+                await asyncio.to_thread(self._append, [row])
+
+    async def refresh(self):
+        """마지막으로 읽은 이후 저장된 이력만 추가"""
+        async with self._lock:
+            async with async_session() as db:
+                stmt = (
+                    select(
+                        GenerationHistory.id,
+                        GenerationHistory.session_id,
+                        GenerationHistory.product_name,
+                        GenerationHistory.sections,
+                        Session.context,
+                    )
+                    .join(Session, Session.id == GenerationHistory.session_id)
+                    .where(GenerationHistory.id > self.last_id, GenerationHistory.sections.isnot(None))
+                    .order_by(GenerationHistory.id.desc())
+                    .limit(SIMILARITY_INDEX_MAX_ROWS)
+                )
+                rows = list(reversed((await db.execute(stmt)).all()))
+            if not rows:
+                return
+
+            last_id = rows[-1].id
+            await asyncio.to_thread(self._append, [row for row in rows if row.context])
+            self.last_id = max(self.last_id, last_id)
+
+    def _search(self, context: Dict[str, Any], exclude_session_id: Optional[int]) -> Optional[SimilarCopy]:
+        import numpy as np
+
+        if self.tf is None or not len(self.history_ids):
+            return None
+
+        count = len(self.history_ids)
+        idf = np.log((1 + count) / (1 + self.document_frequency)) + 1
+        weights = (idf ** 2).astype(np.float32)
+
+        query = _term_counts(_document(context))
+        query_norm = math.sqrt(float((query ** 2) @ weights))
+        if not query_norm:
+            return None
+
+        row_norms = np.sqrt(self.tf_squared @ weights)
+        scores = (self.tf @ (query * weights)) / np.maximum(row_norms * query_norm, 1e-9)
+        if exclude_session_id is not None:
+            scores[np.asarray(self.session_ids) == exclude_session_id] = -1
+        best = int(np.argmax(scores))
+        return SimilarCopy(
+            history_id=self.history_ids[best],
+            score=float(scores[best]),
+            product_name=self.product_names[best],
+            sections=self.sections[best],
+        )
+
+    async def search(self, context: Dict[str, Any], exclude_session_id: Optional[int] = None) -> Optional[SimilarCopy]:
+        """가장 비슷한 상품의 기존 카피"""
+        await self.refresh()
+        with span("similarity_search"):
+            return await asyncio.to_thread(self._search, context, exclude_session_id)
+
+
+_index = SimilarityIndex()
+
+
+def adapt_copy(match: SimilarCopy, context: Dict[str, Any]) -> Dict[str, str]:
+    """기존 카피의 상품명을 새 상품명으로 바꿔 초안으로 사용"""
+    old_name = match.product_name.strip()
+    new_name = (context.get("product_name") or "").strip()
+    if not old_name or not new_name or old_name == new_name:
+        return dict(match.sections)
+    return {key: copy.replace(old_name, new_name) for key, copy in match.sections.items()}
+
+
+async def update_indexed_copy(
+    history_id: int,
+    session_id: int,
+    product_name: str,
+    context: Dict[str, Any],
+    sections: Dict[str, str],
+):
+    """이력의 섹션 카피가 바뀌었을 때 인덱스 갱신"""
+    if not COPY_REUSE_ENABLED:
+        return
+    row = SimpleNamespace(
+        id=history_id,
+        session_id=session_id,
+        product_name=product_name,
+        sections=sections,
+        context=context,
+    )
+    try:
+        await _index.update_sections(row)
+    except Exception as e:
+        logger.warning("유사 카피 인덱스 갱신 실패: %s", e)
+
+
+async def find_similar_copy(
+    context: Dict[str, Any],
+    section_keys,
+    exclude_session_id: Optional[int] = None,
+) -> Optional[SimilarCopy]:
+    """COPY_EXAMPLE_THRESHOLD 이상으로 비슷한 이력의 카피 (섹션 구성이 같은 것만)
+
+    같은 세션에서 다시 생성하는 경우는 새 카피를 원하는 것이므로 그 세션의 이력은 제외한다.
+    """
+    if not COPY_REUSE_ENABLED:
+        return None
+    try:
+        match = await _index.search(context, exclude_session_id)
+    except Exception as e:
+        # 카피 재사용은 최적화일 뿐이므로 실패해도 새로 생성
+        logger.warning("유사 카피 검색 실패: %s", e)
+        return None
+
+    if match is None or match.score < COPY_EXAMPLE_THRESHOLD:
+        inc("copy_similarity_total", result="miss")
+        return None
+    if not isinstance(match.sections, dict) or set(match.sections) != set(section_keys):
+        inc("copy_similarity_total", result="miss")
+        return None
+
+    inc("copy_similarity_total", result="draft" if match.score >= COPY_REUSE_THRESHOLD else "example")
+    return match
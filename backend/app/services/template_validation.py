@@ -0,0 +1,160 @@
+import asyncio
+import base64
+import logging
+import os
+import shutil
+from typing import List, Optional
+
+from jinja2 import TemplateSyntaxError, meta, nodes
+
+from app.services.metrics import inc, span
+from app.services.renderer import (
+    SECTIONS,
+    TEMPLATE_VARIABLES,
+    compile_template,
+    html_to_images,
+    render_detail_page,
+    sandbox_env,
+    template_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# 템플릿 썸네일 캐시 (템플릿 HTML 해시 파일명, 보존 정책으로 정리)
+TEMPLATE_THUMBNAILS_DIR = "data/template_thumbnails"
+# 등록 응답 후 백그라운드에서 썸네일 미리 렌더링 (Chromium 필요, 끄면 첫 조회 시 렌더링)
+TEMPLATE_THUMBNAIL_ON_CREATE = os.getenv("TEMPLATE_THUMBNAIL_ON_CREATE", "0") == "1"
+
+
+def _sample_image(color: str) -> str:
+    """외부 요청 없이 렌더링되는 단색 샘플 이미지 (data URI)"""
+    svg = f'<svg xmlns="http://www.w3.org/2000/svg" width="860" height="860"><rect width="100%" height="100%" fill="{color}"/></svg>'
+    return f"data:image/svg+xml;base64,{base64.b64encode(svg.encode('utf-8')).decode('ascii')}"
+
+
+# 시험 렌더링용 샘플 상품 정보
+SAMPLE_CONTEXT = {
+    "product_name": "샘플 상품",
+    "category": "기타",
+    "target_customer": "20~30대 직장인",
+    "usp": "가볍고 튼튼한 소재",
+    "price_info": "29,900원",
+    "mood": "modern",
+    "product_images": [_sample_image("#d9d9d9"), _sample_image("#bfbfbf")],
+}
+SAMPLE_SECTIONS = {key: f"{title} 샘플 문구입니다" for key, title in SECTIONS.items()}
+
+
+class TemplateValidationError(Exception):
+    """등록할 수 없는 템플릿 (API에서는 400으로 응답)"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _unknown_sections(ast: nodes.Template) -> List[str]:
+    """sections.xxx / sections['xxx'] 중 생성하지 않는 섹션 키"""
+    keys = set()
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+        if not (isinstance(node.node, nodes.Name) and node.node.name == "sections"):
+            continue
+        if isinstance(node, nodes.Getattr):
+            keys.add(node.attr)
+        elif isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, str):
+            keys.add(node.arg.value)
+    # dict 메서드 호출(sections.items() 등)은 허용
+    return sorted(key for key in keys - set(SECTIONS) if not hasattr(dict, key))
+
+
+def _private_access(ast: nodes.Template) -> List[str]:
+    """밑줄로 시작하는 속성/키 접근 (__globals__ 등 내부 객체 탐색 차단, |attr() 필터 포함)"""
+    names = set()
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem, nodes.Filter)):
+        if isinstance(node, nodes.Getattr):
+            name = node.attr
+        elif isinstance(node, nodes.Getitem):
+            name = getattr(node.arg, "value", None)
+        else:
+            name = getattr(node.args[0], "value", None) if node.name == "attr" and node.args else None
+        if isinstance(name, str) and name.startswith("_"):
+            names.add(name)
+    return sorted(names)
+
+
+def check_template(html_template: str) -> List[str]:
+    """문법, 변수 계약 검사 후 샘플 데이터로 시험 렌더링 (문제 목록 반환, 통과 시 컴파일 캐시에 남음)"""
+    try:
+        ast = sandbox_env.parse(html_template)
+    except TemplateSyntaxError as e:
+        return [f"{e.lineno}번째 줄 문법 오류: {e.message}"]
+
+    errors = []
+    # cycler/joiner/namespace 같은 전역 객체도 허용하지 않음 (계약에 있는 변수만)
+    unknown = sorted(meta.find_undeclared_variables(ast) - set(TEMPLATE_VARIABLES) - {"range", "dict"})
+    if unknown:
+        errors.append(f"지원하지 않는 변수: {', '.join(unknown)} (사용 가능: {', '.join(TEMPLATE_VARIABLES)})")
+    private = _private_access(ast)
+    if private:
+        errors.append(f"내부 속성에 접근할 수 없습니다: {', '.join(private)}")
+    sections = _unknown_sections(ast)
+    if sections:
+        errors.append(f"알 수 없는 섹션: {', '.join(sections)} (사용 가능: {', '.join(SECTIONS)})")
+    # {% if %} 등으로 감싼 경우도 막도록 트리 전체 검사
+    if any(ast.find_all((nodes.Extends, nodes.Include, nodes.Import, nodes.FromImport))):
+        errors.append("다른 템플릿 파일을 참조할 수 없습니다 (extends/include/import)")
+    if errors:
+        return errors
+
+    # 시험 렌더링도 compile_template의 샌드박스 환경에서 실행
+    try:
+        compile_template(html_template)
+        render_detail_page(SAMPLE_CONTEXT, SAMPLE_SECTIONS, html_template)
+        # 상품 이미지가 없는 경우도 생성 경로에서 흔하므로 함께 확인
+        render_detail_page({**SAMPLE_CONTEXT, "product_images": []}, SAMPLE_SECTIONS, html_template)
+    except Exception as e:
+        return [f"샘플 데이터 렌더링 실패: {type(e).__name__}: {e}"]
+    return []
+
+
+def validate_template(html_template: str):
+    """등록 전 검증 (실패 시 TemplateValidationError)"""
+    with span("template_validate"):
+        errors = check_template(html_template)
+    inc("template_validations_total", result="rejected" if errors else "ok")
+    if errors:
+        raise TemplateValidationError(errors)
+
+
+def thumbnail_path(html_template: str) -> str:
+    return os.path.join(TEMPLATE_THUMBNAILS_DIR, f"{template_key(html_template)}.jpg")
+
+
+def cached_thumbnail(html_template: str) -> Optional[str]:
+    """캐시된 썸네일 경로 (사용 시각을 갱신해 보존 정책에서 최근 사용분 유지)"""
+    path = thumbnail_path(html_template)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        inc("template_thumbnails_total", cache="miss")
+        return None
+    inc("template_thumbnails_total", cache="hit")
+    return path
+
+
+async def render_thumbnail(html_template: str) -> Optional[str]:
+    """샘플 데이터로 첫 화면 썸네일 렌더링 후 캐시에 저장 (실패 시 None)"""
+    path = thumbnail_path(html_template)
+    if os.path.exists(path):
+        return path
+
+    try:
+        html_content = render_detail_page(SAMPLE_CONTEXT, SAMPLE_SECTIONS, html_template)
+        images = await html_to_images(html_content, 0, viewports=(), include_preview=True)
+    except Exception as e:
+        logger.warning("템플릿 썸네일 렌더링 실패: %s", e)
+        return None
+
+    os.makedirs(TEMPLATE_THUMBNAILS_DIR, exist_ok=True)
+    await asyncio.to_thread(shutil.move, images["preview"], path)
+    return path
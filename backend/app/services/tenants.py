@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional
+
+from fastapi import Request
+
+from app.services.metrics import TOKEN_TYPES, inc, observe, set_gauge
+
+logger = logging.getLogger(__name__)
+
+# 테넌트 식별 헤더
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-API-Key")
+# "API 키=테넌트" 목록 (비어 있으면 키 없이 모든 요청을 default 테넌트로 처리)
+TENANT_API_KEYS = os.getenv("TENANT_API_KEYS", "")
+DEFAULT_TENANT = "default"
+
+# 테넌트별 기본 한도 (0이면 제한 없음)
+TENANT_MAX_CONCURRENT = int(os.getenv("TENANT_MAX_CONCURRENT", "0"))
+TENANT_DAILY_TOKENS = int(os.getenv("TENANT_DAILY_TOKENS", "0"))
+TENANT_DAILY_IMAGES = int(os.getenv("TENANT_DAILY_IMAGES", "0"))
+# 테넌트별 개별 지정 (TENANT_LIMITS="team-a:max_concurrent=8,team-a:daily_tokens=2000000,team-b:daily_images=50")
+TENANT_LIMITS = os.getenv("TENANT_LIMITS", "")
+
+# 전체 테넌트 합산 동시 실행 수 (0이면 제한 없음, 초과분은 테넌트 간 라운드 로빈으로 배정)
+SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "0"))
+SCHEDULER_WAIT_TIMEOUT = float(os.getenv("SCHEDULER_WAIT_TIMEOUT", "30"))
+
+# 작업 종류 -> 입장 전에 확인할 일일 예산
+SCOPE_BUDGETS = {
+    "generation": ("tokens",),
+    "analysis": ("tokens",),
+    "background_image": ("images",),
+}
+# 프롬프트 캐시 읽기는 비용이 작아 토큰 예산에서 제외
+BILLED_TOKEN_TYPES = tuple(token_type for token_type, label in TOKEN_TYPES if label != "cache_read")
+
+
+class UnknownApiKeyError(Exception):
+    """등록되지 않은 API 키 (API에서는 401로 응답)"""
+
+
+class QuotaExceededError(Exception):
+    """테넌트의 일일 예산 소진 (API에서는 429로 응답)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SchedulerBusyError(Exception):
+    """실행 슬롯을 제한 시간 안에 받지 못함 (API에서는 503으로 응답)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class TenantLimits:
+    """테넌트 한도 (0이면 제한 없음)"""
+    max_concurrent: int = TENANT_MAX_CONCURRENT
+    daily_tokens: int = TENANT_DAILY_TOKENS
+    daily_images: int = TENANT_DAILY_IMAGES
+
+
+@dataclass
+class TenantUsage:
+    """테넌트의 당일(UTC) 사용량"""
+    day: str
+    tokens: int = 0
+    images: int = 0
+    requests: Dict[str, int] = field(default_factory=dict)
+
+
+def _parse_api_keys(spec: str) -> Dict[str, str]:
+    keys = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, tenant = entry.partition("=")
+        keys[key.strip()] = tenant.strip() or key.strip()
+    return keys
+
+
+def _parse_limits(spec: str) -> Dict[str, TenantLimits]:
+    limits: Dict[str, TenantLimits] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, value = entry.partition("=")
+        tenant, _, name = key.partition(":")
+        if name not in TenantLimits.__dataclass_fields__:
+            raise ValueError(f"알 수 없는 테넌트 한도입니다: {key}")
+        setattr(limits.setdefault(tenant, TenantLimits()), name, int(value))
+    return limits
+
+
+_api_keys = _parse_api_keys(TENANT_API_KEYS)
+_limits = _parse_limits(TENANT_LIMITS)
+_usage: Dict[str, TenantUsage] = {}
+
+# 현재 요청의 테넌트 (LLM/이미지 사용량을 이 테넌트에 기록, 백그라운드 작업에도 전파)
+_current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+
+def resolve_tenant(api_key: Optional[str]) -> str:
+    """API 키 -> 테넌트 (키 목록이 없으면 default)"""
+    if not _api_keys:
+        return DEFAULT_TENANT
+    tenant = _api_keys.get(api_key or "")
+    if tenant is None:
+        raise UnknownApiKeyError("유효한 API 키가 필요합니다")
+    return tenant
+
+
+def tenant_limits(tenant: str) -> TenantLimits:
+    return _limits.get(tenant) or TenantLimits()
+
+
+def _today() -> str:
+    return datetime.utcnow().date().isoformat()
+
+
+def _seconds_until_reset() -> float:
+    now = datetime.utcnow()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (tomorrow - now).total_seconds()
+
+
+def tenant_usage(tenant: str) -> TenantUsage:
+    """당일 사용량 (날짜가 바뀌면 초기화, 프로세스 메모리 기준)"""
+    usage = _usage.get(tenant)
+    today = _today()
+    if usage is None or usage.day != today:
+        usage = _usage[tenant] = TenantUsage(day=today)
+    return usage
+
+
+def charge_tokens(usage):
+    """LLM 응답의 토큰 사용량을 현재 테넌트에 기록"""
+    tenant = _current_tenant.get()
+    if tenant is None or usage is None:
+        return
+    count = sum(getattr(usage, token_type, None) or 0 for token_type in BILLED_TOKEN_TYPES)
+    tenant_usage(tenant).tokens += count
+    inc("tenant_tokens_total", count, tenant=tenant)
+
+
+def charge_images(count: int = 1):
+    """이미지 생성 API 사용량을 현재 테넌트에 기록"""
+    tenant = _current_tenant.get()
+    if tenant is None:
+        return
+    tenant_usage(tenant).images += count
+    inc("tenant_images_total", count, tenant=tenant)
+
+
+def check_budget(tenant: str, scope: str):
+    """작업에 필요한 일일 예산이 남았는지 확인 (진행 중인 작업은 끝까지 실행되므로 한도는 약간 넘을 수 있음)"""
+    limits = tenant_limits(tenant)
+    usage = tenant_usage(tenant)
+    for budget in SCOPE_BUDGETS.get(scope, ()):
+        limit = getattr(limits, f"daily_{budget}")
+        if limit and getattr(usage, budget) >= limit:
+            raise QuotaExceededError(
+                f"오늘 사용할 수 있는 {'토큰' if budget == 'tokens' else '이미지 생성'} 한도를 모두 사용했습니다",
+                retry_after=_seconds_until_reset(),
+            )
+
+
+class FairScheduler:
+    """테넌트별 동시 실행 제한 + 전체 슬롯을 대기 중인 테넌트에 라운드 로빈으로 배정
+
+    한 테넌트가 요청을 몰아 보내도 다른 테넌트의 요청은 자기 차례에 바로 실행된다.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.running = 0
+        self.running_by_tenant: Dict[str, int] = {}
+        # 테넌트 -> 대기 중인 요청 (앞에 있는 테넌트부터 배정, 배정 후 맨 뒤로)
+        self.waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    def _has_room(self, tenant: str) -> bool:
+        limit = tenant_limits(tenant).max_concurrent
+        return not limit or self.running_by_tenant.get(tenant, 0) < limit
+
+    def _start(self, tenant: str):
+        self.running += 1
+        self.running_by_tenant[tenant] = self.running_by_tenant.get(tenant, 0) + 1
+        set_gauge("tenant_active_requests", self.running_by_tenant[tenant], tenant=tenant)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for tenant in list(self.waiters):
+            queue = self.waiters[tenant]
+            # 시간 초과/취소된 요청 정리
+            while queue and queue[0].done():
+                queue.popleft()
+            if not queue:
+                del self.waiters[tenant]
+                continue
+            if not self._has_room(tenant):
+                continue
+
+            future = queue.popleft()
+            if queue:
+                self.waiters.move_to_end(tenant)
+            else:
+                del self.waiters[tenant]
+            self._start(tenant)
+            return future
+        return None
+
+    def _dispatch(self):
+        while not self.capacity or self.running < self.capacity:
+            future = self._next_waiter()
+            if future is None:
+                return
+            future.set_result(None)
+
+    async def acquire(self, tenant: str, timeout: Optional[float]):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(tenant, deque()).append(future)
+        self._dispatch()
+        if future.done():
+            return
+
+        try:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(tenant, future)
+            raise
+        if not done:
+            self._abandon(tenant, future)
+            raise SchedulerBusyError("요청이 많아 처리하지 못했습니다", retry_after=5)
+
+    def _abandon(self, tenant: str, future: asyncio.Future):
+        if future.done() and not future.cancelled():
+            # 슬롯을 받은 직후 취소된 경우 바로 반납
+            self.release(tenant)
+        else:
+            future.cancel()
+
+    def release(self, tenant: str):
+        self.running -= 1
+        self.running_by_tenant[tenant] -= 1
+        set_gauge("tenant_active_requests", self.running_by_tenant[tenant], tenant=tenant)
+        self._dispatch()
+
+
+_scheduler = FairScheduler(SCHEDULER_CONCURRENCY)
+
+
+@asynccontextmanager
+async def tenant_scope(tenant: str, scope: str, timeout: Optional[float] = SCHEDULER_WAIT_TIMEOUT):
+    """예산 확인 후 실행 슬롯을 받아 작업 실행 (사용량은 이 테넌트에 기록, timeout=None이면 슬롯이 날 때까지 대기)"""
+    try:
+        check_budget(tenant, scope)
+    except QuotaExceededError:
+        inc("tenant_requests_total", tenant=tenant, scope=scope, outcome="quota_exceeded")
+        raise
+
+    queued = time.perf_counter()
+    try:
+        await _scheduler.acquire(tenant, timeout)
+    except SchedulerBusyError:
+        inc("tenant_requests_total", tenant=tenant, scope=scope, outcome="busy")
+        raise
+    finally:
+        observe("tenant_queue_wait_seconds", time.perf_counter() - queued, scope=scope)
+
+    usage = tenant_usage(tenant)
+    usage.requests[scope] = usage.requests.get(scope, 0) + 1
+    inc("tenant_requests_total", tenant=tenant, scope=scope, outcome="admitted")
+    # 의존성 종료가 다른 컨텍스트에서 실행될 수 있어 reset(token) 대신 이전 값으로 되돌림
+    previous = _current_tenant.get()
+    _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.set(previous)
+        _scheduler.release(tenant)
+
+
+def current_tenant() -> str:
+    """현재 컨텍스트의 테넌트 (요청 밖에서 시작된 작업은 default)"""
+    return _current_tenant.get() or DEFAULT_TENANT
+
+
+def active_requests(tenant: str) -> int:
+    return _scheduler.running_by_tenant.get(tenant, 0)
+
+
+# --- FastAPI 의존성 ---------------------------------------------------------
+
+async def get_tenant(request: Request) -> str:
+    """요청 헤더로 테넌트 식별 (이후 사용량은 이 테넌트에 기록)"""
+    tenant = resolve_tenant(request.headers.get(TENANT_HEADER))
+    _current_tenant.set(tenant)
+    return tenant
+
+
+def tenant_slot(scope: str):
+    """테넌트 식별 + 예산 확인 + 실행 슬롯 배정 의존성"""
+
+    async def dependency(request: Request):
+        tenant = await get_tenant(request)
+        async with tenant_scope(tenant, scope):
+            yield tenant
+
+    return dependency
@@ -0,0 +1,302 @@
+"""부하 테스트 - 가상 사용자가 문답부터 이미지 다운로드까지 전체 흐름을 반복
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.loadtest --users 50 --duration 60              # 스텁 서버 1개 자동 실행
+    python -m benchmarks.loadtest --users 50 --workers 4                # 스텁 서버 4개 (워커 수 산정용)
+    python -m benchmarks.loadtest --base-url http://localhost:8000      # 이미 실행 중인 백엔드 대상
+
+흐름: create_session -> 답변 제출 -> next-question 반복 -> detail-page -> 이미지 다운로드
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+
+ANSWERS = {
+    "reference_url": "skip",
+    "product_name": "프리미엄 보온 텀블러",
+    "category": "생활용품",
+    "target_customer": "출퇴근하는 직장인",
+    "usp": "12시간 보온, 원터치 뚜껑",
+    "price_info": "29,900원",
+    "product_images": "skip",
+    "mood": "심플한",
+}
+
+
+class Recorder:
+    """단계별 지연/오류 기록"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.flows_completed = 0
+
+    async def call(self, step: str, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+            response.raise_for_status()
+            return response
+        except Exception:
+            self.errors[step] += 1
+            raise
+        finally:
+            self.latencies[step].append((time.perf_counter() - started) * 1000)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_flow(client: httpx.AsyncClient, recorder: Recorder, output_format: str):
+    """가상 사용자 1회 흐름"""
+    started = time.perf_counter()
+
+    session = (await recorder.call("create_session", client.post("/api/interview/sessions", json={}))).json()
+    session_id = session["id"]
+
+    while True:
+        question = (await recorder.call(
+            "next_question", client.get(f"/api/interview/sessions/{session_id}/next-question")
+        )).json()
+        if question["input_type"] == "complete":
+            break
+        await recorder.call("answer", client.post(
+            f"/api/interview/sessions/{session_id}/answer",
+            json={"field_name": question["field_name"], "value": ANSWERS.get(question["field_name"], "skip")},
+        ))
+
+    result = (await recorder.call("detail_page", client.post(
+        "/api/generate/detail-page",
+        json={"session_id": session_id, "output_format": output_format},
+    ))).json()
+
+    if result.get("image_url"):
+        await recorder.call("image_download", client.get(result["image_url"]))
+
+    recorder.latencies["flow_total"].append((time.perf_counter() - started) * 1000)
+    recorder.flows_completed += 1
+
+
+async def virtual_user(base_url: str, recorder: Recorder, deadline: float, args):
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+        while time.perf_counter() < deadline:
+            try:
+                await run_flow(client, recorder, args.output_format)
+            except Exception:
+                recorder.errors["flow_total"] += 1
+            if args.think_time:
+                await asyncio.sleep(args.think_time)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """프로세스 RSS (Linux /proc 기준)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def start_stub_servers(args) -> List[subprocess.Popen]:
+    """스텁 백엔드 워커 실행 (같은 DB 공유, 포트별 1프로세스)"""
+    workdir = tempfile.mkdtemp(prefix="detailpage-load-")
+    os.makedirs(os.path.join(workdir, "data"))
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(workdir, 'data', 'load.db')}",
+        "PYTHONPATH": BACKEND_DIR,
+        # 시나리오가 같은 상품 정보를 반복하므로 유사 카피 재사용을 꺼서 매번 카피 생성 경로를 측정
+        "COPY_REUSE_ENABLED": "0",
+    }
+    env.pop("ANTHROPIC_API_KEY", None)
+    env.pop("OPENAI_API_KEY", None)
+
+    servers = []
+    for _ in range(args.workers):
+        port = _free_port()
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.stub_server",
+                "--port", str(port),
+                "--llm-latency-ms", str(args.llm_latency_ms),
+                "--image-latency-ms", str(args.image_latency_ms),
+            ],
+            cwd=workdir,
+            env=env,
+        )
+        process.base_url = f"http://127.0.0.1:{port}"
+        servers.append(process)
+        # 첫 워커가 테이블/시드 생성을 마친 뒤 다음 워커 시작
+        _wait_until_healthy(process.base_url)
+
+    return servers
+
+
+def _wait_until_healthy(base_url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"서버가 시작되지 않았습니다: {base_url}")
+
+
+def _scrape_loop_lag(base_url: str) -> Dict[str, float]:
+    """/metrics에서 이벤트 루프 지연 (평균, 최대) 추출"""
+    try:
+        text = httpx.get(f"{base_url}/metrics", timeout=5).text
+    except httpx.HTTPError:
+        return {}
+
+    values = {}
+    for name in ("event_loop_lag_seconds_sum", "event_loop_lag_seconds_count", "event_loop_lag_max_seconds"):
+        match = re.search(rf"^{name}(?:{{[^}}]*}})? ([0-9.e+-]+)$", text, re.MULTILINE)
+        if match:
+            values[name] = float(match.group(1))
+
+    if not values.get("event_loop_lag_seconds_count"):
+        return {}
+    return {
+        "mean_ms": values["event_loop_lag_seconds_sum"] / values["event_loop_lag_seconds_count"] * 1000,
+        "max_ms": values.get("event_loop_lag_max_seconds", 0) * 1000,
+    }
+
+
+async def run_load(args, base_urls: List[str], server_pids: List[int]) -> Dict:
+    recorder = Recorder()
+    peak_rss = 0
+    stop = asyncio.Event()
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while not stop.is_set():
+            total = sum(_rss_bytes(pid) or 0 for pid in server_pids)
+            peak_rss = max(peak_rss, total)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_rss())
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    users = []
+    for index in range(args.users):
+        users.append(asyncio.create_task(virtual_user(base_urls[index % len(base_urls)], recorder, deadline, args)))
+        if args.ramp_up:
+            await asyncio.sleep(args.ramp_up / args.users)
+
+    await asyncio.gather(*users)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+
+    steps = {}
+    for step, values in recorder.latencies.items():
+        steps[step] = {
+            "count": len(values),
+            "errors": recorder.errors.get(step, 0),
+            "error_rate": round(recorder.errors.get(step, 0) / len(values), 4) if values else 0,
+            "p50_ms": round(_percentile(values, 50), 1),
+            "p95_ms": round(_percentile(values, 95), 1),
+            "p99_ms": round(_percentile(values, 99), 1),
+        }
+
+    loop_lag = [lag for lag in (_scrape_loop_lag(url) for url in base_urls) if lag]
+    attempted = recorder.flows_completed + recorder.errors.get("flow_total", 0)
+
+    return {
+        "users": args.users,
+        "workers": len(base_urls),
+        "duration_s": round(elapsed, 1),
+        "flows_completed": recorder.flows_completed,
+        "flows_per_s": round(recorder.flows_completed / elapsed, 2),
+        "flow_error_rate": round(recorder.errors.get("flow_total", 0) / attempted, 4) if attempted else 0,
+        "steps": steps,
+        "event_loop_lag_ms": {
+            "mean": round(sum(lag["mean_ms"] for lag in loop_lag) / len(loop_lag), 2) if loop_lag else None,
+            "max": round(max(lag["max_ms"] for lag in loop_lag), 2) if loop_lag else None,
+        },
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1) if server_pids else None,
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n가상 사용자 {report['users']}명, 워커 {report['workers']}개, {report['duration_s']}초")
+    print(f"완료 흐름 {report['flows_completed']}회 ({report['flows_per_s']}/s), 흐름 오류율 {report['flow_error_rate']:.2%}")
+    print(f"{'단계':<16}{'횟수':>8}{'오류율':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for step, stats in report["steps"].items():
+        print(f"{step:<16}{stats['count']:>8}{stats['error_rate']:>9.2%}"
+              f"{stats['p50_ms']:>8.0f}ms{stats['p95_ms']:>8.0f}ms{stats['p99_ms']:>8.0f}ms")
+    lag = report["event_loop_lag_ms"]
+    if lag["mean"] is not None:
+        print(f"이벤트 루프 지연: 평균 {lag['mean']}ms, 최대 {lag['max']}ms")
+    if report["peak_rss_mb"] is not None:
+        print(f"서버 최대 RSS 합계: {report['peak_rss_mb']}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문답-이미지 전체 흐름 부하 테스트")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="테스트 시간 (초)")
+    parser.add_argument("--ramp-up", type=float, default=5, help="모든 사용자가 시작될 때까지의 시간 (초)")
+    parser.add_argument("--think-time", type=float, default=0, help="흐름 사이 대기 (초)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output-format", default="both", choices=["html", "image", "both"])
+    parser.add_argument("--base-url", help="이미 실행 중인 백엔드 주소 (없으면 스텁 서버 실행)")
+    parser.add_argument("--workers", type=int, default=1, help="실행할 스텁 서버 프로세스 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--image-latency-ms", type=float, default=2000)
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    servers = []
+    try:
+        if args.base_url:
+            base_urls = [args.base_url.rstrip("/")]
+        else:
+            servers = start_stub_servers(args)
+            base_urls = [server.base_url for server in servers]
+
+        report = asyncio.run(run_load(args, base_urls, [server.pid for server in servers]))
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait(timeout=10)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
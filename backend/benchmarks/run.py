@@ -0,0 +1,265 @@
+"""오프라인 벤치마크 - 스텁 AI 제공자로 주요 흐름의 지연/처리량 측정
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.run                       # 측정 후 기준선과 비교
+    python -m benchmarks.run --save-baseline       # 현재 결과를 기준선으로 저장
+    python -m benchmarks.run --llm-latency-ms 300  # 실제 API에 가까운 지연으로 측정
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+SAMPLE_CONTEXT = {
+    "product_name": "프리미엄 보온 텀블러",
+    "category": "생활용품",
+    "target_customer": "출퇴근하는 직장인",
+    "usp": "12시간 보온, 원터치 뚜껑",
+    "price_info": "29,900원 (런칭 특가 20% 할인)",
+    "mood": "심플한",
+}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _serve_fixtures() -> http.server.ThreadingHTTPServer:
+    """참고 페이지 분석용 로컬 HTML 서버"""
+    handler = functools.partial(_QuietHandler, directory=FIXTURES_DIR)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+async def _browser_available() -> bool:
+    try:
+        from playwright.async_api import async_playwright
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch()
+            await browser.close()
+        return True
+    except Exception:
+        return False
+
+
+def _stage_deltas(before, after) -> Dict[str, Dict[str, float]]:
+    """구간 동안 기록된 단계별 (평균 ms, 횟수)"""
+    stages: Dict[str, Dict[str, float]] = {}
+    for key, (total, count) in after.items():
+        prev_total, prev_count = before.get(key, (0.0, 0))
+        if count == prev_count:
+            continue
+        stage = dict(key).get("stage", "?")
+        entry = stages.setdefault(stage, {"total_ms": 0.0, "count": 0})
+        entry["total_ms"] += (total - prev_total) * 1000
+        entry["count"] += count - prev_count
+
+    return {
+        stage: {"mean_ms": round(entry["total_ms"] / entry["count"], 2), "count": entry["count"]}
+        for stage, entry in stages.items()
+    }
+
+
+async def _measure(name: str, fn: Callable[[], Awaitable[Any]], iterations: int, concurrency: int) -> Dict[str, Any]:
+    """시나리오 반복 실행 후 지연 분포/처리량 집계"""
+    from app.services.metrics import snapshot_histogram
+
+    # 워밍업 1회 (최초 컴파일/연결 비용 제외)
+    await fn()
+
+    before = snapshot_histogram("stage_duration_seconds")
+    latencies: List[float] = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run_once():
+        async with slots:
+            started = time.perf_counter()
+            await fn()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_once() for _ in range(iterations)))
+    wall = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "throughput_per_s": round(iterations / wall, 2),
+        "stages": _stage_deltas(before, snapshot_histogram("stage_duration_seconds")),
+    }
+
+
+async def run_benchmarks(args) -> Dict[str, Dict[str, Any]]:
+    import httpx
+
+    from app.main import app
+    from app.services.analyzer import analyze_reference_page
+    from app.services.renderer import generate_detail_page, html_to_image
+    from benchmarks.stubs import install_stubs
+
+    install_stubs(args.llm_latency_ms / 1000, args.image_latency_ms / 1000)
+    fixture_server = _serve_fixtures()
+    fixture_url = f"http://127.0.0.1:{fixture_server.server_address[1]}/reference.html"
+    has_browser = await _browser_available()
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def interview_flow():
+                session = (await client.post("/api/interview/sessions", json={})).json()
+                session_id = session["id"]
+                for field_name, value in SAMPLE_CONTEXT.items():
+                    await client.post(
+                        f"/api/interview/sessions/{session_id}/answer",
+                        json={"field_name": field_name, "value": value},
+                    )
+                while True:
+                    question = (await client.get(f"/api/interview/sessions/{session_id}/next-question")).json()
+                    if question["input_type"] == "complete":
+                        return session_id
+                    await client.post(
+                        f"/api/interview/sessions/{session_id}/answer",
+                        json={"field_name": question["field_name"], "value": "skip"},
+                    )
+
+            async def detail_page_api():
+                session_id = await interview_flow()
+                response = await client.post(
+                    "/api/generate/detail-page",
+                    json={"session_id": session_id, "output_format": "html"},
+                )
+                response.raise_for_status()
+
+            async def template_listing():
+                (await client.get("/api/templates/")).raise_for_status()
+
+            scenarios: Dict[str, Optional[Callable[[], Awaitable[Any]]]] = {
+                "interview_flow": interview_flow,
+                "generate_detail_page": lambda: generate_detail_page(SAMPLE_CONTEXT),
+                "detail_page_api_html": detail_page_api,
+                "template_listing": template_listing,
+            }
+
+            sample_html = await generate_detail_page(SAMPLE_CONTEXT)
+            scenarios["html_to_image"] = (lambda: html_to_image(sample_html, 0)) if has_browser else None
+            scenarios["reference_analysis"] = (lambda: analyze_reference_page(fixture_url)) if has_browser else None
+
+            for name, fn in scenarios.items():
+                if args.only and name not in args.only:
+                    continue
+                if fn is None:
+                    print(f"  {name}: 건너뜀 (Chromium 없음)")
+                    continue
+                results[name] = await _measure(name, fn, args.iterations, args.concurrency)
+                print(f"  {name}: p50 {results[name]['p50_ms']}ms, p95 {results[name]['p95_ms']}ms, "
+                      f"{results[name]['throughput_per_s']}/s")
+
+    fixture_server.shutdown()
+    return results
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """기준선 대비 p50/p95가 허용 범위를 넘게 느려진 시나리오 목록"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get("results", {}).get(name)
+        if not expected:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            limit = expected[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name} {metric}: {result[metric]}ms > 기준 {expected[metric]}ms (+{tolerance:.0%} 허용)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상세페이지 생성 파이프라인 오프라인 벤치마크")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--image-latency-ms", type=float, default=200)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용 지연 증가율 (0.25 = 25%%)")
+    parser.add_argument("--only", nargs="*", help="실행할 시나리오 이름")
+    args = parser.parse_args()
+    args.baseline = os.path.abspath(args.baseline)
+
+    # 실제 키/DB를 건드리지 않도록 앱 임포트 전에 환경 설정
+    workdir = tempfile.mkdtemp(prefix="detailpage-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'data', 'bench.db')}"
+    os.environ.pop("ANTHROPIC_API_KEY", None)
+    os.environ.pop("OPENAI_API_KEY", None)
+    # 같은 상품 정보를 반복하므로 유사 카피 재사용을 끄지 않으면 두 번째 반복부터 카피 생성이 측정되지 않음
+    os.environ["COPY_REUSE_ENABLED"] = "0"
+    sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+    os.chdir(workdir)
+
+    print(f"벤치마크 실행 (반복 {args.iterations}회, 동시성 {args.concurrency})")
+    results = asyncio.run(run_benchmarks(args))
+
+    settings = {
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "llm_latency_ms": args.llm_latency_ms,
+        "image_latency_ms": args.image_latency_ms,
+        "copy_reuse": False,
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"기준선 저장: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("기준선 없음 - --save-baseline으로 먼저 저장하세요")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    if baseline.get("settings") != settings:
+        print("경고: 기준선과 측정 설정이 다릅니다", baseline.get("settings"))
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("성능 저하 감지:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+
+    print("기준선 대비 성능 저하 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""부하 테스트용 백엔드 - AI 제공자를 스텁으로 교체한 상태로 uvicorn 실행
+
+    python -m benchmarks.stub_server --port 8100 --llm-latency-ms 300
+"""
+import argparse
+import asyncio
+import os
+
+
+async def serve(args):
+    # 이벤트 루프 지연/블로킹 위치를 /metrics로 노출
+    os.environ.setdefault("LOOP_MONITOR_ENABLED", "1")
+
+    import uvicorn
+
+    from app.main import app
+    from benchmarks.stubs import install_stubs
+
+    install_stubs(args.llm_latency_ms / 1000, args.image_latency_ms / 1000)
+
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+    await uvicorn.Server(config).serve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스텁 AI 제공자 백엔드")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--image-latency-ms", type=float, default=2000)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""AI 제공자 클라이언트 대체용 로컬 스텁 (고정 응답 + 설정 가능한 지연)"""
+import asyncio
+import base64
+import io
+import json
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image
+
+VISION_RESPONSE = {
+    "layout_pattern": "상단 히어로 - 특징 그리드 - 가격 - 구매 유도 순서의 세로형 레이아웃",
+    "color_scheme": {
+        "primary": "#667eea",
+        "secondary": "#764ba2",
+        "background": "#ffffff",
+        "accent": "#191F28",
+    },
+    "sections": ["히어로", "주요 특징", "가격", "구매 유도"],
+    "highlights": ["그라데이션 배경", "카드형 특징 목록"],
+    "tone_and_manner": "심플한",
+}
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    content = messages[-1]["content"]
+    if isinstance(content, str):
+        return content
+    return "\n".join(block.get("text", "") for block in content if block.get("type") == "text")
+
+
+def _has_image(messages: List[Dict[str, Any]]) -> bool:
+    content = messages[-1]["content"]
+    return isinstance(content, list) and any(block.get("type") == "image" for block in content)
+
+
+class _StubMessages:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        # 프롬프트 캐시 흉내 - 이전에 본 cache_control 접두부
+        self._cached_prefixes = set()
+
+    def _cache_usage(self, system) -> Tuple[int, int, int]:
+        """(캐시 읽기, 캐시 쓰기, 캐시 미사용) 글자 수"""
+        if isinstance(system, str):
+            return 0, 0, len(system)
+        prefix = ""
+        read = written = 0
+        for block in system or []:
+            prefix += block.get("text", "")
+            if block.get("cache_control"):
+                if prefix in self._cached_prefixes:
+                    read = len(prefix)
+                else:
+                    self._cached_prefixes.add(prefix)
+                    written = len(prefix) - read
+        return read, written, len(prefix) - read - written
+
+    async def create(self, *, model: str, max_tokens: int, messages: List[Dict[str, Any]], system=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+        prompt = _prompt_text(messages)
+        system_text = system if isinstance(system, str) else "".join(b.get("text", "") for b in system or [])
+        if _has_image(messages):
+            text = json.dumps(VISION_RESPONSE, ensure_ascii=False)
+        elif "후속 질문" in system_text + prompt:
+            text = "COMPLETE"
+        else:
+            text = "오늘부터 달라지는 일상, 지금 바로 경험해보세요 ✨"
+
+        cache_read, cache_write, uncached = self._cache_usage(system)
+        usage = SimpleNamespace(
+            input_tokens=(len(prompt) + uncached) // 2 + (1500 if _has_image(messages) else 0),
+            output_tokens=len(text) // 2,
+            cache_creation_input_tokens=cache_write // 2,
+            cache_read_input_tokens=cache_read // 2,
+        )
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], usage=usage, model=model)
+
+
+class StubAnthropic:
+    """anthropic.AsyncAnthropic 대체"""
+
+    def __init__(self, latency: float = 0.05):
+        self.messages = _StubMessages(latency)
+
+
+def _tiny_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (240, 236, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class _StubImages:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._png = base64.b64encode(_tiny_png()).decode("ascii")
+
+    async def generate(self, *, model: str, prompt: str, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(data=[SimpleNamespace(b64_json=self._png, url=None)])
+
+
+class StubOpenAI:
+    """openai.AsyncOpenAI 대체"""
+
+    def __init__(self, latency: float = 0.2):
+        self.images = _StubImages(latency)
+
+
+def install_stubs(llm_latency: float = 0.05, image_latency: float = 0.2):
+    """app.services.claude / openai_service 클라이언트를 스텁으로 교체"""
+    from app.services import claude, openai_service, provider_gateway
+
+    claude.client = StubAnthropic(llm_latency)
+    openai_service.client = StubOpenAI(image_latency)
+
+    # 실제 제공자 한도로 측정이 막히지 않도록, 환경 변수로 지정하지 않은 속도 제한은 해제
+    for provider, env_name in (("anthropic", "ANTHROPIC_RPM"), ("openai", "OPENAI_RPM")):
+        if env_name not in os.environ:
+            provider_gateway.DEFAULT_RPM[provider] = 1_000_000
+    provider_gateway._buckets.clear()
+    return claude.client, openai_service.client
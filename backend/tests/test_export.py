@@ -0,0 +1,48 @@
+import asyncio
+import base64
+import io
+import json
+import zipfile
+from datetime import datetime
+
+from app.models.database import GenerationHistory
+from app.services.export import ExportBundle, _zip_chunks
+
+
+def _data_uri(content_type: str, body: bytes) -> str:
+    return f"data:{content_type};base64,{base64.b64encode(body).decode('ascii')}"
+
+
+async def _build_zip(bundle: ExportBundle) -> bytes:
+    return b"".join([chunk async for chunk in _zip_chunks(bundle)])
+
+
+def test_product_images_keep_their_extensions():
+    history = GenerationHistory(
+        id=1,
+        product_name="텀블러",
+        html_content="<html></html>",
+        image_path=None,
+        created_at=datetime(2026, 1, 1),
+    )
+    images = [
+        _data_uri("image/jpeg", b"jpeg-1"),
+        _data_uri("image/png", b"png-2"),
+        _data_uri("image/webp", b"webp-3"),
+    ]
+    bundle = ExportBundle(history, {"product_images": images})
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(_build_zip(bundle))))
+
+    expected = [
+        "page.html",
+        "product_images/01.jpg",
+        "product_images/02.png",
+        "product_images/03.webp",
+    ]
+    assert archive.namelist() == expected + ["manifest.json"]
+    assert archive.read("product_images/02.png") == b"png-2"
+
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [entry["path"] for entry in manifest["files"]] == expected
+    assert manifest["missing"] == []
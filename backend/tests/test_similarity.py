@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import similarity
+from app.services.renderer import SECTIONS, fallback_copy
+
+CONTEXT = {
+    "product_name": "무선 이어폰",
+    "category": "electronics",
+    "target_customer": "출퇴근하는 직장인",
+    "usp": "노이즈 캔슬링",
+    "price_info": "59,000원",
+}
+GENERATED = {key: f"{title} 생성 카피" for key, title in SECTIONS.items()}
+FALLBACK = {key: fallback_copy(CONTEXT, title) for key, title in SECTIONS.items()}
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """DB 대신 테스트에서 넣은 이력만 쓰는 빈 인덱스"""
+    index = similarity.SimilarityIndex()
+    index.last_id = 10
+
+    async def refresh():
+        pass
+
+    monkeypatch.setattr(index, "refresh", refresh)
+    monkeypatch.setattr(similarity, "_index", index)
+    monkeypatch.setattr(similarity, "COPY_REUSE_ENABLED", True)
+    return index
+
+
+def _history(history_id: int, sections):
+    return SimpleNamespace(id=history_id, session_id=history_id, product_name="무선 이어폰", sections=sections, context=CONTEXT)
+
+
+def _find():
+    return asyncio.run(similarity.find_similar_copy(CONTEXT, SECTIONS))
+
+
+def test_fallback_copy_is_never_returned(index):
+    index._append([_history(1, FALLBACK)])
+    assert _find() is None
+
+    index._append([_history(2, GENERATED)])
+    match = _find()
+    assert match.history_id == 2
+    assert match.sections == GENERATED
+
+
+def test_regenerated_sections_update_the_index(index):
+    index._append([_history(1, FALLBACK)])
+
+    # 기본 문구였던 이력이 새 카피를 받으면 인덱스에 추가
+    asyncio.run(similarity.update_indexed_copy(1, 1, "무선 이어폰", CONTEXT, GENERATED))
+    assert _find().sections == GENERATED
+
+    # 다시 기본 문구가 되면 제외
+    asyncio.run(similarity.update_indexed_copy(1, 1, "무선 이어폰", CONTEXT, FALLBACK))
+    assert _find() is None
@@ -0,0 +1,22 @@
+import pytest
+
+from app.services.template_validation import check_template
+
+
+@pytest.mark.parametrize("html_template", [
+    "{% include 'default.html' %}",
+    "{% if true %}{% include 'default.html' %}{% endif %}",
+    "{% for image in product_images %}{% import 'default.html' as page %}{% endfor %}",
+    "<div>{% block body %}{% from 'default.html' import hero %}{% endblock %}</div>",
+])
+def test_rejects_template_references_anywhere(html_template):
+    assert any("extends/include/import" in error for error in check_template(html_template))
+
+
+def test_accepts_contract_template():
+    html_template = (
+        "<h1>{{ product_name }}</h1>"
+        "{% for image in product_images %}<img src=\"{{ image }}\">{% endfor %}"
+        "{% for key, text in sections.items() %}<p>{{ text }}</p>{% endfor %}"
+    )
+    assert check_template(html_template) == []